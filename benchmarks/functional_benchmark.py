@@ -0,0 +1,159 @@
+"""
+Benchmark measuring the raw interpreter speed (instructions per second) on Klaus Dormann's 6502 functional test ROM.
+
+By default the ROM runs in the fast mode of cpu6502.functional: the exhaustive ADC / SBC loops (SKIPPED_LOOPS) are
+skipped, which leaves ~56K of the ~30.6M instructions of the ROM. --full runs all of them and takes minutes (about one
+on the machine of the baseline, 2.5 on slower ones). The best of --repeat runs is reported and can be written as JSON
+(--json) and compared against a tracked baseline (--baseline).
+
+Raw speeds depend on the machine, so the comparison uses the relative speed: instructions per second divided by the
+iterations per second of a fixed pure Python loop timed in the same process (reference_loop). The benchmark exits
+with status 1 when the relative speed drops more than --tolerance below the baseline or the run takes longer than
+--max-seconds; the instructions per second of the baseline machine are only reported.
+
+Usage: python benchmarks/functional_benchmark.py [--full] [--max-instructions N] [--repeat N] [--json out.json]
+                                                 [--baseline benchmarks/functional_baseline.json] [--tolerance 0.2]
+                                                 [--max-seconds S] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cpu6502.functional import run_functional_test, setup_cpu  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'functional_baseline.json')
+REFERENCE_ITERATIONS = 200000
+
+
+def reference_loop(iterations: int = REFERENCE_ITERATIONS) -> float:
+    """
+    Times a pure Python loop of table lookups, masks and attribute stores, like the work of the interpreter
+    :param iterations: int: Number of iterations
+    :return: float: Elapsed seconds
+    """
+    class Registers:
+        acc = 0
+    registers, table = Registers(), list(range(0x100))
+    start = time.perf_counter()
+    for value in range(iterations):
+        registers.acc = (registers.acc + table[value & 0xff]) & 0xff
+    return time.perf_counter() - start
+
+
+def run(max_instructions: int = None, fast: bool = True) -> tuple:
+    """
+    Runs the functional test ROM until it traps, leaves the memory or executes max_instructions
+    :param max_instructions: int: Upper bound of executed instructions
+    :param fast: bool: Skip the exhaustive ADC / SBC loops
+    :return: tuple: (executed instructions, elapsed seconds, clock cycles, stop pc)
+    """
+    cpu = setup_cpu()
+    start = time.perf_counter()
+    result = run_functional_test(cpu, fast=fast, max_instructions=max_instructions)
+    elapsed = time.perf_counter() - start
+    return result.instructions, elapsed, result.cycles, result.pc
+
+
+def measure(max_instructions: int = None, fast: bool = True, repeat: int = 5) -> dict:
+    """
+    Runs the benchmark repeat times
+    :return: dict: Results of the fastest run, with the best speed relative to the reference loop timed around each run
+    """
+    runs, relative_speeds = [], []
+    for _ in range(repeat):
+        before = reference_loop()
+        runs.append(run(max_instructions, fast))
+        reference_seconds = min(before, reference_loop())
+        relative_speeds.append(runs[-1][0] / runs[-1][1] * reference_seconds / REFERENCE_ITERATIONS)
+    executed, seconds, cycles, pc = min(runs, key=lambda r: r[1])
+    return {
+        'mode': 'fast' if fast else 'full',
+        'instructions': executed,
+        'cycles': cycles,
+        'pc': pc,
+        'seconds': round(seconds, 4),
+        'instructions_per_second': round(executed / seconds),
+        'relative_speed': round(max(relative_speeds), 4),
+        'python': platform.python_version(),
+    }
+
+
+def check(results: dict, baseline: dict, tolerance: float, max_seconds: float = None) -> list:
+    """
+    Compares the results against a baseline
+    :param results: dict: Output of measure
+    :param baseline: dict: Mode -> results of measure, as stored in the baseline file
+    :param tolerance: float: Allowed relative slowdown of the speed relative to the reference loop
+    :param max_seconds: float: Allowed duration of the run
+    :return: list: Descriptions of the failed checks
+    """
+    failures = []
+    reference = baseline.get(results['mode'])
+    if reference is not None:
+        if results['instructions'] != reference['instructions']:
+            failures.append(f'executed {results["instructions"]} instructions, '
+                            f'the baseline executed {reference["instructions"]}')
+        minimum = reference['relative_speed'] * (1 - tolerance)
+        if results['relative_speed'] < minimum:
+            failures.append(f'relative speed {results["relative_speed"]} is below {minimum:.4f} '
+                            f'(baseline {reference["relative_speed"]} - {tolerance:.0%})')
+    if max_seconds is not None and results['seconds'] > max_seconds:
+        failures.append(f'took {results["seconds"]:.3f} s, more than {max_seconds} s')
+    return failures
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark the interpreter on the functional test ROM')
+    parser.add_argument('--full', action='store_true', help='run the exhaustive ADC / SBC loops as well')
+    parser.add_argument('--max-instructions', type=int, help='stop after this many instructions')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs, the fastest is reported')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', nargs='?', const=BASELINE_PATH,
+                        help=f'compare against a baseline file (default: {os.path.relpath(BASELINE_PATH)})')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown relative to the reference loop (default: 0.2 = 20%%)')
+    parser.add_argument('--max-seconds', type=float, help='fail if the run takes longer')
+    parser.add_argument('--update-baseline', action='store_true', help='store the results in the baseline file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = measure(args.max_instructions, not args.full, args.repeat)
+    print(f'Executed {results["instructions"]} instructions ({results["cycles"]} cycles, {results["mode"]} mode) in '
+          f'{results["seconds"]:.3f} s: {results["instructions_per_second"]:,} instructions/s, '
+          f'{results["relative_speed"]} instructions per reference loop iteration')
+    if results['mode'] == 'fast':
+        print('Fast mode skips the exhaustive ADC / SBC loops, ~30M of the ~30.6M instructions of the ROM; '
+              '--full runs them (minutes)')
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    baseline_path = args.baseline or BASELINE_PATH
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as file:
+            baseline = json.load(file)
+    if args.update_baseline:
+        baseline[results['mode']] = results
+        with open(baseline_path, 'w') as file:
+            json.dump(baseline, file, indent=2)
+            file.write('\n')
+        return 0
+    reference = baseline.get(results['mode']) if args.baseline else None
+    if reference is not None:
+        print(f'Baseline: {reference["instructions_per_second"]:,} instructions/s on its machine (not compared), '
+              f'relative speed {reference["relative_speed"]}')
+    failures = check(results, baseline if args.baseline else {}, args.tolerance, args.max_seconds)
+    for failure in failures:
+        print(f'Regression: {failure}', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Microbenchmark suite timing every opcode of cpu6502/6502_instructions.json (each instruction in each of its addressing
+modes) and a few composite workloads (memcpy loop, bubble sort, the functional test ROM).
+
+Every opcode is executed on its own, with the pc reset before each execution, so the times include the fetch of the
+opcode and the dispatch. The cost of an empty dispatch is measured as well and subtracted in net_ns. The results can
+be written as JSON (--json) and compared against an earlier run (--compare) to see which handlers in
+cpu6502/instructions got slower or faster.
+
+Usage: python benchmarks/opcode_benchmark.py [--iterations N] [--repeat N] [--only LDA,STA] [--no-workloads]
+                                             [--json out.json] [--compare previous.json] [--top N]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cpu6502  # noqa: E402
+from cpu6502.cpu import CPU  # noqa: E402
+from cpu6502.functional import SUCCESS_PC, run_functional_test, setup_cpu as setup_functional  # noqa: E402
+from cpu6502.memory import Memory  # noqa: E402
+from cpu6502.translator import Translator  # noqa: E402
+
+INSTRUCTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(cpu6502.__file__)), '6502_instructions.json')
+CODE_ADDRESS = 0x0400
+ZERO_PAGE_OPERAND = 0x10  # (0x10) -> 0x0300, (0x11) -> 0x0303 for the indirect modes with X = Y = 1
+ABSOLUTE_OPERAND = 0x0300
+IRQ_VECTOR = 0xfffe
+
+
+def setup_cpu() -> CPU:
+    cpu = CPU()
+    cpu.reset(memory=Memory())
+    for address, value in enumerate([0x00, 0x03, 0x03], start=ZERO_PAGE_OPERAND):
+        cpu.memory[address] = value
+    cpu.memory[ABSOLUTE_OPERAND] = 0x00  # Indirect JMP target
+    cpu.memory[ABSOLUTE_OPERAND + 1] = CODE_ADDRESS >> 8
+    cpu.memory[IRQ_VECTOR] = CODE_ADDRESS & 0xff
+    cpu.memory[IRQ_VECTOR + 1] = CODE_ADDRESS >> 8
+    cpu.idx = cpu.idy = 1
+    cpu.sp = 0xff
+    return cpu
+
+
+def load_opcodes(filepath: str = INSTRUCTIONS_PATH) -> list:
+    """
+    Function to read the instruction set
+    :param filepath: str: Path to the json file containing the instruction set
+    :return: list: (opcode, name, mode, size in bytes) sorted by opcode
+    """
+    with open(filepath) as file:
+        contents = json.load(file)
+    return sorted((int(entry['opcode'].strip('$'), 16), entry['name'], entry['mode'], int(entry['bytes']))
+                  for entry in contents)
+
+
+def time_dispatch(cpu: CPU, entry: tuple, iterations: int) -> tuple:
+    """
+    Function to time the execution of the instruction at CODE_ADDRESS with the given dispatch table entry
+    :return: tuple: (seconds per execution, cycles per execution)
+    """
+    handler, finalise = entry
+    fetch_byte_int = cpu.fetch_byte_int
+    clock = cpu.clock
+    start_cycles = clock.total_clock_cycles
+    start = time.perf_counter()
+    for _ in range(iterations):
+        cpu.pc = CODE_ADDRESS
+        fetch_byte_int()
+        handler()
+        finalise()
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations, (clock.total_clock_cycles - start_cycles) / iterations
+
+
+def benchmark_opcodes(iterations: int = 20000, repeat: int = 3, only: set = None) -> list:
+    """
+    Function to time every opcode of the instruction set
+    :param iterations: int: Executions of an opcode per measurement
+    :param repeat: int: Measurements per opcode, the fastest one is reported
+    :param only: set: Names of the instructions to be timed, all of them by default
+    :return: list: One dict per opcode
+    """
+    cpu = setup_cpu()
+    empty = (lambda: None, lambda: None)
+    overhead = min(time_dispatch(cpu, empty, iterations)[0] for _ in range(repeat))
+    results = []
+    for opcode, name, mode, size in load_opcodes():
+        if only and name not in only:
+            continue
+        operand = [ZERO_PAGE_OPERAND] if size == 2 else [ABSOLUTE_OPERAND & 0xff, ABSOLUTE_OPERAND >> 8]
+        for address, value in enumerate([opcode] + operand[:size - 1], start=CODE_ADDRESS):
+            cpu.memory[address] = value
+        entry = cpu.instructions.dispatch_table[opcode]
+        seconds, cycles = min(time_dispatch(cpu, entry, iterations) for _ in range(repeat))
+        instruction = type(entry[1].__self__)  # Handlers may be closures, their finalise is a bound method
+        results.append({
+            'opcode': f'0x{opcode:02x}',
+            'name': name,
+            'mode': mode,
+            'handler': f'{instruction.__module__}.{instruction.__name__}',
+            'ns': round(seconds * 1e9, 1),
+            'net_ns': round((seconds - overhead) * 1e9, 1),
+            'cycles': round(cycles, 2),
+        })
+    return results
+
+
+# Programs loaded at 0x0200, each ends with a 'jmp *' trap
+MEMCPY = [
+    0xa2, 0x10,  # ldx #$10 ; pages
+    0xa0, 0x00,  # ldy #$00
+    0xb1, 0x10,  # loop: lda ($10),y
+    0x91, 0x12,  # sta ($12),y
+    0xc8,  # iny
+    0xd0, 0xf9,  # bne loop
+    0xe6, 0x11,  # inc $11
+    0xe6, 0x13,  # inc $13
+    0xca,  # dex
+    0xd0, 0xf2,  # bne loop
+    0x4c, 0x12, 0x02,  # jmp *
+]
+SORT_LENGTH = 0x80
+BUBBLE_SORT = [
+    0xa0, 0x00,  # outer: ldy #$00 ; swapped
+    0xa2, 0x00,  # ldx #$00
+    0xbd, 0x00, 0x03,  # inner: lda $0300,x
+    0xdd, 0x01, 0x03,  # cmp $0301,x
+    0x90, 0x0f,  # bcc noswap
+    0xf0, 0x0d,  # beq noswap
+    0x48,  # pha
+    0xbd, 0x01, 0x03,  # lda $0301,x
+    0x9d, 0x00, 0x03,  # sta $0300,x
+    0x68,  # pla
+    0x9d, 0x01, 0x03,  # sta $0301,x
+    0xa0, 0x01,  # ldy #$01
+    0xe8,  # noswap: inx
+    0xe0, SORT_LENGTH - 1,  # cpx #length - 1
+    0xd0, 0xe4,  # bne inner
+    0x98,  # tya
+    0xd0, 0xdd,  # bne outer
+    0x4c, 0x23, 0x02,  # jmp *
+]
+
+
+def setup_program(program: list, data: dict) -> CPU:
+    cpu = setup_cpu()
+    for address, value in enumerate(program, start=0x0200):
+        cpu.memory[address] = value
+    for address, value in data.items():
+        cpu.memory[address] = value
+    cpu.pc = 0x0200
+    return cpu
+
+
+def timed_run(cpu: CPU, run=CPU.run) -> tuple:
+    start = time.perf_counter()
+    result = run(cpu)
+    return result, time.perf_counter() - start
+
+
+def translated_run(cpu: CPU):
+    return Translator(cpu).run()
+
+
+def run_memcpy(run=CPU.run) -> tuple:
+    data = {0x10: 0x00, 0x11: 0x20, 0x12: 0x00, 0x13: 0x40}
+    data.update({0x2000 + offset: offset * 7 & 0xff for offset in range(0x1000)})
+    cpu = setup_program(MEMCPY, data)
+    result, seconds = timed_run(cpu, run)
+    assert all(cpu.memory[0x4000 + offset] == offset * 7 & 0xff for offset in range(0x1000)), 'memcpy failed'
+    return result, seconds
+
+
+def run_bubble_sort(run=CPU.run) -> tuple:
+    cpu = setup_program(BUBBLE_SORT, {0x0300 + offset: SORT_LENGTH - offset for offset in range(SORT_LENGTH)})
+    result, seconds = timed_run(cpu, run)
+    values = [cpu.memory[0x0300 + offset] for offset in range(SORT_LENGTH)]
+    assert values == sorted(values), 'bubble sort failed'
+    return result, seconds
+
+
+def run_functional() -> tuple:
+    result, seconds = timed_run(setup_functional(), run_functional_test)
+    assert result.reason == CPU.STOP_TRAP and result.pc == SUCCESS_PC, 'functional test failed'
+    return result, seconds
+
+
+# Name -> function setting up and running the workload, it returns (RunResult, seconds spent running)
+WORKLOADS = {
+    'memcpy_4k': run_memcpy,
+    'bubble_sort_128': run_bubble_sort,
+    'functional_fast': run_functional,
+    'memcpy_4k_translated': lambda: run_memcpy(translated_run),
+    'bubble_sort_128_translated': lambda: run_bubble_sort(translated_run),
+}
+
+
+def benchmark_workloads(repeat: int = 3) -> list:
+    """
+    Function to time the composite workloads (their setup and checks are not timed)
+    :param repeat: int: Runs per workload, the fastest one is reported
+    :return: list: One dict per workload
+    """
+    results = []
+    for name, workload in WORKLOADS.items():
+        result, seconds = min((workload() for _ in range(repeat)), key=lambda timing: timing[1])
+        results.append({
+            'name': name,
+            'instructions': result.instructions,
+            'cycles': result.cycles,
+            'seconds': round(seconds, 4),
+            'instructions_per_second': round(result.instructions / seconds),
+        })
+    return results
+
+
+def compare(results: dict, previous: dict) -> list:
+    """
+    Function to compare the opcode times against an earlier run
+    :return: list: (relative change, opcode result) sorted from the largest slowdown
+    """
+    before = {entry['opcode']: entry for entry in previous.get('opcodes', [])}
+    changes = [(entry['ns'] / before[entry['opcode']]['ns'] - 1, entry)
+               for entry in results['opcodes'] if entry['opcode'] in before and before[entry['opcode']]['ns'] > 0]
+    return sorted(changes, key=lambda change: -change[0])
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Time every opcode and a few composite workloads')
+    parser.add_argument('--iterations', type=int, default=20000, help='executions of an opcode per measurement')
+    parser.add_argument('--repeat', type=int, default=3, help='measurements, the fastest is reported')
+    parser.add_argument('--only', type=lambda names: set(names.upper().split(',')),
+                        help='comma separated instructions to be timed, e.g. LDA,STA')
+    parser.add_argument('--no-workloads', dest='workloads', action='store_false', help='time the opcodes only')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='compare against the JSON results of an earlier run')
+    parser.add_argument('--top', type=int, default=15, help='number of opcodes listed in the report')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = {
+        'python': platform.python_version(),
+        'iterations': args.iterations,
+        'opcodes': benchmark_opcodes(args.iterations, args.repeat, args.only),
+        'workloads': benchmark_workloads(args.repeat) if args.workloads else [],
+    }
+    print(f'Slowest {args.top} of {len(results["opcodes"])} opcodes (ns per instruction, net of the dispatch):')
+    for entry in sorted(results['opcodes'], key=lambda entry: -entry['net_ns'])[:args.top]:
+        print(f'  {entry["opcode"]} {entry["name"]} {entry["mode"]:<13} {entry["net_ns"]:>8.1f} ns  '
+              f'{entry["cycles"]:.0f} cycles  {entry["handler"]}')
+    for entry in results['workloads']:
+        print(f'{entry["name"]}: {entry["instructions"]} instructions in {entry["seconds"]:.3f} s '
+              f'({entry["instructions_per_second"]:,} instructions/s)')
+    if args.compare:
+        with open(args.compare) as file:
+            changes = compare(results, json.load(file))
+        print(f'Largest changes against {args.compare}:')
+        listed = changes if len(changes) <= args.top else changes[:args.top // 2] + changes[-(args.top // 2):]
+        for change, entry in listed:
+            print(f'  {entry["opcode"]} {entry["name"]} {entry["mode"]:<13} {change:+.1%}')
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+
+from cpu6502.runner import main
+
+sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Precomputed arithmetic and logic unit of the 6502. Every table entry packs the 8 bit result in the low byte and the
+resulting flags (in status register order) in the high byte:
+
+    entry = TABLE[index]
+    result = entry & 0xff
+    cpu.status = (cpu.status & NOT_<OPERATION>_FLAGS) | (entry >> 8)
+
+The decimal flag is part of the ADC and SBC indexes, so decimal mode costs exactly the same table lookup as binary
+mode. The tables are plain lists, as indexing a list with an int is much cheaper than indexing a NumPy array from
+Python.
+"""
+import numpy as np
+
+from cpu6502.status import CARRY, NEGATIVE, OVERFLOW, ZERO
+
+ADC_FLAGS = NEGATIVE | OVERFLOW | ZERO | CARRY
+COMPARE_FLAGS = NEGATIVE | ZERO | CARRY
+SHIFT_FLAGS = NEGATIVE | ZERO | CARRY
+
+NOT_ADC_FLAGS = 0xff ^ ADC_FLAGS
+NOT_COMPARE_FLAGS = 0xff ^ COMPARE_FLAGS
+NOT_SHIFT_FLAGS = 0xff ^ SHIFT_FLAGS
+
+
+def _nz(result: np.ndarray) -> np.ndarray:
+    """
+    Function to compute the N and Z flags of an array of 8 bit results
+    :param result: np.ndarray: Results in range 0x00 - 0xff
+    :return: np.ndarray: N and Z flags of every result
+    """
+    return (result & NEGATIVE) | np.where(result == 0, ZERO, 0)
+
+
+def _pack(result: np.ndarray, flags: np.ndarray) -> list:
+    """
+    Function to pack results and flags into table entries. Equal entries share a single int object, so the large
+    tables cost one pointer per entry.
+    :param result: np.ndarray: Results in range 0x00 - 0xff
+    :param flags: np.ndarray: Flags of the results
+    :return: list: Packed entries as Python ints
+    """
+    shared = {}
+    return [shared.setdefault(entry, entry) for entry in ((result & 0xff) | (flags << 8)).astype(np.int64).tolist()]
+
+
+def adc_index(acc: int, value: int, carry: int, decimal: int = 0) -> int:
+    """
+    Function to compute the index of ADC_TABLE and SBC_TABLE
+    :param acc: int: Accumulator
+    :param value: int: Operand
+    :param carry: int: Carry flag (0 or 1)
+    :param decimal: int: Decimal flag (0 or 1)
+    :return: int: Index of the entry
+    """
+    return (decimal << 17) | (carry << 16) | (acc << 8) | value
+
+
+def _operands() -> tuple:
+    index = np.arange(0x20000, dtype=np.int64)
+    return index >> 16, (index >> 8) & 0xff, index & 0xff
+
+
+def _binary_adc(acc: np.ndarray, value: np.ndarray, carry: np.ndarray) -> tuple:
+    total = acc + value + carry
+    result = total & 0xff
+    flags = _nz(result) | np.where(total > 0xff, CARRY, 0) | \
+        np.where((acc ^ result) & (value ^ result) & 0x80, OVERFLOW, 0)
+    return result, flags
+
+
+def _decimal_adc(acc: np.ndarray, value: np.ndarray, carry: np.ndarray) -> tuple:
+    # NMOS behaviour as described in appendix A of http://www.6502.org/tutorials/decimal_mode.html: A and C come from
+    # the fully adjusted sum, N and V from the sum with only the low nibble adjusted, Z from the binary sum
+    low = (acc & 0x0f) + (value & 0x0f) + carry
+    low = np.where(low >= 0x0a, ((low + 0x06) & 0x0f) + 0x10, low)
+    total = (acc & 0xf0) + (value & 0xf0) + low
+    signed = ((acc & 0xf0) ^ 0x80) + ((value & 0xf0) ^ 0x80) - 0x100 + low
+    flags = (total & NEGATIVE) | np.where((signed < -0x80) | (signed > 0x7f), OVERFLOW, 0) | \
+        np.where((acc + value + carry) & 0xff == 0, ZERO, 0)
+    total = np.where(total >= 0xa0, total + 0x60, total)
+    return total & 0xff, flags | np.where(total > 0xff, CARRY, 0)
+
+
+def _decimal_sbc(acc: np.ndarray, value: np.ndarray, carry: np.ndarray) -> tuple:
+    # Only the result is adjusted, the NMOS 6502 sets all flags exactly as in binary mode
+    low = (acc & 0x0f) - (value & 0x0f) + carry - 1
+    low = np.where(low < 0, ((low - 0x06) & 0x0f) - 0x10, low)
+    total = (acc & 0xf0) - (value & 0xf0) + low
+    total = np.where(total < 0, total - 0x60, total)
+    return total & 0xff, _binary_adc(acc, value ^ 0xff, carry)[1]
+
+
+def _build_adc_table() -> list:
+    carry, acc, value = _operands()
+    return _pack(*_binary_adc(acc, value, carry)) + _pack(*_decimal_adc(acc, value, carry))
+
+
+def _build_sbc_table() -> list:
+    # A - M - (1 - C) == A + ~M + C, so binary SBC shares the carry and overflow logic of ADC
+    carry, acc, value = _operands()
+    return _pack(*_binary_adc(acc, value ^ 0xff, carry)) + _pack(*_decimal_sbc(acc, value, carry))
+
+
+def _build_compare_table() -> list:
+    index = np.arange(0x10000, dtype=np.int64)
+    register, value = index >> 8, index & 0xff
+    result = (register - value) & 0xff
+    flags = _nz(result) | np.where(register >= value, CARRY, 0)
+    return _pack(result, flags)
+
+
+def _build_shift_tables() -> tuple:
+    index = np.arange(0x200, dtype=np.int64)
+    carry, value = index >> 8, index & 0xff
+    tables = []
+    for result, carry_out in (((value << 1) & 0xff, value >> 7),
+                              (value >> 1, value & 1),
+                              (((value << 1) | carry) & 0xff, value >> 7),
+                              ((value >> 1) | (carry << 7), value & 1)):
+        tables.append(_pack(result, _nz(result) | np.where(carry_out, CARRY, 0)))
+    asl, lsr, rol, ror = tables
+    # ASL and LSR ignore the carry input, so only the first half of their tables is needed
+    return asl[:0x100], lsr[:0x100], rol, ror
+
+
+# ADC_TABLE[adc_index(acc, value, carry, decimal)], SBC_TABLE[adc_index(acc, value, carry, decimal)]
+ADC_TABLE = _build_adc_table()
+SBC_TABLE = _build_sbc_table()
+# COMPARE_TABLE[(register << 8) | value], the result byte is register - value
+COMPARE_TABLE = _build_compare_table()
+# ASL_TABLE[value], LSR_TABLE[value], ROL_TABLE[(carry << 8) | value], ROR_TABLE[(carry << 8) | value]
+ASL_TABLE, LSR_TABLE, ROL_TABLE, ROR_TABLE = _build_shift_tables()
@@ -1,74 +1,157 @@
 import os
 import sys
-from time import sleep
+from collections.abc import Mapping
+from math import inf
+from time import monotonic, sleep
+from typing import Callable, Iterable, NamedTuple, Union
 
-import numpy as np
 from numpy import ushort, ubyte
 
 import cpu6502.instructions.instructions
+from cpu6502.instructions import Trap
 from cpu6502.memory import Memory
+from cpu6502.snapshot import Snapshot
+from cpu6502.status import BREAK, CARRY, DECIMAL, INTERRUPT, NEGATIVE, OVERFLOW, RESERVED, ZERO, StatusView, \
+    flag_property, pack
+
+
+class RunResult(NamedTuple):
+    reason: str  # One of the CPU.STOP_* reasons
+    pc: int  # Program counter when the run stopped
+    instructions: int  # Number of executed instructions
+    cycles: int  # Number of clock cycles of the run
 
 
 class CPU(object):
+    # Reasons for CPU.run to stop
+    STOP_BREAKPOINT = 'breakpoint'
+    STOP_PREDICATE = 'predicate'
+    STOP_CYCLES = 'cycles'
+    STOP_INSTRUCTIONS = 'instructions'
+    STOP_TRAP = 'trap'
+    STOP_END_OF_MEMORY = 'end of memory'
+
     class Clock:
         """
-        Internal class used for storing the remaining cycles of the operation
+        Internal class used for counting the clock cycles of the operations. Counting a cycle is a single integer
+        addition. When a target speed is set, the emulation is throttled against a monotonic host clock once per
+        batch of cycles (one 60 Hz frame by default) instead of once per cycle.
         """
+        FRAME_RATE = 60
 
-        def __init__(self, speed_mhz=0):
-            self.cycles = True
+        def __init__(self, speed_mhz=0, batch_cycles: int = None):
             self.total_clock_cycles = 0
-            if speed_mhz > 0:
-                self.speed = 1 / (1000 * speed_mhz)
+            self.speed_mhz = speed_mhz if speed_mhz > 0 else 0
+            if self.speed_mhz > 0:
+                self.cycle_time = 1 / (1000000 * self.speed_mhz)  # Seconds per emulated cycle
+                self.batch_cycles = batch_cycles or max(1, int(1000000 * self.speed_mhz / CPU.Clock.FRAME_RATE))
+                self.next_sync = 0
             else:
-                self.speed = 0
+                self.cycle_time = 0
+                self.batch_cycles = batch_cycles
+                self.next_sync = inf  # Never throttled
+            self.drift = 0.0
+            self._start_time = None
+            self._start_cycles = 0
+
+        @property
+        def cycles(self) -> bool:
+            """
+            State of the clock signal (True for high), kept for debugging purposes
+            :return: bool: True if the clock is high
+            """
+            return self.total_clock_cycles % 2 == 0
 
         def clock(self) -> None:
             """
             Method used to do one clock cycle, useful for debugging
             :return: None
             """
-            self.cycles = not self.cycles
             self.total_clock_cycles += 1
-            sleep(self.speed)
 
         def __invert__(self):
             """
             Operator overload for using ~clock instead of clock.clock()
             :return:
             """
-            self.clock()
+            self.total_clock_cycles += 1
+
+        def synchronise(self) -> None:
+            """
+            Method used to throttle the emulation to the target speed. It sleeps for as long as the emulated time is
+            ahead of the host time and records the drift (in seconds) when the host cannot keep up.
+            :return: None
+            """
+            now = monotonic()
+            if self._start_time is None or self.total_clock_cycles < self._start_cycles:
+                self._start_time = now
+                self._start_cycles = self.total_clock_cycles
+            else:
+                emulated_time = (self.total_clock_cycles - self._start_cycles) * self.cycle_time
+                ahead = emulated_time - (now - self._start_time)
+                if ahead > 0:
+                    sleep(ahead)
+                    self.drift = 0.0
+                else:
+                    self.drift = -ahead
+            self.next_sync = self.total_clock_cycles + self.batch_cycles
 
     def __init__(self, speed_mhz=0):
+        if sys.byteorder == 'big':
+            raise SystemError('This emulator only works on little endian systems')
         self.clock = CPU.Clock(speed_mhz=speed_mhz)
-        self.pc = ushort()  # Program counter
-        self.sp = ubyte()  # Stack pointer
-        self.acc = ubyte()  # Accumulator
-        self.idx = ubyte()  # Index Register X
-        self.idy = ubyte()  # Index Register Y
-        # Processor status bits
-        self.ps = {
-            'carry_flag': bool(),
-            'zero_flag': bool(),
-            'interrupt_flag': bool(),
-            'decimal_flag': bool(),
-            'break_flag': bool(),
-            'reserved': bool(),
-            'overflow_flag': bool(),
-            'negative_flag': bool()
-        }
+        self.pc = 0  # Program counter
+        self.sp = 0  # Stack pointer
+        self.acc = 0  # Accumulator
+        self.idx = 0  # Index Register X
+        self.idy = 0  # Index Register Y
+        # Processor status bits packed into a single byte, see cpu6502.status
+        self.status = 0
+        self._ps_view = StatusView(self)
         self.memory = None
         self.io = None
+        # Jumps and branches to themselves raise cpu6502.instructions.Trap when set, see run
+        self.trap_detection = False
         self.instructions = cpu6502.instructions.instructions.Instructions(self, filepath=os.path.join(
             os.path.dirname(os.path.abspath(cpu6502.__file__)), '6502_instructions.json'))
 
+    @property
+    def ps(self) -> StatusView:
+        """
+        Dict-like view of the processor status, e.g. cpu.ps['carry_flag']
+        :return: StatusView: View reading and writing the packed status byte
+        """
+        return self._ps_view
+
+    @ps.setter
+    def ps(self, value) -> None:
+        """
+        Sets the whole processor status either from a packed byte or from a mapping of flag names to values
+        :param value: int or Mapping: New processor status
+        :return: None
+        """
+        if isinstance(value, Mapping):
+            self.status = pack(value)
+        else:
+            self.status = int(value) & 0xff
+
+    carry_flag = flag_property(CARRY)
+    zero_flag = flag_property(ZERO)
+    interrupt_flag = flag_property(INTERRUPT)
+    decimal_flag = flag_property(DECIMAL)
+    break_flag = flag_property(BREAK)
+    reserved = flag_property(RESERVED)
+    overflow_flag = flag_property(OVERFLOW)
+    negative_flag = flag_property(NEGATIVE)
+
     def __str__(self):
         return f'=============================\n' \
                f'||--- CPU 6502 emulator ---||\n' \
                f'=============================\n' \
                f' -> Clock state = {"H" if self.clock.cycles else "L"};' \
                f' Total clock cycles: {self.clock.total_clock_cycles};' \
-               f' Clock speed: {self.clock.speed * 1000 if self.clock.speed > 0 else "unlimited"} MHz\n' \
+               f' Clock speed: {self.clock.speed_mhz if self.clock.speed_mhz > 0 else "unlimited"} MHz;' \
+               f' Drift: {self.clock.drift:.6f} s\n' \
                f' -> CPU registers:\n' \
                f'\t -> Program counter: {hex(self.pc)}\n' \
                f'\t -> Stack pointer: {hex(self.sp)}\n' \
@@ -77,15 +160,37 @@ class CPU(object):
                f' -> Processor status bits: {self.ps}\n' \
                f' -> 10 next bytes after program counter: {self.memory.get_values(self.pc, 10)}'
 
-    def initialise_memory(self) -> None:
+    def initialise_memory(self, memory: Memory = None) -> None:
+        """
+        Method to give the cpu its memory
+        :param memory: Memory: Memory to be used (e.g. with a program already loaded), a new one by default
+        :return: None
+        """
         ~self.clock
-        self.memory = Memory()
+        self.memory = Memory() if memory is None else memory
 
-    def initialise_io(self, io, **kwargs) -> None:
+    def initialise_io(self, io=None, **kwargs) -> None:
+        """
+        Method to create the I/O (e.g. cpu6502.devices.DeviceBus) and connect it to the memory. Without io the current
+        one (if any) is reconnected.
+        :param io: Class (or any callable) creating the I/O object, called with kwargs
+        :return: None
+        """
         ~self.clock
-        self.io = io(**kwargs)
+        if io is not None:
+            self.io = io(**kwargs)
+        if self.io is not None:
+            self.io.connect(self)
 
-    def reset(self, io=None, **kwargs) -> None:
+    def reset(self, io=None, memory: Memory = None, **kwargs) -> None:
+        """
+        Method to reset the cpu, its memory and its I/O
+        :param io: Class (or any callable) creating the I/O object, see initialise_io
+        :param memory: Memory: Memory kept by the cpu (e.g. with a program already loaded), a new one by default
+        :return: None
+        """
+        if memory is not None:
+            self.memory = memory  # Receives the push below
         self.pc = 0xfffc
         ~self.clock
         self.sp = 0xff
@@ -95,17 +200,16 @@ class CPU(object):
         self.idy = 0
         self.ps['interrupt_flag'] = True
         # push idx on stack
-        self.push_byte_on_stack(np.ubyte(self.idx))
+        self.push_byte_on_stack(self.idx)
         self.ps['decimal_flag'] = False
         # set bit 5 (MCM) off, bit 3 (38 cols) off
-        # initialise I/O
-        # self.initialise_io(io, **kwargs)
         # initialise memory
-        self.initialise_memory()
+        self.initialise_memory(memory)
+        # initialise I/O (devices are mapped onto the memory, so it has to be initialised first)
+        self.initialise_io(io, **kwargs)
         # set I/O vectors (0x0314...0x0333) to kernel defaults
         # set system IRQ to correct value and start
-        pc_address = self.fetch_word()
-        self.pc = int(pc_address, base=0)
+        self.pc = self.fetch_word_int()
         self.ps['interrupt_flag'] = False
         self.ps['carry_flag'] = False
         self.ps['zero_flag'] = self.acc == 0
@@ -114,175 +218,230 @@ class CPU(object):
         self.ps['overflow_flag'] = False
         print('=========== RESET ===========')
 
+    def snapshot(self) -> Snapshot:
+        """
+        Method to capture the registers, the status, the clock cycle count and the RAM. Pages of the RAM not written
+        since the previous snapshot are shared with it, see Memory.snapshot_pages. The state of the I/O devices is not
+        captured.
+        :return: Snapshot: Captured state
+        """
+        return Snapshot(self.pc, self.sp, self.acc, self.idx, self.idy, self.status, self.clock.total_clock_cycles,
+                        self.memory.snapshot_pages())
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """
+        Method to restore a state captured by snapshot (by this or any other cpu)
+        :param snapshot: Snapshot: State to be restored
+        :return: None
+        """
+        self.pc, self.sp, self.acc, self.idx, self.idy, self.status = snapshot[:6]
+        self.clock.total_clock_cycles = snapshot.cycles
+        self.memory.restore_pages(snapshot.pages)
+
     def push_ps_on_stack(self) -> None:
-        res = 0
-        res += self.ps['carry_flag']
-        res += (self.ps['zero_flag'] << 1)
-        res += (self.ps['interrupt_flag'] << 2)
-        res += (self.ps['decimal_flag'] << 3)
-        res += (self.ps['break_flag'] << 4)
-        res += (self.ps['reserved'] << 5)
-        res += (self.ps['overflow_flag'] << 6)
-        res += (self.ps['negative_flag'] << 7)
-        self.push_byte_on_stack(np.ubyte(res))
+        self.push_byte_on_stack(self.status)
 
     def pull_ps_from_stack(self) -> None:
-        bin_ps = int(self.pull_byte_from_stack(), base=0)
-        temp_ps = bin(bin_ps)[2:].zfill(8)  # str representation of 7 bits
-        self.ps['carry_flag'] = bool(int(temp_ps[-1]))
-        self.ps['zero_flag'] = bool(int(temp_ps[-2]))
-        self.ps['interrupt_flag'] = bool(int(temp_ps[-3]))
-        self.ps['decimal_flag'] = bool(int(temp_ps[-4]))
-        # Ignored according to https://wiki.nesdev.com/w/index.php/Status_flags
-        # self.ps['break_flag'] = bool(int(temp_ps[-5]))
-        # Weird but setting it to True passed the test - may be bugged?
-        self.ps['break_flag'] = True
-        # self.ps['reserved'] = bool(int(temp_ps[-6]))
-        self.ps['reserved'] = True
-        self.ps['overflow_flag'] = bool(int(temp_ps[-7]))
-        self.ps['negative_flag'] = bool(int(temp_ps[-8]))
+        # Break flag is ignored according to https://wiki.nesdev.com/w/index.php/Status_flags
+        # Weird but setting it (and the reserved bit) to True passed the test - may be bugged?
+        self.status = self.pull_byte_int_from_stack() | BREAK | RESERVED
 
     def execute(self, number_of_instructions: int) -> None:
+        clock = self.clock
         for i in range(number_of_instructions):
-            instruction = self.fetch_byte()
-            if len(instruction) == 3:  # This means the 0 was cut out like in 0x09 -> 0x9
-                instruction = f'0x0{instruction.split("x")[-1]}'
-            try:
-                self.instructions.execute(instruction)
-            except KeyError:
-                if instruction != '0xff':
-                    print(f'Instruction {instruction} not recognised. Skipping...')
+            self.instructions.execute(self.fetch_byte_int())
+            if clock.total_clock_cycles >= clock.next_sync:
+                clock.synchronise()
 
-    def fetch_byte(self) -> hex:
+    def run(self, max_cycles: int = None, max_instructions: int = None, until_pc: Union[int, Iterable] = (),
+            until: Callable = None, trap: bool = True) -> RunResult:
+        """
+        Method to execute instructions until one of the stop conditions is met. The conditions are checked before
+        every instruction inside a single loop, which is much cheaper than calling execute(1) in a loop.
+        :param max_cycles: int: Cycle budget
+        :param max_instructions: int: Instruction budget
+        :param until_pc: Union[int, Iterable]: Address(es) stopping the run before the instruction at them is executed
+        :param until: Callable: until(cpu) -> bool, checked before every instruction (costly, prefer until_pc)
+        :param trap: bool: Stop after an instruction which jumps or branches to itself (JMP * or Bxx *), the trap
+        address is the pc of the result
+        :return: RunResult: Stop reason, program counter, executed instructions and clock cycles
+        """
+        clock = self.clock
+        dispatch_table = self.instructions.dispatch_table
+        fetch_byte_int = self.fetch_byte_int
+        until_pc = frozenset((until_pc,) if isinstance(until_pc, int) else until_pc)
+        start_cycles = clock.total_clock_cycles
+        cycle_limit = inf if max_cycles is None else start_cycles + max_cycles
+        instruction_limit = inf if max_instructions is None else max_instructions
+        instructions = 0
+        self.trap_detection = trap
         try:
-            data = self.memory[self.pc]
-            self.pc += 1
-            ~self.clock
+            while True:
+                pc = self.pc
+                if pc in until_pc:
+                    reason = CPU.STOP_BREAKPOINT
+                    break
+                if until is not None and until(self):
+                    reason = CPU.STOP_PREDICATE
+                    break
+                if instructions >= instruction_limit:
+                    reason = CPU.STOP_INSTRUCTIONS
+                    break
+                if clock.total_clock_cycles >= cycle_limit:
+                    reason = CPU.STOP_CYCLES
+                    break
+                if pc >= 0xffff:
+                    reason = CPU.STOP_END_OF_MEMORY
+                    break
+                handler, finalise = dispatch_table[fetch_byte_int()]  # Instructions.execute, inlined
+                handler()
+                finalise()
+                instructions += 1
+                if clock.total_clock_cycles >= clock.next_sync:
+                    clock.synchronise()
+        except Trap:
+            # The trapping instruction was executed completely
+            reason = CPU.STOP_TRAP
+            instructions += 1
+        finally:
+            self.trap_detection = False
+        return RunResult(reason, self.pc, instructions, clock.total_clock_cycles - start_cycles)
+
+    def fetch_byte(self) -> hex:
+        data = self.fetch_byte_int()
+        if data is not None:
             return hex(data)
+
+    # The int API is the hot path of the interpreter: it indexes the page tables of the memory directly and counts
+    # cycles without calling Clock.__invert__
+
+    def fetch_byte_int(self) -> int:
+        try:
+            pc = self.pc
+            data = self.memory.read_pages[pc >> 8][pc & 0xff]
+            self.pc = pc + 1
+            self.clock.total_clock_cycles += 1
+            return data
         except IndexError:
             print(f'PC ({hex(self.pc)}) is out of memory bounds (0xffff)')
 
     def read_byte(self, address: hex) -> hex:
-        try:
-            data = self.memory[address]
-            ~self.clock
+        data = self.read_byte_int(address)
+        if data is not None:
             return hex(data)
+
+    def read_byte_int(self, address: int) -> int:
+        try:
+            data = self.memory.read_pages[address >> 8][address & 0xff]
+            self.clock.total_clock_cycles += 1
+            return data
         except IndexError:
             print(f'Address {address} is out of memory bounds (0xffff)')
 
     def write_byte(self, address: hex, value: ubyte):
         try:
-            if 0x0100 <= address <= 0x01ff:  # Cannot write on stack
-                raise IndexError
-            self.memory[address] = value
-            ~self.clock
+            self.memory.write_pages[address >> 8][address & 0xff] = value & 0xff
+            self.clock.total_clock_cycles += 1
         except IndexError:
-            print(f'Address {address} is out of writable memory bounds (0x01ff - 0xffff)')
+            print(f'Address {address} is out of memory bounds (0xffff)')
 
     def fetch_word(self) -> hex:
+        data = self.fetch_word_int()
+        if data is not None:
+            return hex(data)
+
+    def fetch_word_int(self) -> int:
         # 6502 Cpu is little endian -> first byte is the least significant one
         try:
-            data = self.memory[self.pc]
-            self.pc += 1
-            ~self.clock
-            data |= (self.memory[self.pc] << 8)
-            self.pc += 1
-            ~self.clock
-            if sys.byteorder == 'big':
-                raise SystemError('This emulator only works on little endian systems')
-            return hex(data)
+            pc = self.pc
+            read_pages = self.memory.read_pages
+            data = read_pages[pc >> 8][pc & 0xff]
+            pc += 1
+            data |= read_pages[pc >> 8][pc & 0xff] << 8
+            self.pc = pc + 1
+            self.clock.total_clock_cycles += 2
+            return data
         except IndexError:
             print(f'PC ({hex(self.pc)}) is out of memory bounds (0xffff)')
 
     def read_word(self, address) -> hex:
+        data = self.read_word_int(address)
+        if data is not None:
+            return hex(data)
+
+    def read_word_int(self, address) -> int:
         # 6502 Cpu is little endian -> first byte is the least significant one
         try:
-            data = self.memory[address]
-            ~self.clock
-            data |= (self.memory[address + 1] << 8)
-            ~self.clock
-            if sys.byteorder == 'big':
-                raise SystemError('This emulator only works on little endian systems')
-            return hex(data)
+            read_pages = self.memory.read_pages
+            data = read_pages[address >> 8][address & 0xff]
+            address = (address + 1) & 0xffff  # The second byte of 0xffff is read from 0x0000, like on the real cpu
+            data |= read_pages[address >> 8][address & 0xff] << 8
+            self.clock.total_clock_cycles += 2
+            return data
         except IndexError:
             print(f'Word {address, address + 1} is out of memory bounds (0xffff)')
 
     def write_word(self, address: hex, value: ushort):
         # 6502 Cpu is little endian -> first byte is the least significant one
         try:
-            if 0x0100 <= address <= 0x01ff:  # Cannot write on stack
-                raise IndexError
-            self.memory[address] = value
-            ~self.clock
-            self.memory[address + 1] = (value >> 8)
-            ~self.clock
-            if sys.byteorder == 'big':
-                raise SystemError('This emulator only works on little endian systems')
+            write_pages = self.memory.write_pages
+            write_pages[address >> 8][address & 0xff] = value & 0xff
+            write_pages[(address + 1) >> 8][(address + 1) & 0xff] = (value >> 8) & 0xff
+            self.clock.total_clock_cycles += 2
         except IndexError:
-            print(f'Word {address, address + 1} is out of writable memory bounds (0x01ff - 0xffff)')
+            print(f'Word {address, address + 1} is out of memory bounds (0xffff)')
 
     def push_byte_on_stack(self, value: ubyte):
-        try:
-            if self.sp <= 0x00:
-                raise IndexError
-            self.memory[self.sp + 0x0100] = value
-            ~self.clock
-            self.sp -= 1
-            # One extra cycle for each push operation according to
-            # https://wiki.nesdev.com/w/index.php/Cycle_counting
-            ~self.clock
-        except IndexError:
-            print(f'Stack pointer ({self.sp}) is out of stack memory bounds (0x0100 - 0x01ff)')
+        # The stack pointer wraps around within page 0x01, like on the real cpu
+        self.memory[self.sp | 0x0100] = value
+        ~self.clock
+        self.sp = (self.sp - 1) & 0xff
+        # One extra cycle for each push operation according to
+        # https://wiki.nesdev.com/w/index.php/Cycle_counting
+        ~self.clock
 
     def push_word_on_stack(self, value: ushort):
-        try:
-            if self.sp <= 0x01:  # Can't write a word here if there is not enough space on the stack
-                raise IndexError
-            self.memory[self.sp + 0x0100] = (value >> 8)
-            ~self.clock
-            self.sp -= 1
-            self.memory[self.sp + 0x0100] = value
-            ~self.clock
-            self.sp -= 1
-            # One extra cycle for each push operation according to
-            # https://wiki.nesdev.com/w/index.php/Cycle_counting
-            ~self.clock
-            if sys.byteorder == 'big':
-                raise SystemError('This emulator only works on little endian systems')
-        except IndexError:
-            print(f'Stack pointer ({self.sp}) is out of stack memory bounds (0x0100 - 0x01ff)')
+        # High byte first, so the word ends up little endian in memory
+        self.memory[self.sp | 0x0100] = (value >> 8)
+        ~self.clock
+        self.sp = (self.sp - 1) & 0xff
+        self.memory[self.sp | 0x0100] = value
+        ~self.clock
+        self.sp = (self.sp - 1) & 0xff
+        # One extra cycle for each push operation according to
+        # https://wiki.nesdev.com/w/index.php/Cycle_counting
+        ~self.clock
 
     def pull_byte_from_stack(self) -> hex:
-        try:
-            if self.sp >= 0xff:
-                raise IndexError
-            ~self.clock
-            self.sp += 1
-            data = self.memory[self.sp + 0x0100]
-            # Two extra cycles for each pop operation according to
-            # https://wiki.nesdev.com/w/index.php/Cycle_counting
-            ~self.clock
-            ~self.clock
+        data = self.pull_byte_int_from_stack()
+        if data is not None:
             return hex(data)
-        except IndexError:
-            print(f'Stack pointer ({self.sp}) is out of stack memory bounds (0x0100 - 0x01ff)')
+
+    def pull_byte_int_from_stack(self) -> int:
+        ~self.clock
+        self.sp = (self.sp + 1) & 0xff
+        data = self.memory[self.sp | 0x0100]
+        # Two extra cycles for each pop operation according to
+        # https://wiki.nesdev.com/w/index.php/Cycle_counting
+        ~self.clock
+        ~self.clock
+        return data
 
     def pull_word_from_stack(self) -> hex:
-        try:
-            if self.sp >= 0xfe:  # Can't pop a word from stack if there is only one byte on it
-                raise IndexError
-            ~self.clock
-            self.sp += 1
-            data = (self.memory[self.sp + 0x0100] << 8)
-            ~self.clock
-            self.sp += 1
-            data |= self.memory[self.sp + 0x0100]
-            # Two extra cycles for each pop operation according to
-            # https://wiki.nesdev.com/w/index.php/Cycle_counting
-            ~self.clock
-            ~self.clock
-            if sys.byteorder == 'big':
-                raise SystemError('This emulator only works on little endian systems')
+        data = self.pull_word_int_from_stack()
+        if data is not None:
             return hex(data)
-        except IndexError:
-            print('There is not enough data on the stack to read a word')
+
+    def pull_word_int_from_stack(self) -> int:
+        # Low byte first, reversing push_word_on_stack
+        ~self.clock
+        self.sp = (self.sp + 1) & 0xff
+        data = self.memory[self.sp | 0x0100]
+        ~self.clock
+        self.sp = (self.sp + 1) & 0xff
+        data |= self.memory[self.sp | 0x0100] << 8
+        # Two extra cycles for each pop operation according to
+        # https://wiki.nesdev.com/w/index.php/Cycle_counting
+        ~self.clock
+        ~self.clock
+        return data
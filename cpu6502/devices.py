@@ -0,0 +1,271 @@
+import sys
+from collections import deque
+
+from cpu6502.memory import DevicePage, Memory
+
+
+class Device:
+    """
+    Base class of memory mapped peripherals. A device occupies size consecutive addresses and is accessed through its
+    registers, numbered from 0 relative to the address it is attached to.
+    """
+    size = 1
+
+    def connect(self, cpu) -> None:
+        """
+        Method called when the device bus is connected to a cpu
+        :param cpu: CPU: Cpu object the device is attached to
+        :return: None
+        """
+        pass
+
+    def read(self, register: int) -> int:
+        """
+        Method to read a register of the device
+        :param register: int: Register number (address - address of the device)
+        :return: int: Value of the register (0x00 - 0xff)
+        """
+        return 0
+
+    def write(self, register: int, value: int) -> None:
+        """
+        Method to write a register of the device
+        :param register: int: Register number (address - address of the device)
+        :param value: int: Value written by the cpu (0x00 - 0xff)
+        :return: None
+        """
+        pass
+
+    def refresh(self) -> None:
+        """
+        Method to update the outside world with the state of the device (e.g. flush the output of a console)
+        :return: None
+        """
+        pass
+
+
+class SerialConsole(Device):
+    """
+    Serial port with a local loopback:
+        register 0 (DATA): reading pops the next received byte (0 if there is none), writing transmits a byte
+        register 1 (STATUS): bit 0 - received byte available, bit 1 - ready to transmit (always set)
+    Transmitted bytes are collected in output (and echoed to stream on refresh), received bytes are queued with send.
+    With loopback=True every transmitted byte is also received back.
+    """
+    size = 2
+    DATA = 0
+    STATUS = 1
+    RX_READY = 0b00000001
+    TX_READY = 0b00000010
+
+    def __init__(self, loopback: bool = False, stream=None):
+        self.loopback = loopback
+        self.stream = stream
+        self.input = deque()
+        self.output = bytearray()
+        self.flushed = 0
+
+    def send(self, data: bytes) -> None:
+        """
+        Method to queue bytes to be received by the cpu
+        :param data: bytes: Bytes (or a str) to be received
+        :return: None
+        """
+        self.input.extend(data.encode() if isinstance(data, str) else data)
+
+    def read(self, register: int) -> int:
+        if register == SerialConsole.DATA:
+            return self.input.popleft() if self.input else 0
+        return SerialConsole.TX_READY | (SerialConsole.RX_READY if self.input else 0)
+
+    def write(self, register: int, value: int) -> None:
+        if register == SerialConsole.DATA:
+            self.output.append(value)
+            if self.loopback:
+                self.input.append(value)
+
+    def refresh(self) -> None:
+        if self.stream is not None and self.flushed < len(self.output):
+            self.stream.write(self.output[self.flushed:].decode('latin-1'))
+            self.stream.flush()
+            self.flushed = len(self.output)
+
+
+class Timer(Device):
+    """
+    16 bit timer counting cpu clock cycles down from a latch:
+        registers 0, 1 (COUNTER): reading returns the low / high byte of the counter, writing sets the latch (writing
+        the high byte reloads the counter)
+        register 2 (CONTROL): bit 0 - timer running
+        register 3 (STATUS): bit 7 - counter ran out and was reloaded since the last read of this register
+    The counter is computed from the clock when it is read, so a running timer costs nothing between accesses.
+    """
+    size = 4
+    COUNTER_LOW = 0
+    COUNTER_HIGH = 1
+    CONTROL = 2
+    STATUS = 3
+    RUNNING = 0b00000001
+    EXPIRED = 0b10000000
+
+    def __init__(self):
+        self.clock = None
+        self.latch = 0xffff
+        self.running = False
+        self.start = 0  # Clock cycle at which the counter was last reloaded
+        self.stopped_at = 0  # Elapsed cycles when the timer was stopped
+        self.acknowledged = 0  # Number of underflows already reported
+
+    def connect(self, cpu) -> None:
+        self.clock = cpu.clock
+
+    def elapsed(self) -> int:
+        """
+        Method to get the number of cycles counted since the last reload
+        :return: int: Number of cycles
+        """
+        if not self.running:
+            return self.stopped_at
+        return self.clock.total_clock_cycles - self.start
+
+    def counter(self) -> int:
+        """
+        Method to get the current value of the counter, it reloads from the latch after reaching zero
+        :return: int: Counter value (0x0000 - 0xffff)
+        """
+        return self.latch - self.elapsed() % (self.latch + 1)
+
+    def reload(self) -> None:
+        self.start = self.clock.total_clock_cycles
+        self.stopped_at = 0
+        self.acknowledged = 0
+
+    def read(self, register: int) -> int:
+        if register == Timer.COUNTER_LOW:
+            return self.counter() & 0xff
+        if register == Timer.COUNTER_HIGH:
+            return self.counter() >> 8
+        if register == Timer.CONTROL:
+            return Timer.RUNNING if self.running else 0
+        underflows = self.elapsed() // (self.latch + 1)
+        expired = underflows > self.acknowledged
+        self.acknowledged = underflows
+        return Timer.EXPIRED if expired else 0
+
+    def write(self, register: int, value: int) -> None:
+        if register == Timer.COUNTER_LOW:
+            self.latch = (self.latch & 0xff00) | value
+        elif register == Timer.COUNTER_HIGH:
+            self.latch = (self.latch & 0x00ff) | (value << 8)
+            self.reload()
+        elif register == Timer.CONTROL:
+            running = bool(value & Timer.RUNNING)
+            if running and not self.running:
+                self.start = self.clock.total_clock_cycles - self.stopped_at
+            elif not running and self.running:
+                self.stopped_at = self.elapsed()
+            self.running = running
+
+
+class DeviceBus:
+    """
+    Bus dispatching the accesses of memory mapped devices. Only the pages containing a device are remapped, with a
+    precomputed table of the device and register of every address in them, so accesses to the rest of the memory
+    never go through the bus. Addresses of a device page which are not occupied by any device keep their memory.
+    """
+
+    def __init__(self, devices: dict = None):
+        self.cpu = None
+        self.devices = []  # (address, device)
+        self.dispatch = {}  # page -> 256 entries of (device, register) or None
+        self.fallback = {}  # page -> (read page, write page) of the memory underneath
+        for address, device in (devices or {}).items():
+            self.attach(address, device)
+
+    def attach(self, address: int, device: Device) -> Device:
+        """
+        Method to attach a device to the bus at the given address. If the bus is connected, the device is mapped
+        straight away.
+        :param address: int: First address occupied by the device
+        :param device: Device: Device to be attached
+        :return: Device: The attached device
+        """
+        end = address + device.size
+        if not 0 <= address < end <= Memory.MAX_SIZE:
+            raise ValueError(f'Device at {hex(address)} is out of memory bounds (0xffff)')
+        for other_address, other in self.devices:
+            if address < other_address + other.size and other_address < end:
+                raise ValueError(f'Device at {hex(address)} overlaps the device at {hex(other_address)}')
+        self.devices.append((address, device))
+        if self.cpu is not None:
+            device.connect(self.cpu)
+            self.map_device(address, device)
+        return device
+
+    def connect(self, cpu) -> None:
+        """
+        Method to connect the bus to a cpu and map all attached devices onto its memory
+        :param cpu: CPU: Cpu object with its memory already initialised
+        :return: None
+        """
+        self.cpu = cpu
+        self.dispatch = {}
+        previous, self.fallback = self.fallback, {}
+        for address, device in self.devices:
+            device.connect(cpu)
+            self.map_device(address, device, previous)
+
+    def map_device(self, address: int, device: Device, previous: dict = None) -> None:
+        """
+        Method to map a device onto the memory of the connected cpu
+        :param address: int: First address occupied by the device
+        :param device: Device: Device to be mapped
+        :param previous: dict: Fallback pages of an earlier connection, used for the pages this bus already occupies
+        :return: None
+        """
+        memory = self.cpu.memory
+        for page in range(address >> 8, ((address + device.size - 1) >> 8) + 1):
+            if page not in self.dispatch:
+                self.dispatch[page] = [None] * Memory.PAGE_SIZE
+                read_page = memory.read_pages[page]
+                if isinstance(read_page, DevicePage) and read_page.read == self.read:  # Connected again
+                    self.fallback[page] = previous[page]
+                else:
+                    self.fallback[page] = (read_page, memory.write_pages[page])
+                memory.map_device(page << 8, Memory.PAGE_SIZE, self.read, self.write)
+        for register in range(device.size):
+            self.dispatch[(address + register) >> 8][(address + register) & 0xff] = (device, register)
+
+    def read(self, address: int) -> int:
+        entry = self.dispatch[address >> 8][address & 0xff]
+        if entry is None:
+            return self.fallback[address >> 8][0][address & 0xff]
+        device, register = entry
+        return device.read(register) & 0xff
+
+    def write(self, address: int, value: int) -> None:
+        entry = self.dispatch[address >> 8][address & 0xff]
+        if entry is None:
+            self.fallback[address >> 8][1][address & 0xff] = value
+        else:
+            device, register = entry
+            device.write(register, value)
+
+    def refresh(self) -> None:
+        """
+        Method to refresh all attached devices
+        :return: None
+        """
+        for _, device in self.devices:
+            device.refresh()
+
+
+def console_bus(address: int = 0xf000, timer_address: int = 0xf004, stream=None) -> DeviceBus:
+    """
+    Function to create a bus with a serial console writing to stream and a timer, e.g. cpu.reset(io=console_bus)
+    :param address: int: Address of the console
+    :param timer_address: int: Address of the timer
+    :param stream: Stream the console output is written to on refresh (sys.stdout by default)
+    :return: DeviceBus: Bus with both devices attached
+    """
+    return DeviceBus({address: SerialConsole(stream=stream or sys.stdout), timer_address: Timer()})
@@ -0,0 +1,140 @@
+"""
+Disassembler of the instruction set in 6502_instructions.json, e.g. disassemble(memory, 0x3477) -> ('BNE $3477', 2).
+"""
+import json
+import os
+from typing import NamedTuple
+
+import cpu6502
+from cpu6502.instructions import AbstractInstruction
+from cpu6502.status import CARRY, DECIMAL, INTERRUPT, NEGATIVE, OVERFLOW, ZERO
+
+INSTRUCTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(cpu6502.__file__)), '6502_instructions.json')
+
+# Addressing mode -> operand format, {0} is the operand (a byte or a little endian word)
+OPERAND_FORMATS = {
+    'Implied': '',
+    'Accumulator': 'A',
+    'Immediate': '#${0:02X}',
+    'ZeroPage': '${0:02X}',
+    'ZeroPage,X': '${0:02X},X',
+    'ZeroPage,Y': '${0:02X},Y',
+    'Absolute': '${0:04X}',
+    'Absolute,X': '${0:04X},X',
+    'Absolute,Y': '${0:04X},Y',
+    'Indirect': '(${0:04X})',
+    '(Indirect,X)': '(${0:02X},X)',
+    '(Indirect),Y': '(${0:02X}),Y',
+    'Relative': '${0:04X}',  # Branch target
+}
+
+
+class Opcode(NamedTuple):
+    name: str
+    mode: str
+    size: int
+
+
+def load_opcodes(filepath: str = INSTRUCTIONS_PATH) -> dict:
+    """
+    Function to read the instruction set
+    :param filepath: str: Path to the json file containing the instruction set
+    :return: dict: Opcode -> Opcode(name, mode, size in bytes)
+    """
+    with open(filepath) as file:
+        contents = json.load(file)
+    return {int(entry['opcode'].strip('$'), 16): Opcode(entry['name'], entry['mode'].strip(), int(entry['bytes']))
+            for entry in contents}
+
+
+OPCODES = load_opcodes()
+
+# Tables of the instruction set shared by the engines (cpu6502.translator, cpu6502.predecode, cpu6502.vector)
+
+# Clock cycles of every opcode without page crossing, as counted by the instructions (branches are counted apart)
+CYCLES = [1] * 0x100  # Opcodes outside of the instruction set only fetch their opcode
+for _opcode, _entry in OPCODES.items():
+    CYCLES[_opcode] = {'Implied': 2, 'Accumulator': 2, 'Immediate': 2, 'ZeroPage': 3, 'ZeroPage,X': 4,
+                       'ZeroPage,Y': 4, 'Absolute': 4, 'Absolute,X': 4, 'Absolute,Y': 4, '(Indirect,X)': 6,
+                       '(Indirect),Y': 5, 'Indirect': 5, 'Relative': 2}[_entry.mode]
+for _opcodes, _cycles in (((0x06, 0x26, 0x46, 0x66, 0xc6, 0xe6), 5),  # Read-modify-write zero page
+                          ((0x16, 0x36, 0x56, 0x76, 0xd6, 0xf6, 0x0e, 0x2e, 0x4e, 0x6e, 0xce, 0xee, 0x1e, 0x3e, 0x5e,
+                            0x7e), 6),  # Read-modify-write zero page,X, absolute and absolute,X (shifts)
+                          ((0xde, 0xfe), 7),  # DEC / INC absolute,X
+                          ((0x9d, 0x99), 5), ((0x91,), 6),  # STA absolute,X / Y and (indirect),Y
+                          ((0x08, 0x48, 0x4c), 3), ((0x28, 0x68), 4),  # PHP, PHA, JMP absolute, PLP, PLA
+                          ((0x20, 0x40, 0x60), 6), ((0x00,), 7)):  # JSR, RTI, RTS, BRK
+    for _opcode in _opcodes:
+        CYCLES[_opcode] = _cycles
+
+BRANCHES = {'BPL': (NEGATIVE, 0), 'BMI': (NEGATIVE, NEGATIVE), 'BVC': (OVERFLOW, 0), 'BVS': (OVERFLOW, OVERFLOW),
+            'BCC': (CARRY, 0), 'BCS': (CARRY, CARRY), 'BNE': (ZERO, 0), 'BEQ': (ZERO, ZERO)}
+FLAG_CHANGES = {'CLC': (CARRY, 0), 'SEC': (CARRY, CARRY), 'CLI': (INTERRUPT, 0), 'SEI': (INTERRUPT, INTERRUPT),
+                'CLV': (OVERFLOW, 0), 'CLD': (DECIMAL, 0), 'SED': (DECIMAL, DECIMAL)}
+REGISTER_OF = {'LDA': 'acc', 'LDX': 'idx', 'LDY': 'idy', 'STA': 'acc', 'STX': 'idx', 'STY': 'idy', 'CMP': 'acc',
+               'CPX': 'idx', 'CPY': 'idy', 'INX': 'idx', 'INY': 'idy', 'DEX': 'idx', 'DEY': 'idy'}
+TRANSFERS = {'TAX': ('acc', 'idx'), 'TAY': ('acc', 'idy'), 'TXA': ('idx', 'acc'), 'TYA': ('idy', 'acc'),
+             'TSX': ('sp', 'idx'), 'TXS': ('idx', 'sp')}
+
+
+def _sets_reserved() -> list:
+    """
+    Function to find the opcodes whose instruction keeps the default finalise, which sets the reserved bit
+    :return: list: 256 booleans, True for the opcodes outside of the instruction set as well
+    """
+    import cpu6502.instructions.instructions as classes  # Every instruction class is named after its mnemonic
+    return [opcode not in OPCODES or getattr(classes, OPCODES[opcode].name).finalise is AbstractInstruction.finalise
+            for opcode in range(0x100)]
+
+
+SETS_RESERVED = _sets_reserved()
+
+
+def branch_target(address: int, offset: int) -> int:
+    """
+    Function to compute the target of a relative branch
+    :param address: int: Address of the branch instruction
+    :param offset: int: Signed offset byte of the branch
+    :return: int: Target address
+    """
+    return (address + 2 + (offset - 0x100 if offset & 0x80 else offset)) & 0xffff
+
+
+def disassemble(memory, address: int) -> tuple:
+    """
+    Function to disassemble one instruction
+    :param memory: Memory (or anything indexable by address) containing the instruction
+    :param address: int: Address of the instruction
+    :return: tuple: (text, size in bytes), ('.byte $xx', 1) for opcodes outside of the instruction set
+    """
+    opcode = memory[address]
+    entry = OPCODES.get(opcode)
+    if entry is None:
+        return f'.byte ${opcode:02X}', 1
+    if entry.size == 1:
+        operand = 0
+    elif entry.size == 2:
+        operand = memory[(address + 1) & 0xffff]
+    else:
+        operand = memory[(address + 1) & 0xffff] | (memory[(address + 2) & 0xffff] << 8)
+    if entry.mode == 'Relative':
+        operand = branch_target(address, operand)
+    text = OPERAND_FORMATS[entry.mode].format(operand)
+    return f'{entry.name} {text}' if text else entry.name, entry.size
+
+
+def disassemble_range(memory, start: int, end: int) -> list:
+    """
+    Function to disassemble consecutive instructions
+    :param memory: Memory containing the instructions
+    :param start: int: Address of the first instruction
+    :param end: int: Address after the last disassembled byte
+    :return: list: (address, text) for every instruction starting before end
+    """
+    lines = []
+    address = start
+    while address < end:
+        text, size = disassemble(memory, address)
+        lines.append((address, text))
+        address += size
+    return lines
@@ -0,0 +1,68 @@
+"""
+Driver of Klaus Dormann's 6502 functional test ROM (cpu6502/tests/6502_functional_test.bin).
+
+Almost all of the 30.6M instructions of a full run are spent in two loops exhaustively checking ADC / SBC: every
+pair of operands with both carries in binary mode (test 0x29) and every pair of BCD operands in decimal mode
+(test 0x2a). The fast mode jumps over these two loops, which runs the rest of the ROM in well under a second; the
+arithmetic they check is covered exhaustively against the ALU tables by cpu6502/tests/test_alu.py.
+"""
+import os
+
+from cpu6502.cpu import CPU, RunResult
+from cpu6502.memory import Memory
+from cpu6502.predecode import PredecodeCache
+from cpu6502.translator import Translator
+
+TESTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests')
+ROM_PATH = os.path.join(TESTS_PATH, '6502_functional_test.bin')
+LISTING_PATH = os.path.join(TESTS_PATH, '6502_functional_test.lst')
+LOAD_ADDRESS = 0x000a
+ENTRY_PC = 0x0400
+SUCCESS_PC = 0x3469  # 'jmp * ;test passed, no errors'
+
+# Start of an exhaustive loop -> check of test_case following it
+SKIPPED_LOOPS = {
+    0x3308: 0x3361,  # Binary ADC / SBC, all operands and carries
+    0x336d: 0x3405,  # Decimal ADC / SBC, all BCD operands and carries
+}
+
+
+def setup_cpu(cpu: CPU = None) -> CPU:
+    """
+    Function to create a cpu with the functional test ROM loaded, ready to run from its entry point
+    :param cpu: CPU: Cpu to be used, a new one by default
+    :return: CPU: Cpu with the pc at the entry point and the cycle counter at 0
+    """
+    cpu = cpu or CPU()
+    memory = Memory()
+    memory.load_binary_file(ROM_PATH, start_offset=LOAD_ADDRESS)
+    cpu.reset(memory=memory)
+    cpu.pc = ENTRY_PC
+    cpu.clock.total_clock_cycles = 0
+    return cpu
+
+
+def run_functional_test(cpu: CPU = None, fast: bool = True, max_instructions: int = None,
+                        translate: bool = False, predecode: bool = False, lazy_flags: bool = False) -> RunResult:
+    """
+    Function to run the functional test ROM until it traps
+    :param cpu: CPU: Cpu with the ROM loaded (see setup_cpu), a new one by default
+    :param fast: bool: Skip the exhaustive ADC / SBC loops (see SKIPPED_LOOPS)
+    :param max_instructions: int: Instruction budget of the whole run
+    :param translate: bool: Run the ROM with the block translator (see cpu6502.translator) instead of the interpreter
+    :param predecode: bool: Run the ROM with the predecoded instruction cache (see cpu6502.predecode)
+    :param lazy_flags: bool: Compute the negative and zero flags lazily in the predecoded instruction cache
+    :return: RunResult: Stop reason and pc of the last run, instructions and cycles of the whole run
+    """
+    cpu = cpu or setup_cpu()
+    skipped = SKIPPED_LOOPS if fast else {}
+    run = Translator(cpu).run if translate else PredecodeCache(cpu, lazy_flags=lazy_flags).run if predecode else cpu.run
+    instructions = cycles = 0
+    while True:
+        budget = None if max_instructions is None else max_instructions - instructions
+        result = run(max_instructions=budget, until_pc=skipped)
+        instructions += result.instructions
+        cycles += result.cycles
+        if result.reason != CPU.STOP_BREAKPOINT:
+            return RunResult(result.reason, result.pc, instructions, cycles)
+        cpu.pc = skipped[result.pc]
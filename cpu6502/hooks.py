@@ -0,0 +1,65 @@
+"""
+Base class of the tools observing every executed instruction (profiler, tracer). Attaching one replaces the entries
+of the dispatch table of the cpu with wrappers, detaching it puts the original entries back, so a cpu without any of
+them attached runs exactly the same code as before. Hooks can be stacked, they have to be detached in reverse order.
+"""
+
+
+class DispatchHook:
+
+    def __init__(self, cpu=None):
+        """
+        :param cpu: CPU: Cpu to be observed straight away, see attach
+        """
+        self.cpu = None
+        self._dispatch_table = None  # Entries of the dispatch table before attach
+        if cpu is not None:
+            self.attach(cpu)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.detach()
+
+    def attach(self, cpu) -> None:
+        """
+        Method to start observing the instructions executed by cpu (by execute as well as run). It has to be called
+        before run, which looks the dispatch table up once.
+        :param cpu: CPU: Cpu to be observed
+        :return: None
+        """
+        if self.cpu is not None:
+            raise ValueError(f'The {type(self).__name__.lower()} is already attached to a cpu')
+        self.cpu = cpu
+        instructions = cpu.instructions
+        self._dispatch_table = instructions.dispatch_table
+        instructions.dispatch_table = [(self.wrap(handler, opcode), finalise)
+                                       for opcode, (handler, finalise) in enumerate(self._dispatch_table)]
+
+    def detach(self) -> None:
+        """
+        Method to stop observing the cpu, the collected data is kept
+        :return: None
+        """
+        if self.cpu is not None:
+            self.cpu.instructions.dispatch_table = self._dispatch_table
+            self.cpu = None
+            self._dispatch_table = None
+        self.flush()
+
+    def wrap(self, handler, opcode: int):
+        """
+        Method to create the wrapper of a handler, called once per opcode by attach
+        :param handler: Handler of the opcode, it is called right after the opcode was fetched
+        :param opcode: int: Opcode of the handler
+        :return: Callable: Wrapper called instead of the handler
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """
+        Method to process the buffered data, called on detach
+        :return: None
+        """
+        pass
@@ -1,6 +1,16 @@
 from abc import abstractmethod
 
-import numpy as np
+from cpu6502.status import RESERVED
+
+
+class Trap(Exception):
+    """
+    Raised by jumps and branches to themselves (the way test ROMs signal success or failure) when the cpu detects traps
+    """
+
+    def __init__(self, address: int):
+        super().__init__(f'Trapped at {hex(address)}')
+        self.address = address
 
 
 class AbstractInstruction:
@@ -17,13 +27,13 @@ class AbstractInstruction:
         """
         self.opcodes = {}
         self.cpu = cpu
-        self.cpu.ps['reserved'] = True
+        self.cpu.status |= RESERVED
         pass
 
-    def execute(self, opcode: str):
+    def execute(self, opcode: int):
         """
         Method that executes the method chosen by opcode
-        :param opcode: str: Opcode of the specific instruction (instruction + addressing)
+        :param opcode: int: Opcode of the specific instruction (instruction + addressing)
         :return: None
         """
         self.opcodes[opcode]()
@@ -33,56 +43,113 @@ class AbstractInstruction:
         Method to specify events that happen for every type of addressing after the instruction is executed
         :return: None
         """
-        self.cpu.ps['reserved'] = True
+        self.cpu.status |= RESERVED
         pass
 
+    def trap(self, address: int) -> None:
+        """
+        Method called by an instruction which jumped or branched to itself. Only jumps and taken branches pay for the
+        detection, the interpreter loop does not check anything.
+        :param address: int: Address of the instruction
+        :return: None
+        """
+        if self.cpu.trap_detection:
+            raise Trap(address)
+
+    def operation(self, value: int):
+        """
+        Method to specify the operation of the instruction, written once for all of its addressing modes. Read
+        instructions get the operand value, read-modify-write instructions also return the value to be written back.
+        :param value: int: Operand value
+        :return: int or None: Modified value for read-modify-write instructions
+        """
+        raise NotImplementedError
+
+    def read_handler(self, addressing):
+        """
+        Method to build a handler which resolves the operand with the addressing mode and passes its value to
+        self.operation
+        :param addressing: Addressing mode method of this instruction, e.g. self.zero_page
+        :return: Callable handler without arguments
+        """
+        cpu = self.cpu
+        operation = self.operation
+        if addressing == self.immediate:
+            def handler():
+                operation(addressing())
+        else:
+            def handler():
+                operation(cpu.read_byte_int(addressing()))
+        return handler
+
+    def modify_handler(self, addressing):
+        """
+        Method to build a read-modify-write handler which resolves the address with the addressing mode, passes the
+        value stored there to self.operation and writes the result back
+        :param addressing: Addressing mode method of this instruction, e.g. self.zero_page
+        :return: Callable handler without arguments
+        """
+        cpu = self.cpu
+        operation = self.operation
+
+        def handler():
+            address = addressing()
+            value = operation(cpu.read_byte_int(address))
+            ~cpu.clock
+            cpu.write_byte(address, value)
+        return handler
+
+    def accumulator(self):
+        self.cpu.acc = self.operation(self.cpu.acc)
+        ~self.cpu.clock
+
     # All addressing modes pushed here for easier and faster testing
 
     def immediate(self):
-        return int(self.cpu.fetch_byte(), base=0)
+        return self.cpu.fetch_byte_int()
 
     def zero_page(self):
-        zp_address = int(self.cpu.fetch_byte(), base=0)
+        zp_address = self.cpu.fetch_byte_int()
         return zp_address
 
     def zero_page_x(self):
-        zp_address = int(self.cpu.fetch_byte(), base=0)
+        zp_address = self.cpu.fetch_byte_int()
         ~self.cpu.clock
-        return np.ubyte(zp_address + self.cpu.idx)
+        return (zp_address + self.cpu.idx) & 0xff
 
     def zero_page_y(self):
-        zp_address = int(self.cpu.fetch_byte(), base=0)
+        zp_address = self.cpu.fetch_byte_int()
         ~self.cpu.clock
-        return np.ubyte(zp_address + self.cpu.idy)
+        return (zp_address + self.cpu.idy) & 0xff
 
     def absolute(self):
-        address = int(self.cpu.fetch_word(), base=0)
+        address = self.cpu.fetch_word_int()
         return address
 
     def absolute_x(self):
-        address = int(self.cpu.fetch_word(), base=0)
+        address = self.cpu.fetch_word_int()
         if (address >> 8) != ((address + self.cpu.idx) >> 8):
             ~self.cpu.clock
-        return address + self.cpu.idx
+        return (address + self.cpu.idx) & 0xffff  # The address wraps around past 0xffff, like on the real cpu
 
     def absolute_y(self):
-        address = int(self.cpu.fetch_word(), base=0)
+        address = self.cpu.fetch_word_int()
         if (address >> 8) != ((address + self.cpu.idy) >> 8):
             ~self.cpu.clock
-        return address + self.cpu.idy
+        return (address + self.cpu.idy) & 0xffff
 
     def indexed_indirect(self):
-        zp_address = np.ubyte(int(self.cpu.fetch_byte(), base=0) + self.cpu.idx)
+        zp_address = (self.cpu.fetch_byte_int() + self.cpu.idx) & 0xff
         ~self.cpu.clock
-        address = int(self.cpu.read_word(zp_address), base=0)
+        address = self.cpu.read_word_int(zp_address)
         return address
 
     def indirect_indexed(self):
-        zp_address = int(self.cpu.fetch_byte(), base=0)
-        address = int(self.cpu.read_word(zp_address), base=0) + self.cpu.idy
+        zp_address = self.cpu.fetch_byte_int()
+        address = self.cpu.read_word_int(zp_address) + self.cpu.idy
         if (address >> 8) != ((address + self.cpu.idy) >> 8):
             ~self.cpu.clock
-        return address
+        return address & 0xffff
 
     def implied(self):
         # Too many different methods to generalise
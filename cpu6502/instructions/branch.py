@@ -1,23 +1,24 @@
-import numpy as np
-
 import cpu6502.instructions
+from cpu6502.status import CARRY, NEGATIVE, OVERFLOW, ZERO
 
 
 class BCC(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x90': self.relative
+            0x90: self.relative
         }
 
     def relative(self):
-        if not self.cpu.ps['carry_flag']:
-            offset = int(self.cpu.fetch_byte(), base=0)
-            target_address = self.cpu.pc + np.byte(offset)
+        if not self.cpu.status & CARRY:
+            offset = self.cpu.fetch_byte_int()
+            target_address = self.cpu.pc + (offset ^ 0x80) - 0x80  # Signed offset
             ~self.cpu.clock
             if (target_address >> 8) != (self.cpu.pc >> 8):
                 ~self.cpu.clock
             self.cpu.pc = target_address
+            if offset == 0xfe:  # Branch to itself
+                self.trap(target_address)
         else:
             self.cpu.pc = self.cpu.pc + 1
             ~self.cpu.clock
@@ -27,17 +28,19 @@ class BCS(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xb0': self.relative
+            0xb0: self.relative
         }
 
     def relative(self):
-        if self.cpu.ps['carry_flag']:
-            offset = int(self.cpu.fetch_byte(), base=0)
-            target_address = self.cpu.pc + np.byte(offset)
+        if self.cpu.status & CARRY:
+            offset = self.cpu.fetch_byte_int()
+            target_address = self.cpu.pc + (offset ^ 0x80) - 0x80  # Signed offset
             ~self.cpu.clock
             if (target_address >> 8) != (self.cpu.pc >> 8):
                 ~self.cpu.clock
             self.cpu.pc = target_address
+            if offset == 0xfe:  # Branch to itself
+                self.trap(target_address)
         else:
             self.cpu.pc = self.cpu.pc + 1
             ~self.cpu.clock
@@ -47,17 +50,19 @@ class BEQ(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xf0': self.relative
+            0xf0: self.relative
         }
 
     def relative(self):
-        if self.cpu.ps['zero_flag']:
-            offset = int(self.cpu.fetch_byte(), base=0)
-            target_address = self.cpu.pc + np.byte(offset)
+        if self.cpu.status & ZERO:
+            offset = self.cpu.fetch_byte_int()
+            target_address = self.cpu.pc + (offset ^ 0x80) - 0x80  # Signed offset
             ~self.cpu.clock
             if (target_address >> 8) != (self.cpu.pc >> 8):
                 ~self.cpu.clock
             self.cpu.pc = target_address
+            if offset == 0xfe:  # Branch to itself
+                self.trap(target_address)
         else:
             self.cpu.pc = self.cpu.pc + 1
             ~self.cpu.clock
@@ -67,17 +72,19 @@ class BMI(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x30': self.relative
+            0x30: self.relative
         }
 
     def relative(self):
-        if self.cpu.ps['negative_flag']:
-            offset = int(self.cpu.fetch_byte(), base=0)
-            target_address = self.cpu.pc + np.byte(offset)
+        if self.cpu.status & NEGATIVE:
+            offset = self.cpu.fetch_byte_int()
+            target_address = self.cpu.pc + (offset ^ 0x80) - 0x80  # Signed offset
             ~self.cpu.clock
             if (target_address >> 8) != (self.cpu.pc >> 8):
                 ~self.cpu.clock
             self.cpu.pc = target_address
+            if offset == 0xfe:  # Branch to itself
+                self.trap(target_address)
         else:
             self.cpu.pc = self.cpu.pc + 1
             ~self.cpu.clock
@@ -87,17 +94,19 @@ class BNE(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xd0': self.relative
+            0xd0: self.relative
         }
 
     def relative(self):
-        if not self.cpu.ps['zero_flag']:
-            offset = int(self.cpu.fetch_byte(), base=0)
-            target_address = self.cpu.pc + np.byte(offset)
+        if not self.cpu.status & ZERO:
+            offset = self.cpu.fetch_byte_int()
+            target_address = self.cpu.pc + (offset ^ 0x80) - 0x80  # Signed offset
             ~self.cpu.clock
             if (target_address >> 8) != (self.cpu.pc >> 8):
                 ~self.cpu.clock
             self.cpu.pc = target_address
+            if offset == 0xfe:  # Branch to itself
+                self.trap(target_address)
         else:
             self.cpu.pc = self.cpu.pc + 1
             ~self.cpu.clock
@@ -107,17 +116,19 @@ class BPL(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x10': self.relative
+            0x10: self.relative
         }
 
     def relative(self):
-        if not self.cpu.ps['negative_flag']:
-            offset = int(self.cpu.fetch_byte(), base=0)
-            target_address = self.cpu.pc + np.byte(offset)
+        if not self.cpu.status & NEGATIVE:
+            offset = self.cpu.fetch_byte_int()
+            target_address = self.cpu.pc + (offset ^ 0x80) - 0x80  # Signed offset
             ~self.cpu.clock
             if (target_address >> 8) != (self.cpu.pc >> 8):
                 ~self.cpu.clock
             self.cpu.pc = target_address
+            if offset == 0xfe:  # Branch to itself
+                self.trap(target_address)
         else:
             self.cpu.pc = self.cpu.pc + 1
             ~self.cpu.clock
@@ -127,17 +138,19 @@ class BVC(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x50': self.relative
+            0x50: self.relative
         }
 
     def relative(self):
-        if not self.cpu.ps['overflow_flag']:
-            offset = int(self.cpu.fetch_byte(), base=0)
-            target_address = self.cpu.pc + np.byte(offset)
+        if not self.cpu.status & OVERFLOW:
+            offset = self.cpu.fetch_byte_int()
+            target_address = self.cpu.pc + (offset ^ 0x80) - 0x80  # Signed offset
             ~self.cpu.clock
             if (target_address >> 8) != (self.cpu.pc >> 8):
                 ~self.cpu.clock
             self.cpu.pc = target_address
+            if offset == 0xfe:  # Branch to itself
+                self.trap(target_address)
         else:
             self.cpu.pc = self.cpu.pc + 1
             ~self.cpu.clock
@@ -147,17 +160,19 @@ class BVS(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x70': self.relative
+            0x70: self.relative
         }
 
     def relative(self):
-        if self.cpu.ps['overflow_flag']:
-            offset = int(self.cpu.fetch_byte(), base=0)
-            target_address = self.cpu.pc + np.byte(offset)
+        if self.cpu.status & OVERFLOW:
+            offset = self.cpu.fetch_byte_int()
+            target_address = self.cpu.pc + (offset ^ 0x80) - 0x80  # Signed offset
             ~self.cpu.clock
             if (target_address >> 8) != (self.cpu.pc >> 8):
                 ~self.cpu.clock
             self.cpu.pc = target_address
+            if offset == 0xfe:  # Branch to itself
+                self.trap(target_address)
         else:
             self.cpu.pc = self.cpu.pc + 1
             ~self.cpu.clock
@@ -1,53 +1,48 @@
-import numpy as np
-
 import cpu6502.instructions
+from cpu6502.status import NOT_NZ, NZ_TABLE
 
 
 class DEC(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xc6': self.zero_page,
-            '0xd6': self.zero_page_x,
-            '0xce': self.absolute,
-            '0xde': self.absolute_x
+            0xc6: self.zero_page,
+            0xd6: self.zero_page_x,
+            0xce: self.absolute,
+            0xde: self.absolute_x
         }
 
     def zero_page(self):
         address = super(DEC, self).zero_page()
-        value = int(self.cpu.read_byte(address), base=0)
-        final_value = np.ubyte(value - 1)
+        value = self.cpu.read_byte_int(address)
+        final_value = (value - 1) & 0xff
         ~self.cpu.clock
         self.cpu.write_byte(address, final_value)
-        self.cpu.ps['zero_flag'] = final_value == 0
-        self.cpu.ps['negative_flag'] = (final_value >> 7) == 1
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[final_value]
 
     def zero_page_x(self):
         address = super(DEC, self).zero_page_x()
-        value = int(self.cpu.read_byte(address), base=0)
-        final_value = np.ubyte(value - 1)
+        value = self.cpu.read_byte_int(address)
+        final_value = (value - 1) & 0xff
         ~self.cpu.clock
         self.cpu.write_byte(address, final_value)
-        self.cpu.ps['zero_flag'] = final_value == 0
-        self.cpu.ps['negative_flag'] = (final_value >> 7) == 1
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[final_value]
 
     def absolute(self):
         address = super(DEC, self).absolute()
-        value = int(self.cpu.read_byte(address), base=0)
-        final_value = np.ubyte(value - 1)
+        value = self.cpu.read_byte_int(address)
+        final_value = (value - 1) & 0xff
         ~self.cpu.clock
         self.cpu.write_byte(address, final_value)
-        self.cpu.ps['zero_flag'] = final_value == 0
-        self.cpu.ps['negative_flag'] = (final_value >> 7) == 1
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[final_value]
 
     def absolute_x(self):
         address = super(DEC, self).absolute_x()
-        value = int(self.cpu.read_byte(address), base=0)
-        final_value = np.ubyte(value - 1)
+        value = self.cpu.read_byte_int(address)
+        final_value = (value - 1) & 0xff
         ~self.cpu.clock
         self.cpu.write_byte(address, final_value)
-        self.cpu.ps['zero_flag'] = final_value == 0
-        self.cpu.ps['negative_flag'] = (final_value >> 7) == 1
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[final_value]
         ~self.cpu.clock
 
 
@@ -55,27 +50,25 @@ class DEX(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xca': self.implied
+            0xca: self.implied
         }
 
     def implied(self):
-        final_value = np.ubyte(self.cpu.idx - 1)
+        final_value = (self.cpu.idx - 1) & 0xff
         ~self.cpu.clock
         self.cpu.idx = final_value
-        self.cpu.ps['zero_flag'] = final_value == 0
-        self.cpu.ps['negative_flag'] = (final_value >> 7) == 1
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[final_value]
 
 
 class DEY(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x88': self.implied
+            0x88: self.implied
         }
 
     def implied(self):
-        final_value = np.ubyte(self.cpu.idy - 1)
+        final_value = (self.cpu.idy - 1) & 0xff
         ~self.cpu.clock
         self.cpu.idy = final_value
-        self.cpu.ps['zero_flag'] = final_value == 0
-        self.cpu.ps['negative_flag'] = (final_value >> 7) == 1
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[final_value]
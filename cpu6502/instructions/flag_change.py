@@ -1,4 +1,5 @@
 import cpu6502.instructions
+from cpu6502.status import CARRY, DECIMAL, INTERRUPT, OVERFLOW
 
 
 class CLC(cpu6502.instructions.AbstractInstruction):
@@ -6,11 +7,11 @@ class CLC(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x18': self.implied
+            0x18: self.implied
         }
 
     def implied(self):
-        self.cpu.ps['carry_flag'] = False
+        self.cpu.status &= 0xff ^ CARRY
         ~self.cpu.clock
 
 
@@ -19,11 +20,11 @@ class CLD(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xd8': self.implied
+            0xd8: self.implied
         }
 
     def implied(self):
-        self.cpu.ps['decimal_flag'] = False
+        self.cpu.status &= 0xff ^ DECIMAL
         ~self.cpu.clock
 
 
@@ -32,11 +33,11 @@ class CLI(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x58': self.implied
+            0x58: self.implied
         }
 
     def implied(self):
-        self.cpu.ps['interrupt_flag'] = False
+        self.cpu.status &= 0xff ^ INTERRUPT
         ~self.cpu.clock
 
 
@@ -45,11 +46,11 @@ class CLV(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xb8': self.implied
+            0xb8: self.implied
         }
 
     def implied(self):
-        self.cpu.ps['overflow_flag'] = False
+        self.cpu.status &= 0xff ^ OVERFLOW
         ~self.cpu.clock
 
 
@@ -58,11 +59,11 @@ class SEC(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x38': self.implied
+            0x38: self.implied
         }
 
     def implied(self):
-        self.cpu.ps['carry_flag'] = True
+        self.cpu.status |= CARRY
         ~self.cpu.clock
 
 
@@ -71,11 +72,11 @@ class SED(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xf8': self.implied
+            0xf8: self.implied
         }
 
     def implied(self):
-        self.cpu.ps['decimal_flag'] = True
+        self.cpu.status |= DECIMAL
         ~self.cpu.clock
 
 
@@ -84,9 +85,9 @@ class SEI(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x78': self.implied
+            0x78: self.implied
         }
 
     def implied(self):
-        self.cpu.ps['interrupt_flag'] = True
+        self.cpu.status |= INTERRUPT
         ~self.cpu.clock
@@ -1,5 +1,6 @@
 import json
 
+import cpu6502.instructions
 from cpu6502.instructions.arithmetic import ADC, SBC, CMP, CPX, CPY
 from cpu6502.instructions.branch import BCC, BCS, BEQ, BMI, BNE, BPL, BVC, BVS
 from cpu6502.instructions.decrement import DEC, DEX, DEY
@@ -15,7 +16,25 @@ from cpu6502.instructions.store import STA, STX, STY
 from cpu6502.instructions.transfer import TAX, TAY, TXA, TYA, TSX, TXS
 
 
+class IllegalOpcode(cpu6502.instructions.AbstractInstruction):
+    """
+    Fallback used for every opcode which is not a part of the supported instruction set. The opcode is skipped.
+    """
+
+    def __init__(self, cpu, opcode: int):
+        super().__init__(cpu)
+        self.opcode = opcode
+        self.opcodes = {
+            opcode: self.implied
+        }
+
+    def implied(self):
+        if self.opcode != 0xff:
+            print(f'Instruction 0x{self.opcode:02x} not recognised. Skipping...')
+
+
 class Instructions:
+    TABLE_SIZE = 0x100
 
     def __init__(self, cpu, filepath: str):
         self.opcodes = {}
@@ -89,8 +108,9 @@ class Instructions:
             'NOP': NOP,
             'RTI': RTI
         }
-        self.__parse_instruction_json(filepath)
         self.cpu = cpu
+        self.__parse_instruction_json(filepath)
+        self.dispatch_table = self.__build_dispatch_table()
 
     def __parse_instruction_json(self, filepath: str):
         """
@@ -103,14 +123,34 @@ class Instructions:
             not_supported = set()
             for instruction in contents:
                 try:
-                    opcode = f'0x{instruction["opcode"].strip("$").lower()}'
+                    opcode = int(instruction['opcode'].strip('$'), base=16)
                     self.opcodes[opcode] = self.internal_assignment[instruction['name']]
                 except KeyError:
                     not_supported.add(instruction['name'])
         if len(not_supported) > 0:
             print(f'Unsupported instructions ({len(not_supported)}): {not_supported}')
 
-    def execute(self, opcode: str):
-        instruction = self.opcodes[opcode](self.cpu)
-        instruction.execute(opcode)
-        instruction.finalise()
+    def __build_dispatch_table(self) -> list:
+        """
+        Builds the table of (handler, finalise) pairs indexed by the integer opcode. Every instruction class is
+        instantiated only once and all of its opcodes share that instance. Opcodes without a supported instruction
+        are served by IllegalOpcode.
+        :return: list: List of TABLE_SIZE (handler, finalise) tuples
+        """
+        instances = {}
+        table = [None] * Instructions.TABLE_SIZE
+        for opcode, instruction_class in self.opcodes.items():
+            if instruction_class not in instances:
+                instances[instruction_class] = instruction_class(self.cpu)
+            instruction = instances[instruction_class]
+            table[opcode] = (instruction.opcodes[opcode], instruction.finalise)
+        for opcode in range(Instructions.TABLE_SIZE):
+            if table[opcode] is None:
+                instruction = IllegalOpcode(self.cpu, opcode)
+                table[opcode] = (instruction.implied, instruction.finalise)
+        return table
+
+    def execute(self, opcode: int):
+        handler, finalise = self.dispatch_table[opcode]
+        handler()
+        finalise()
@@ -6,18 +6,24 @@ class JMP(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x4c': self.absolute,
-            '0x6c': self.indirect
+            0x4c: self.absolute,
+            0x6c: self.indirect
         }
 
     def absolute(self):
         address = super(JMP, self).absolute()
+        trapped = address == self.cpu.pc - 3  # Jump to itself
         self.cpu.pc = address
+        if trapped:
+            self.trap(address)
 
     def indirect(self):
-        address = int(self.cpu.fetch_word(), base=0)
-        target_address = self.cpu.read_word(address)
-        self.cpu.pc = int(target_address, base=0)
+        address = self.cpu.fetch_word_int()
+        target_address = self.cpu.read_word_int(address)
+        trapped = target_address == self.cpu.pc - 3  # Jump to itself
+        self.cpu.pc = target_address
+        if trapped:
+            self.trap(target_address)
 
 
 class JSR(cpu6502.instructions.AbstractInstruction):
@@ -25,7 +31,7 @@ class JSR(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x20': self.absolute
+            0x20: self.absolute
         }
 
     def absolute(self):
@@ -39,10 +45,10 @@ class RTS(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x60': self.implied
+            0x60: self.implied
         }
 
     def implied(self):
-        return_point = self.cpu.pull_word_from_stack()
-        self.cpu.pc = int(return_point, base=0) + 1  # To compensate for 1 pc increment
+        return_point = self.cpu.pull_word_int_from_stack()
+        self.cpu.pc = return_point + 1  # To compensate for 1 pc increment
         ~self.cpu.clock
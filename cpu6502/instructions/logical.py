@@ -1,4 +1,7 @@
 import cpu6502.instructions
+from cpu6502.status import NEGATIVE, NOT_NZ, NZ_TABLE, OVERFLOW, ZERO
+
+NOT_NVZ = 0xff ^ (NEGATIVE | OVERFLOW | ZERO)
 
 
 class AND(cpu6502.instructions.AbstractInstruction):
@@ -6,19 +9,18 @@ class AND(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x29': self.immediate,
-            '0x25': self.zero_page,
-            '0x35': self.zero_page_x,
-            '0x2d': self.absolute,
-            '0x3d': self.absolute_x,
-            '0x39': self.absolute_y,
-            '0x21': self.indexed_indirect,
-            '0x31': self.indirect_indexed
+            0x29: self.immediate,
+            0x25: self.zero_page,
+            0x35: self.zero_page_x,
+            0x2d: self.absolute,
+            0x3d: self.absolute_x,
+            0x39: self.absolute_y,
+            0x21: self.indexed_indirect,
+            0x31: self.indirect_indexed
         }
 
     def finalise(self):
-        self.cpu.ps['zero_flag'] = (self.cpu.acc == 0)
-        self.cpu.ps['negative_flag'] = (self.cpu.acc & 0b10000000 != 0)  # Set negative flag if bit 7 of acc is set
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[self.cpu.acc]
 
     def immediate(self):
         value = super(AND, self).immediate()
@@ -26,31 +28,31 @@ class AND(cpu6502.instructions.AbstractInstruction):
 
     def zero_page(self):
         zp_address = super(AND, self).zero_page()
-        self.cpu.acc &= int(self.cpu.read_byte(zp_address), base=0)
+        self.cpu.acc &= self.cpu.read_byte_int(zp_address)
 
     def zero_page_x(self):
         zp_address = super(AND, self).zero_page_x()
-        self.cpu.acc &= int(self.cpu.read_byte(zp_address), base=0)
+        self.cpu.acc &= self.cpu.read_byte_int(zp_address)
 
     def absolute(self):
         address = super(AND, self).absolute()
-        self.cpu.acc &= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc &= self.cpu.read_byte_int(address)
 
     def absolute_x(self):
         address = super(AND, self).absolute_x()
-        self.cpu.acc &= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc &= self.cpu.read_byte_int(address)
 
     def absolute_y(self):
         address = super(AND, self).absolute_y()
-        self.cpu.acc &= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc &= self.cpu.read_byte_int(address)
 
     def indexed_indirect(self):
         address = super(AND, self).indexed_indirect()
-        self.cpu.acc &= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc &= self.cpu.read_byte_int(address)
 
     def indirect_indexed(self):
         address = super(AND, self).indirect_indexed()
-        self.cpu.acc &= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc &= self.cpu.read_byte_int(address)
 
 
 class EOR(cpu6502.instructions.AbstractInstruction):
@@ -58,19 +60,18 @@ class EOR(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x49': self.immediate,
-            '0x45': self.zero_page,
-            '0x55': self.zero_page_x,
-            '0x4d': self.absolute,
-            '0x5d': self.absolute_x,
-            '0x59': self.absolute_y,
-            '0x41': self.indexed_indirect,
-            '0x51': self.indirect_indexed
+            0x49: self.immediate,
+            0x45: self.zero_page,
+            0x55: self.zero_page_x,
+            0x4d: self.absolute,
+            0x5d: self.absolute_x,
+            0x59: self.absolute_y,
+            0x41: self.indexed_indirect,
+            0x51: self.indirect_indexed
         }
 
     def finalise(self):
-        self.cpu.ps['zero_flag'] = (self.cpu.acc == 0)
-        self.cpu.ps['negative_flag'] = (self.cpu.acc & 0b10000000 != 0)  # Set negative flag if bit 7 of acc is set
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[self.cpu.acc]
 
     def immediate(self):
         value = super(EOR, self).immediate()
@@ -78,31 +79,31 @@ class EOR(cpu6502.instructions.AbstractInstruction):
 
     def zero_page(self):
         zp_address = super(EOR, self).zero_page()
-        self.cpu.acc ^= int(self.cpu.read_byte(zp_address), base=0)
+        self.cpu.acc ^= self.cpu.read_byte_int(zp_address)
 
     def zero_page_x(self):
         zp_address = super(EOR, self).zero_page_x()
-        self.cpu.acc ^= int(self.cpu.read_byte(zp_address), base=0)
+        self.cpu.acc ^= self.cpu.read_byte_int(zp_address)
 
     def absolute(self):
         address = super(EOR, self).absolute()
-        self.cpu.acc ^= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc ^= self.cpu.read_byte_int(address)
 
     def absolute_x(self):
         address = super(EOR, self).absolute_x()
-        self.cpu.acc ^= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc ^= self.cpu.read_byte_int(address)
 
     def absolute_y(self):
         address = super(EOR, self).absolute_y()
-        self.cpu.acc ^= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc ^= self.cpu.read_byte_int(address)
 
     def indexed_indirect(self):
         address = super(EOR, self).indexed_indirect()
-        self.cpu.acc ^= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc ^= self.cpu.read_byte_int(address)
 
     def indirect_indexed(self):
         address = super(EOR, self).indirect_indexed()
-        self.cpu.acc ^= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc ^= self.cpu.read_byte_int(address)
 
 
 class ORA(cpu6502.instructions.AbstractInstruction):
@@ -110,19 +111,18 @@ class ORA(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x09': self.immediate,
-            '0x05': self.zero_page,
-            '0x15': self.zero_page_x,
-            '0x0d': self.absolute,
-            '0x1d': self.absolute_x,
-            '0x19': self.absolute_y,
-            '0x01': self.indexed_indirect,
-            '0x11': self.indirect_indexed
+            0x09: self.immediate,
+            0x05: self.zero_page,
+            0x15: self.zero_page_x,
+            0x0d: self.absolute,
+            0x1d: self.absolute_x,
+            0x19: self.absolute_y,
+            0x01: self.indexed_indirect,
+            0x11: self.indirect_indexed
         }
 
     def finalise(self):
-        self.cpu.ps['zero_flag'] = (self.cpu.acc == 0)
-        self.cpu.ps['negative_flag'] = (self.cpu.acc & 0b10000000 != 0)  # Set negative flag if bit 7 of acc is set
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[self.cpu.acc]
 
     def immediate(self):
         value = super(ORA, self).immediate()
@@ -130,31 +130,31 @@ class ORA(cpu6502.instructions.AbstractInstruction):
 
     def zero_page(self):
         zp_address = super(ORA, self).zero_page()
-        self.cpu.acc |= int(self.cpu.read_byte(zp_address), base=0)
+        self.cpu.acc |= self.cpu.read_byte_int(zp_address)
 
     def zero_page_x(self):
         zp_address = super(ORA, self).zero_page_x()
-        self.cpu.acc |= int(self.cpu.read_byte(zp_address), base=0)
+        self.cpu.acc |= self.cpu.read_byte_int(zp_address)
 
     def absolute(self):
         address = super(ORA, self).absolute()
-        self.cpu.acc |= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc |= self.cpu.read_byte_int(address)
 
     def absolute_x(self):
         address = super(ORA, self).absolute_x()
-        self.cpu.acc |= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc |= self.cpu.read_byte_int(address)
 
     def absolute_y(self):
         address = super(ORA, self).absolute_y()
-        self.cpu.acc |= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc |= self.cpu.read_byte_int(address)
 
     def indexed_indirect(self):
         address = super(ORA, self).indexed_indirect()
-        self.cpu.acc |= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc |= self.cpu.read_byte_int(address)
 
     def indirect_indexed(self):
         address = super(ORA, self).indirect_indexed()
-        self.cpu.acc |= int(self.cpu.read_byte(address), base=0)
+        self.cpu.acc |= self.cpu.read_byte_int(address)
 
 
 class BIT(cpu6502.instructions.AbstractInstruction):
@@ -162,20 +162,20 @@ class BIT(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x24': self.zero_page,
-            '0x2c': self.absolute
+            0x24: self.zero_page,
+            0x2c: self.absolute
         }
 
     def zero_page(self):
         zp_address = super(BIT, self).zero_page()
-        value = int(self.cpu.read_byte(zp_address), base=0)
-        self.cpu.ps['zero_flag'] = ((value & self.cpu.acc) == 0)
-        self.cpu.ps['overflow_flag'] = (value & 0b01000000)
-        self.cpu.ps['negative_flag'] = (value & 0b10000000 != 0)
+        value = self.cpu.read_byte_int(zp_address)
+        # N and V are copied from bits 7 and 6 of the operand, Z is set from acc AND operand
+        self.cpu.status = (self.cpu.status & NOT_NVZ) | (value & (NEGATIVE | OVERFLOW)) | \
+            (ZERO if value & self.cpu.acc == 0 else 0)
 
     def absolute(self):
         address = super(BIT, self).absolute()
-        value = int(self.cpu.read_byte(address), base=0)
-        self.cpu.ps['zero_flag'] = ((value & self.cpu.acc) == 0)
-        self.cpu.ps['overflow_flag'] = (value & 0b01000000)
-        self.cpu.ps['negative_flag'] = (value & 0b10000000 != 0)
+        value = self.cpu.read_byte_int(address)
+        # N and V are copied from bits 7 and 6 of the operand, Z is set from acc AND operand
+        self.cpu.status = (self.cpu.status & NOT_NVZ) | (value & (NEGATIVE | OVERFLOW)) | \
+            (ZERO if value & self.cpu.acc == 0 else 0)
@@ -1,4 +1,5 @@
 import cpu6502.instructions
+from cpu6502.status import BREAK, INTERRUPT
 
 
 class BRK(cpu6502.instructions.AbstractInstruction):
@@ -6,16 +7,17 @@ class BRK(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x00': self.implied
+            0x00: self.implied
         }
 
     def implied(self):
-        self.cpu.push_word_on_stack(self.cpu.pc)
-        self.cpu.ps['break_flag'] = True
+        # BRK is followed by a padding byte, the return address skips it
+        self.cpu.push_word_on_stack((self.cpu.pc + 1) & 0xffff)
+        self.cpu.status |= BREAK
         self.cpu.push_ps_on_stack()
-        self.cpu.pc = int(self.cpu.read_word(0xfffe), base=0)
+        self.cpu.pc = self.cpu.read_word_int(0xfffe)
         self.cpu.clock.total_clock_cycles -= 1  # Weird but needed to be done
-        self.cpu.ps['interrupt_flag'] = True
+        self.cpu.status |= INTERRUPT
 
 
 class NOP(cpu6502.instructions.AbstractInstruction):
@@ -23,7 +25,7 @@ class NOP(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xea': self.implied
+            0xea: self.implied
         }
 
     def implied(self):
@@ -35,10 +37,10 @@ class RTI(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x40': self.implied
+            0x40: self.implied
         }
 
     def implied(self):
         self.cpu.pull_ps_from_stack()
-        self.cpu.pc = int(self.cpu.pull_word_from_stack(), base=0)
+        self.cpu.pc = self.cpu.pull_word_int_from_stack()
         self.cpu.clock.total_clock_cycles -= 2  # Weird but needed to be done
@@ -1,4 +1,5 @@
 import cpu6502.instructions
+from cpu6502.status import NOT_NZ, NZ_TABLE
 
 
 class PHA(cpu6502.instructions.AbstractInstruction):
@@ -6,7 +7,7 @@ class PHA(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x48': self.implied
+            0x48: self.implied
         }
 
     def implied(self):
@@ -18,7 +19,7 @@ class PHP(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x08': self.implied
+            0x08: self.implied
         }
 
     def implied(self):
@@ -30,13 +31,12 @@ class PLA(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x68': self.implied
+            0x68: self.implied
         }
 
     def implied(self):
-        self.cpu.acc = int(self.cpu.pull_byte_from_stack(), base=0)
-        self.cpu.ps['zero_flag'] = self.cpu.acc == 0
-        self.cpu.ps['negative_flag'] = (self.cpu.acc >> 7) == 1
+        self.cpu.acc = self.cpu.pull_byte_int_from_stack()
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[self.cpu.acc]
 
 
 class PLP(cpu6502.instructions.AbstractInstruction):
@@ -44,7 +44,7 @@ class PLP(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x28': self.implied
+            0x28: self.implied
         }
 
     def implied(self):
@@ -6,13 +6,13 @@ class STA(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x85': self.zero_page,
-            '0x95': self.zero_page_x,
-            '0x8d': self.absolute,
-            '0x9d': self.absolute_x,
-            '0x99': self.absolute_y,
-            '0x81': self.indexed_indirect,
-            '0x91': self.indirect_indexed
+            0x85: self.zero_page,
+            0x95: self.zero_page_x,
+            0x8d: self.absolute,
+            0x9d: self.absolute_x,
+            0x99: self.absolute_y,
+            0x81: self.indexed_indirect,
+            0x91: self.indirect_indexed
         }
 
     def zero_page(self):
@@ -53,9 +53,9 @@ class STX(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x86': self.zero_page,
-            '0x96': self.zero_page_y,
-            '0x8e': self.absolute
+            0x86: self.zero_page,
+            0x96: self.zero_page_y,
+            0x8e: self.absolute
         }
 
     def zero_page(self):
@@ -76,9 +76,9 @@ class STY(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x84': self.zero_page,
-            '0x94': self.zero_page_x,
-            '0x8c': self.absolute
+            0x84: self.zero_page,
+            0x94: self.zero_page_x,
+            0x8c: self.absolute
         }
 
     def zero_page(self):
@@ -1,4 +1,5 @@
 import cpu6502.instructions
+from cpu6502.status import NOT_NZ, NZ_TABLE
 
 
 class TAX(cpu6502.instructions.AbstractInstruction):
@@ -6,7 +7,7 @@ class TAX(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xaa': self.implied
+            0xaa: self.implied
         }
 
     def implied(self):
@@ -14,8 +15,7 @@ class TAX(cpu6502.instructions.AbstractInstruction):
         ~self.cpu.clock
 
     def finalise(self):
-        self.cpu.ps['zero_flag'] = (self.cpu.idx == 0)
-        self.cpu.ps['negative_flag'] = (self.cpu.idx & 0b10000000 != 0)  # Set negative flag if bit 7 of acc is set
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[self.cpu.idx]
 
 
 class TAY(cpu6502.instructions.AbstractInstruction):
@@ -23,7 +23,7 @@ class TAY(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xa8': self.implied
+            0xa8: self.implied
         }
 
     def implied(self):
@@ -31,8 +31,7 @@ class TAY(cpu6502.instructions.AbstractInstruction):
         ~self.cpu.clock
 
     def finalise(self):
-        self.cpu.ps['zero_flag'] = (self.cpu.idy == 0)
-        self.cpu.ps['negative_flag'] = (self.cpu.idy & 0b10000000 != 0)  # Set negative flag if bit 7 of acc is set
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[self.cpu.idy]
 
 
 class TXA(cpu6502.instructions.AbstractInstruction):
@@ -40,7 +39,7 @@ class TXA(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x8a': self.implied
+            0x8a: self.implied
         }
 
     def implied(self):
@@ -48,8 +47,7 @@ class TXA(cpu6502.instructions.AbstractInstruction):
         ~self.cpu.clock
 
     def finalise(self):
-        self.cpu.ps['zero_flag'] = (self.cpu.acc == 0)
-        self.cpu.ps['negative_flag'] = (self.cpu.acc & 0b10000000 != 0)  # Set negative flag if bit 7 of acc is set
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[self.cpu.acc]
 
 
 class TYA(cpu6502.instructions.AbstractInstruction):
@@ -57,7 +55,7 @@ class TYA(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x98': self.implied
+            0x98: self.implied
         }
 
     def implied(self):
@@ -65,8 +63,7 @@ class TYA(cpu6502.instructions.AbstractInstruction):
         ~self.cpu.clock
 
     def finalise(self):
-        self.cpu.ps['zero_flag'] = (self.cpu.acc == 0)
-        self.cpu.ps['negative_flag'] = (self.cpu.acc & 0b10000000 != 0)  # Set negative flag if bit 7 of acc is set
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[self.cpu.acc]
 
 
 class TSX(cpu6502.instructions.AbstractInstruction):
@@ -74,7 +71,7 @@ class TSX(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0xba': self.implied
+            0xba: self.implied
         }
 
     def implied(self):
@@ -82,8 +79,7 @@ class TSX(cpu6502.instructions.AbstractInstruction):
         ~self.cpu.clock
 
     def finalise(self):
-        self.cpu.ps['zero_flag'] = (self.cpu.idx == 0)
-        self.cpu.ps['negative_flag'] = (self.cpu.idx & 0b10000000 != 0)  # Set negative flag if bit 7 of acc is set
+        self.cpu.status = (self.cpu.status & NOT_NZ) | NZ_TABLE[self.cpu.idx]
 
 
 class TXS(cpu6502.instructions.AbstractInstruction):
@@ -91,7 +87,7 @@ class TXS(cpu6502.instructions.AbstractInstruction):
     def __init__(self, cpu):
         super().__init__(cpu)
         self.opcodes = {
-            '0x9a': self.implied
+            0x9a: self.implied
         }
 
     def implied(self):
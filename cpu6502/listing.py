@@ -0,0 +1,80 @@
+"""
+Reader of assembler listings (AS65 format, as used by Klaus Dormann's test ROMs), mapping addresses to labels and
+source lines so that a trap address can be reported as e.g. 'chkdad+0x8: bne * ;failed not equal (non zero)'.
+"""
+import bisect
+import re
+
+# 'addr : bytes    >source', the source starts at a fixed column
+LINE = re.compile(r'^([0-9a-fA-F]{4}) :[ 0-9a-fA-F]*')
+SOURCE_COLUMN = 24
+
+
+class Listing:
+
+    def __init__(self, labels: dict, lines: dict):
+        """
+        :param labels: dict: Address -> label defined at that address
+        :param lines: dict: Address -> source line of the instruction at that address
+        """
+        self.labels = labels
+        self.lines = lines
+        self._label_addresses = sorted(labels)
+
+    @classmethod
+    def load(cls, filepath: str) -> 'Listing':
+        """
+        Method to read a listing file
+        :param filepath: str: Path to the listing
+        :return: Listing: Labels and source lines of the listing
+        """
+        labels = {}
+        lines = {}
+        with open(filepath, encoding='latin-1') as file:
+            for line in file:
+                match = LINE.match(line)
+                if match is None:
+                    continue
+                address = int(match.group(1), 16)
+                source = line[SOURCE_COLUMN:].rstrip()
+                if not source.strip() or source.lstrip().startswith(';'):
+                    continue
+                if not source[0].isspace():
+                    label = source.split()[0].rstrip(':')
+                    labels.setdefault(address, label)
+                    source = source[len(source.split()[0]):]
+                if source.strip() and len(line) > 7 and line[7] != ' ':  # Assembled bytes, so an instruction
+                    lines.setdefault(address, ' '.join(source.split(';')[0].split()) +
+                                     (' ;' + source.split(';', 1)[1].strip() if ';' in source else ''))
+        return cls(labels, lines)
+
+    def label(self, address: int) -> str:
+        """
+        Method to describe an address relative to the closest label at or before it
+        :param address: int: Address to be described
+        :return: str: e.g. 'chkdad' or 'chkdad+0x8', the hex address if there is no label before it
+        """
+        index = bisect.bisect_right(self._label_addresses, address) - 1
+        if index < 0:
+            return hex(address)
+        base = self._label_addresses[index]
+        return self.labels[base] + (f'+{hex(address - base)}' if address != base else '')
+
+    def describe(self, address: int) -> str:
+        """
+        Method to describe an address with its label and source line
+        :param address: int: Address to be described
+        :return: str: e.g. 'chkdad+0x8 (0x3477): bne * ;failed not equal (non zero)'
+        """
+        return f'{self.label(address)} ({hex(address)}): {self.lines.get(address, "?")}'
+
+    def find(self, text: str) -> int:
+        """
+        Method to find the first instruction whose source line contains text, e.g. find('test passed')
+        :param text: str: Text to be found
+        :return: int: Address of the instruction, None if there is none
+        """
+        for address in sorted(self.lines):
+            if text in self.lines[address]:
+                return address
+        return None
@@ -1,32 +1,251 @@
+import os
+from typing import Callable, Iterable
+
 import numpy as np
 
 
+class DevicePage:
+    """
+    Page of the address space backed by a device instead of a buffer. Reads and writes are forwarded to the callbacks
+    with the full address, so a device spanning several pages sees one contiguous range.
+    """
+
+    def __init__(self, base: int, read: Callable, write: Callable):
+        self.base = base
+        self.read = read
+        self.write = write
+
+    def __getitem__(self, offset: int) -> int:
+        return self.read(self.base + offset)
+
+    def __setitem__(self, offset: int, value: int):
+        self.write(self.base + offset, value)
+
+
+class CodePage:
+    """
+    Write page of pages holding cached code (see Memory.mark_code). Writes go to the original page, the ones changing
+    a byte are reported to the code listeners of the memory as listener(address, 1), once for every marked page sharing
+    the page.
+    """
+
+    def __init__(self, page, bases: list, listeners: list):
+        self.page = page
+        self.bases = bases
+        self.listeners = listeners
+
+    def __getitem__(self, offset: int) -> int:
+        return self.page[offset]
+
+    def __setitem__(self, offset: int, value: int):
+        page = self.page
+        if page[offset] != value:
+            page[offset] = value
+            for base in self.bases:
+                for listener in self.listeners:
+                    listener(base + offset, 1)
+
+
 class Memory:
     MAX_SIZE = 1024 * 64  # memory can be accessed up to 0xFFFF
+    PAGE_SIZE = 0x100
+    PAGES = MAX_SIZE // PAGE_SIZE
+    INTEL_HEX_EXTENSIONS = ('.hex', '.ihex', '.ihx')
 
     def __init__(self):
         self.data = np.zeros(Memory.MAX_SIZE, dtype=np.ubyte)
+        # Page tables: memory[address] is read_pages[address >> 8][address & 0xff], every entry is a 256 byte view of
+        # a region or a DevicePage. Pages of read-only regions are written to a scratch page, like writes to a real ROM.
+        self.read_pages = [None] * Memory.PAGES
+        self.write_pages = [None] * Memory.PAGES
+        self.rom_sink = memoryview(bytearray(Memory.PAGE_SIZE))
+        # Code tracking: pages marked by the caches of decoded code (see mark_code) get a CodePage as their write page,
+        # the writes to the other pages do not cost anything extra. Listeners are called as listener(address, size).
+        self.code_pages = bytearray(Memory.PAGES)
+        self.code_listeners = []
+        self.map_region(0x0000, self.data)
+        # Pages of the last snapshot (see snapshot_pages) and a copy of the RAM they were taken from
+        self._snapshot_pages = None
+        self._snapshot_image = None
 
     def __str__(self) -> str:
         res = ''
-        for item in self.data:
+        for item in self[0:Memory.MAX_SIZE]:
             res += f'{hex(item)}\n'
         return res
 
-    def __getitem__(self, item) -> np.ubyte:
-        return self.data[item]
+    def __getitem__(self, item) -> int:
+        try:
+            return self.read_pages[item >> 8][item & 0xff]
+        except TypeError:
+            if not isinstance(item, slice):
+                raise
+            return np.array([self.read_pages[address >> 8][address & 0xff]
+                             for address in range(*item.indices(Memory.MAX_SIZE))], dtype=np.ubyte)
+
+    def __setitem__(self, key: int, value: int):
+        self.write_pages[key >> 8][key & 0xff] = value & 0xff
+
+    def map_region(self, address: int, region, offset: int = 0, size: int = None, writable: bool = True) -> None:
+        """
+        Method to map a region onto the address space. Only the page tables change, so e.g. switching a bank is just
+        mapping another part of a larger region and never copies any memory.
+        :param address: int: First address of the mapping, has to be page aligned
+        :param region: Anything exporting a byte buffer (np.ndarray, np.memmap, bytearray...)
+        :param offset: int: First byte of the region to be mapped
+        :param size: int: Number of bytes to be mapped (multiple of PAGE_SIZE), the rest of the region by default
+        :param writable: bool: False to ignore writes, which is also the case for read-only buffers
+        :return: None
+        """
+        view = memoryview(region).cast('B')
+        size = len(view) - offset if size is None else size
+        if address % Memory.PAGE_SIZE or size % Memory.PAGE_SIZE or not 0 <= address <= Memory.MAX_SIZE - size or \
+                not 0 <= offset <= len(view) - size:
+            raise ValueError(f'Cannot map {hex(size)} bytes at {hex(offset)} of the region to {hex(address)}')
+        writable = writable and not view.readonly
+        for page in range(size // Memory.PAGE_SIZE):
+            start = offset + page * Memory.PAGE_SIZE
+            self.read_pages[(address >> 8) + page] = view[start:start + Memory.PAGE_SIZE]
+            self.write_pages[(address >> 8) + page] = view[start:start + Memory.PAGE_SIZE] if writable \
+                else self.rom_sink
+        self._remapped(address, size)
+
+    def map_rom(self, address: int, rom, offset: int = 0, size: int = None):
+        """
+        Method to map a read-only region. A ROM given as a path is mapped straight from the file with np.memmap, so
+        every memory using the same ROM shares one copy in the page cache.
+        :param address: int: First address of the mapping, has to be page aligned
+        :param rom: Path to the ROM image or anything exporting a byte buffer
+        :param offset: int: First byte of the ROM to be mapped
+        :param size: int: Number of bytes to be mapped, the rest of the ROM by default
+        :return: ROM region (np.memmap if the ROM was given as a path)
+        """
+        if isinstance(rom, str):
+            rom = np.memmap(rom, dtype=np.ubyte, mode='r')
+        self.map_region(address, rom, offset, size, writable=False)
+        return rom
+
+    def map_device(self, address: int, size: int, read: Callable, write: Callable) -> None:
+        """
+        Method to map a device onto the address space, page by page
+        :param address: int: First address of the device, has to be page aligned
+        :param size: int: Size of the device range (multiple of PAGE_SIZE)
+        :param read: Callable: read(address) -> int, called with the full address
+        :param write: Callable: write(address, value), called with the full address
+        :return: None
+        """
+        if address % Memory.PAGE_SIZE or size % Memory.PAGE_SIZE or not 0 <= address <= Memory.MAX_SIZE - size:
+            raise ValueError(f'Cannot map {hex(size)} bytes of the device to {hex(address)}')
+        for page in range(address >> 8, (address + size) >> 8):
+            self.read_pages[page] = self.write_pages[page] = DevicePage(page << 8, read, write)
+        self._remapped(address, size)
+
+    def mirror(self, address: int, size: int, source: int, source_size: int = None) -> None:
+        """
+        Method to mirror pages, e.g. mirror(0x0800, 0x1800, 0x0000, 0x0800) repeats the first 2K up to 0x1fff. The
+        mirror points at the pages currently mapped at source, remapping the source later does not affect it.
+        :param address: int: First address of the mirror, has to be page aligned
+        :param size: int: Size of the mirror (multiple of PAGE_SIZE)
+        :param source: int: First address of the mirrored pages, has to be page aligned
+        :param source_size: int: Size of the mirrored range, repeated until the mirror is filled (size by default)
+        :return: None
+        """
+        source_size = size if source_size is None else source_size
+        if address % Memory.PAGE_SIZE or source % Memory.PAGE_SIZE or size % Memory.PAGE_SIZE or \
+                not source_size or source_size % Memory.PAGE_SIZE or not 0 <= address <= Memory.MAX_SIZE - size or \
+                not 0 <= source <= Memory.MAX_SIZE - source_size:
+            raise ValueError(f'Cannot mirror {hex(source_size)} bytes at {hex(source)} to {hex(address)}')
+        for page in range(size // Memory.PAGE_SIZE):
+            mirrored = (source >> 8) + page % (source_size // Memory.PAGE_SIZE)
+            self.read_pages[(address >> 8) + page] = self.read_pages[mirrored]
+            self.write_pages[(address >> 8) + page] = self.write_pages[mirrored]
+        self._remapped(address, size)
+
+    def mark_code(self, address: int, size: int = 1) -> None:
+        """
+        Method to mark the pages of a range holding cached code: from now on the writes changing their bytes, through
+        any mapping of the same page, are reported to the code listeners. Pages stay marked until they are remapped.
+        :param address: int: First address of the range
+        :param size: int: Number of bytes
+        :return: None
+        """
+        for page in range(address >> 8, ((address + size - 1) >> 8) + 1):
+            if self.code_pages[page]:
+                continue
+            self.code_pages[page] = 1
+            write_page = self.write_pages[page]
+            if isinstance(write_page, CodePage):  # Mirror of a marked page
+                write_page.bases.append(page << 8)
+            elif write_page is not self.rom_sink and not isinstance(write_page, DevicePage):
+                code_page = CodePage(write_page, [page << 8], self.code_listeners)
+                for mirror in range(Memory.PAGES):
+                    if self.write_pages[mirror] is write_page:
+                        self.write_pages[mirror] = code_page
+
+    def code_written(self, address: int, size: int = 1) -> None:
+        """
+        Method to report writes which bypass the page tables (e.g. to data) to the code listeners, if they hit marked
+        pages. Loading files and restoring snapshots report their writes.
+        :param address: int: First address of the range
+        :param size: int: Number of bytes
+        :return: None
+        """
+        if size and any(self.code_pages[address >> 8:((address + size - 1) >> 8) + 1]):
+            for listener in self.code_listeners:
+                listener(address, size)
 
-    def __setitem__(self, key: np.short, value: np.ubyte):
-        self.data[key] = value
+    def _remapped(self, address: int, size: int) -> None:
+        # The cached code of remapped pages is stale, a page is marked again by the next cache decoding it
+        for page in range(address >> 8, (address + size) >> 8):
+            if self.code_pages[page]:
+                self.code_pages[page] = 0
+                for listener in self.code_listeners:
+                    listener(page << 8, Memory.PAGE_SIZE)
+
+    def snapshot_pages(self) -> tuple:
+        """
+        Method to capture the RAM (data) page by page. Pages are immutable bytes shared with the previous snapshot
+        while they are not written to, so a snapshot only copies the pages written since the previous one (finding
+        them costs one vectorised comparison of the RAM). Regions mapped from elsewhere (ROMs, devices) are not
+        captured.
+        :return: tuple: PAGES bytes objects of PAGE_SIZE bytes
+        """
+        pages = self.data.reshape(Memory.PAGES, Memory.PAGE_SIZE)
+        if self._snapshot_pages is None:
+            dirty = range(Memory.PAGES)
+            self._snapshot_pages = [None] * Memory.PAGES
+            self._snapshot_image = pages.copy()
+        else:
+            dirty = np.flatnonzero((pages != self._snapshot_image).any(axis=1))
+            self._snapshot_image[dirty] = pages[dirty]
+            self._snapshot_pages = list(self._snapshot_pages)
+        for page in dirty:
+            self._snapshot_pages[page] = self._snapshot_image[page].tobytes()
+        self._snapshot_pages = tuple(self._snapshot_pages)
+        return self._snapshot_pages
 
-    def get_values(self, address: np.ushort, n: int) -> list:
+    def restore_pages(self, pages: tuple) -> None:
+        """
+        Method to restore the RAM captured by snapshot_pages. The restored pages become the base of the next snapshot.
+        :param pages: tuple: PAGES bytes objects of PAGE_SIZE bytes
+        :return: None
+        """
+        if len(pages) != Memory.PAGES or any(len(page) != Memory.PAGE_SIZE for page in pages):
+            raise ValueError(f'A snapshot has {Memory.PAGES} pages of {Memory.PAGE_SIZE} bytes')
+        image = np.frombuffer(b''.join(pages), dtype=np.ubyte)
+        self.data[:] = image
+        self._snapshot_pages = tuple(pages)
+        self._snapshot_image = image.reshape(Memory.PAGES, Memory.PAGE_SIZE).copy()
+        self.code_written(0x0000, Memory.MAX_SIZE)
+
+    def get_values(self, address: int, n: int) -> list:
         """
         Method to return next n values starting from address
-        :param address: np.ushort: Address of the first value
+        :param address: int: Address of the first value
         :param n: int: Number of values to be added to the result
         :return: list: List of n values
         """
-        return [hex(val) for val in self.data[address: address + n]]
+        return [hex(val) for val in self[address: address + n]]
 
     def get_stack(self, n: int) -> list:
         """
@@ -34,17 +253,99 @@ class Memory:
         :param n: int: Number of values to be added to the list
         :return: list: List of all values on stack
         """
-        return [hex(val) for val in self.data[0x01ff - n: 0x01ff]]
+        return [hex(val) for val in self[0x01ff - n: 0x01ff]]
 
-    def load_binary_file(self, filepath: str, start_offset: int) -> bool:
+    def load_binary_file(self, filepath: str, start_offset: int = 0, mmap: bool = False) -> bool:
         """
-        Method to load a binary file into the memory
+        Method to load a binary file into the memory. The file is read straight into the RAM buffer (data), so the rest
+        of the memory is left untouched.
         :param filepath: str: Path to the binary file
         :param start_offset: int: Starting offset (first byte where the memory is loaded to)
+        :param mmap: bool: Map a full 64K image copy-on-write instead of reading it, so every memory loaded from the
+        same file shares the page cache until it is written to. The image becomes the RAM and is mapped to the whole
+        address space.
+        :return: bool: True if successful, False otherwise
+        """
+        size = os.path.getsize(filepath)
+        if not 0 <= start_offset <= self.MAX_SIZE - size:
+            print(f'File {filepath} ({size} bytes) does not fit in memory at offset {hex(start_offset)}')
+            return False
+        if mmap and size == self.MAX_SIZE:
+            self.data = np.memmap(filepath, dtype=np.ubyte, mode='c')
+            self.map_region(0x0000, self.data)
+            return True
+        with open(filepath, 'rb') as file:
+            file.readinto(memoryview(self.data)[start_offset:start_offset + size])
+        self.code_written(start_offset, size)
+        return True
+
+    @staticmethod
+    def parse_intel_hex_record(line: str) -> bytes:
+        """
+        Method to decode a single Intel HEX record
+        :param line: str: Record, e.g. ':0102000000FD'
+        :return: bytes: Decoded record without the checksum, None if the record is invalid
+        """
+        if not line.startswith(':'):
+            return None
+        try:
+            record = bytes.fromhex(line[1:])
+        except ValueError:
+            return None
+        if len(record) < 5 or len(record) != record[0] + 5 or sum(record) & 0xff:
+            return None
+        return record[:-1]
+
+    def load_intel_hex_file(self, filepath: str) -> bool:
+        """
+        Method to load an Intel HEX file into the memory. Every data record is written to its own address, extended
+        segment and linear addresses are supported as long as the data ends up below 0x10000.
+        :param filepath: str: Path to the Intel HEX file
         :return: bool: True if successful, False otherwise
         """
-        self.data = np.fromfile(filepath, dtype=np.ubyte)
-        offset_array = np.zeros(shape=start_offset, dtype=np.ubyte)
-        self.data = np.append(offset_array, self.data)
-        self.data = np.append(self.data, np.zeros(shape=(self.MAX_SIZE - len(self.data)), dtype=np.ubyte))
+        base = 0
+        with open(filepath) as file:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                record = self.parse_intel_hex_record(line.strip())
+                if record is None:
+                    print(f'Invalid Intel HEX record in {filepath}, line {line_number}')
+                    return False
+                address, record_type, data = base + ((record[1] << 8) | record[2]), record[3], record[4:]
+                if record_type == 0x00:
+                    if address + len(data) > self.MAX_SIZE:
+                        print(f'Record in {filepath}, line {line_number} is out of memory bounds (0xffff)')
+                        return False
+                    self.data[address:address + len(data)] = np.frombuffer(data, dtype=np.ubyte)
+                    self.code_written(address, len(data))
+                elif record_type == 0x01:
+                    break
+                elif record_type in (0x02, 0x04):
+                    base = int.from_bytes(data, 'big') << (4 if record_type == 0x02 else 16)
+        return True
+
+    def load_file(self, filepath: str, start_offset: int = 0, mmap: bool = False) -> bool:
+        """
+        Method to load a file into the memory, Intel HEX files are recognised by their extension (INTEL_HEX_EXTENSIONS)
+        and carry their own addresses, everything else is loaded as a raw binary
+        :param filepath: str: Path to the file
+        :param start_offset: int: Starting offset of a raw binary file
+        :param mmap: bool: See load_binary_file
+        :return: bool: True if successful, False otherwise
+        """
+        if os.path.splitext(filepath)[1].lower() in self.INTEL_HEX_EXTENSIONS:
+            return self.load_intel_hex_file(filepath)
+        return self.load_binary_file(filepath, start_offset, mmap)
+
+    def load_segments(self, segments: Iterable) -> bool:
+        """
+        Method to load several files into the memory, e.g. a program and the ROM with its vectors
+        :param segments: Iterable: Paths or (path, start_offset) tuples, loaded in order
+        :return: bool: True if all segments were loaded, False otherwise (the remaining segments are not loaded)
+        """
+        for segment in segments:
+            filepath, start_offset = (segment, 0) if isinstance(segment, str) else segment
+            if not self.load_file(filepath, start_offset):
+                return False
         return True
@@ -0,0 +1,108 @@
+"""
+Fan-out of a snapshot: runs many variants of the same state (e.g. a routine for all 256 accumulator values) in a
+process pool and collects their final states in a structured array, e.g.:
+
+    results = run_variants(cpu.snapshot(), [{'acc': value} for value in range(0x100)], until_pc=0x0210)
+
+The RAM of the snapshot is put into shared memory once, every worker builds its cpu once and copies the image from
+the shared memory before each variant, so the tasks only carry the perturbations.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from cpu6502.cpu import CPU
+from cpu6502.memory import Memory
+from cpu6502.snapshot import Snapshot
+
+REGISTERS = ('pc', 'sp', 'acc', 'idx', 'idy', 'status')
+RESULT_FIELDS = [('index', np.uint32), ('reason', 'U16'), ('pc', np.uint16), ('acc', np.uint8), ('idx', np.uint8),
+                 ('idy', np.uint8), ('sp', np.uint8), ('status', np.uint8), ('instructions', np.uint64),
+                 ('cycles', np.uint64)]
+
+_worker = None  # State of a worker process, see _initialise
+
+
+def result_dtype(capture=()) -> np.dtype:
+    """
+    Function to get the dtype of the results of run_variants
+    :param capture: Addresses whose final values are returned in the memory field
+    :return: np.dtype: Structured dtype
+    """
+    return np.dtype(RESULT_FIELDS + ([('memory', np.uint8, (len(capture),))] if len(capture) else []))
+
+
+def apply(cpu: CPU, perturbation: dict) -> None:
+    """
+    Function to apply a perturbation to a cpu
+    :param cpu: CPU: Cpu to be changed
+    :param perturbation: dict: Register names (REGISTERS) and memory addresses (ints) mapped to their new values
+    :return: None
+    """
+    for key, value in perturbation.items():
+        if isinstance(key, str):
+            if key not in REGISTERS:
+                raise ValueError(f'Unknown register {key}, expected one of {REGISTERS}')
+            setattr(cpu, key, value)
+        else:
+            cpu.memory[key] = value
+
+
+def _initialise(name: str, registers: tuple, settings: dict) -> None:
+    global _worker
+    shared = shared_memory.SharedMemory(name=name)
+    cpu = CPU()
+    cpu.memory = Memory()
+    _worker = (shared, np.ndarray(Memory.MAX_SIZE, dtype=np.ubyte, buffer=shared.buf), cpu, registers, settings)
+
+
+def _run_batch(batch: list) -> list:
+    _, image, cpu, registers, settings = _worker
+    results = []
+    for index, perturbation in batch:
+        cpu.memory.data[:] = image
+        cpu.pc, cpu.sp, cpu.acc, cpu.idx, cpu.idy, cpu.status, cpu.clock.total_clock_cycles = registers
+        apply(cpu, perturbation)
+        result = cpu.run(settings['max_cycles'], settings['max_instructions'], settings['until_pc'],
+                         trap=settings['trap'])
+        memory = [cpu.memory[address] for address in settings['capture']]
+        results.append((index, result.reason, cpu.pc, cpu.acc, cpu.idx, cpu.idy, cpu.sp, cpu.status,
+                        result.instructions, result.cycles) + ((memory,) if memory else ()))
+    return results
+
+
+def run_variants(snapshot: Snapshot, perturbations: list, max_cycles: int = None, max_instructions: int = None,
+                 until_pc=(), trap: bool = True, capture=(), workers: int = None, batch_size: int = None) -> np.ndarray:
+    """
+    Function to run every perturbation of a snapshot until one of the stop conditions (see CPU.run) is met. Runs
+    should have an instruction or cycle budget unless they are known to stop.
+    :param snapshot: Snapshot: Common starting state
+    :param perturbations: list: dicts of registers and memory addresses to be changed, see apply
+    :param max_cycles: int: Cycle budget of every run
+    :param max_instructions: int: Instruction budget of every run
+    :param until_pc: Address(es) stopping the runs
+    :param trap: bool: Stop after an instruction which jumps or branches to itself
+    :param capture: Addresses whose final values are returned
+    :param workers: int: Number of processes (os.cpu_count() by default)
+    :param batch_size: int: Variants per task, split evenly between the workers by default
+    :return: np.ndarray: One record of result_dtype(capture) per perturbation, in order
+    """
+    workers = workers or os.cpu_count() or 1
+    batch_size = batch_size or max(1, -(-len(perturbations) // (workers * 4)))
+    tasks = list(enumerate(perturbations))
+    batches = [tasks[start:start + batch_size] for start in range(0, len(tasks), batch_size)]
+    settings = {'max_cycles': max_cycles, 'max_instructions': max_instructions, 'until_pc': until_pc, 'trap': trap,
+                'capture': list(capture)}
+    registers = snapshot[:6] + (snapshot.cycles,)
+    shared = shared_memory.SharedMemory(create=True, size=Memory.MAX_SIZE)
+    try:
+        np.ndarray(Memory.MAX_SIZE, dtype=np.ubyte, buffer=shared.buf)[:] = snapshot.image
+        with ProcessPoolExecutor(workers, initializer=_initialise,
+                                 initargs=(shared.name, registers, settings)) as executor:
+            records = [record for batch in executor.map(_run_batch, batches) for record in batch]
+    finally:
+        shared.close()
+        shared.unlink()
+    return np.array(records, dtype=result_dtype(capture))
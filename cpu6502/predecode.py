@@ -0,0 +1,775 @@
+"""
+Predecoded instruction cache: the first execution of an instruction decodes it into per-address arrays (handler,
+resolved operand, base clock cycles and length), later executions of the same address skip the fetch and the parsing
+of the operand bytes, e.g.:
+
+    cache = PredecodeCache(cpu)
+    result = cache.run(max_instructions=1000000)
+    print(cache.hits, cache.misses)
+
+A handler executes an instruction of one opcode given its resolved operand: the immediate value, the zero page or
+absolute address, or the target of a branch. It only adds the cycles which depend on the state (page crossing, taken
+branches) to the base cycles of the opcode. The pages of the decoded instructions are marked in the memory (see
+Memory.mark_code), so every write changing their bytes drops the entries of the instructions it overlaps. Opcodes
+outside of the instruction set and code in device pages are not cached, they are executed by the interpreter.
+
+A few sequences of instructions common in loops (see FUSIONS) are decoded into one entry whose handler executes all of
+them, they cost a single dispatch. The sequence is split (its first instruction is interpreted) when a stop condition
+of the run could be met between its instructions. PredecodeCache.fusions counts the executions of every sequence.
+
+With lazy_flags, the instructions setting the negative and zero flags from a single result (loads, transfers, logical
+operations, increments and decrements) only record that result in PredecodeCache.pending. The flags are computed from
+it when they are needed: by the branches testing them, PHP and BRK, before an interpreted instruction and at the end of
+every run, so cpu.status is exact whenever the cache is not running.
+
+The results are the ones of the interpreter, including the clock cycles and the quirks of the instructions. Within
+an instruction the clock is advanced by the base cycles before its accesses.
+"""
+from math import inf
+from typing import Callable, NamedTuple
+
+from cpu6502.alu import ADC_TABLE, ASL_TABLE, COMPARE_TABLE, LSR_TABLE, NOT_ADC_FLAGS, NOT_COMPARE_FLAGS, \
+    NOT_SHIFT_FLAGS, ROL_TABLE, ROR_TABLE, SBC_TABLE
+from cpu6502.cpu import CPU, RunResult
+from cpu6502.disassembler import BRANCHES, CYCLES, FLAG_CHANGES, OPCODES, REGISTER_OF, SETS_RESERVED, TRANSFERS
+from cpu6502.instructions import Trap
+from cpu6502.memory import DevicePage, Memory
+from cpu6502.status import BREAK, CARRY, DECIMAL, INTERRUPT, NEGATIVE, NOT_NZ, NZ, NZ_TABLE, OVERFLOW, RESERVED, ZERO
+
+NOT_NVZ = 0xff ^ (NEGATIVE | OVERFLOW | ZERO)
+SHIFT_TABLES = {'ASL': ASL_TABLE, 'LSR': LSR_TABLE, 'ROL': ROL_TABLE, 'ROR': ROR_TABLE}
+BASE_CYCLES = bytes(CYCLES)
+
+
+def _resolver(cpu: CPU, mode: str, page_penalty: bool = True):
+    """
+    Function to build the address resolution of an indexed or indirect addressing mode
+    :param page_penalty: bool: Count the extra cycle of (Indirect),Y on page crossing
+    :return: Callable: resolve(operand) -> address, None for the modes whose operand is the address
+    """
+    clock = cpu.clock
+    read_pages = cpu.memory.read_pages
+    if mode in ('ZeroPage', 'Absolute'):
+        return None
+    if mode == 'ZeroPage,X':
+        return lambda operand: (operand + cpu.idx) & 0xff
+    if mode == 'ZeroPage,Y':
+        return lambda operand: (operand + cpu.idy) & 0xff
+    if mode in ('Absolute,X', 'Absolute,Y'):
+        return _indexed_resolver(cpu, 'idx' if mode == 'Absolute,X' else 'idy')
+    if mode == '(Indirect,X)':
+        def resolve(operand: int) -> int:
+            pointer = (operand + cpu.idx) & 0xff
+            return read_pages[0][pointer] | (read_pages[(pointer + 1) >> 8][(pointer + 1) & 0xff] << 8)
+    else:  # (Indirect),Y, the word is read without wrapping around the zero page, like CPU.read_word_int does
+        def resolve(operand: int) -> int:
+            idy = cpu.idy
+            address = (read_pages[0][operand] | (read_pages[(operand + 1) >> 8][(operand + 1) & 0xff] << 8)) + idy
+            if page_penalty and (address >> 8) != ((address + idy) >> 8):
+                clock.total_clock_cycles += 1
+            return address & 0xffff
+    return resolve
+
+
+def _indexed_resolver(cpu: CPU, register: str) -> Callable:
+    clock = cpu.clock
+
+    def resolve(operand: int) -> int:
+        address = operand + getattr(cpu, register)
+        if (address >> 8) != (operand >> 8):
+            clock.total_clock_cycles += 1
+        return address & 0xffff
+    return resolve
+
+
+def _reader(cpu: CPU, mode: str) -> Callable:
+    """
+    Function to build the read of the operand value of an addressing mode
+    :return: Callable: read(operand) -> value
+    """
+    read_pages = cpu.memory.read_pages
+    if mode == 'Immediate':
+        return lambda operand: operand
+    resolve = _resolver(cpu, mode)
+    if resolve is None:
+        return lambda operand: read_pages[operand >> 8][operand & 0xff]
+
+    def read(operand: int) -> int:
+        address = resolve(operand)
+        return read_pages[address >> 8][address & 0xff]
+    return read
+
+
+def _modifier(cpu: CPU, mode: str, operation: Callable) -> Callable:
+    """
+    Function to build the handler of a read-modify-write instruction
+    :param operation: Callable: operation(value) -> new value, sets the flags
+    """
+    if mode == 'Accumulator':
+        def handler(operand: int) -> None:
+            cpu.acc = operation(cpu.acc)
+        return handler
+    read_pages, write_pages = cpu.memory.read_pages, cpu.memory.write_pages
+    resolve = _resolver(cpu, mode)
+
+    def handler(operand: int) -> None:
+        address = operand if resolve is None else resolve(operand)
+        write_pages[address >> 8][address & 0xff] = operation(read_pages[address >> 8][address & 0xff])
+    return handler
+
+
+def _push(cpu: CPU, value: int) -> None:
+    cpu.memory.write_pages[1][cpu.sp] = value & 0xff
+    cpu.sp = (cpu.sp - 1) & 0xff
+
+
+def _pull(cpu: CPU) -> int:
+    cpu.sp = (cpu.sp + 1) & 0xff
+    return cpu.memory.read_pages[1][cpu.sp]
+
+
+def _trap(cpu: CPU, address: int) -> None:
+    if cpu.trap_detection:
+        raise Trap(address)
+
+
+class PendingResult:
+    """
+    Last result whose negative and zero flags are not in the status of the cpu yet (lazy flags)
+    """
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = None  # None when cpu.status is up to date
+
+    def materialise(self, cpu: CPU) -> None:
+        """
+        Method to write the negative and zero flags of the pending result into the status of the cpu
+        :param cpu: CPU: Cpu whose status is updated
+        :return: None
+        """
+        if self.value is not None:
+            cpu.status = (cpu.status & NOT_NZ) | NZ_TABLE[self.value]
+            self.value = None
+
+
+# Builders of the handlers: builder(cpu, name, mode, pending) -> handler(operand), called after the pc was moved past
+# the instruction and the base cycles were counted. pending is the PendingResult of the lazy flags, None without them:
+# the handlers setting the negative and zero flags from a single result store it there instead, the ones setting them
+# otherwise drop it.
+
+def _load(cpu, name, mode, pending):
+    read = _reader(cpu, mode)
+    register = REGISTER_OF[name]
+    if pending is not None:
+        def handler(operand):
+            value = read(operand)
+            setattr(cpu, register, value)
+            pending.value = value
+        return handler
+
+    def handler(operand):
+        value = read(operand)
+        setattr(cpu, register, value)
+        cpu.status = (cpu.status & NOT_NZ) | NZ_TABLE[value]
+    return handler
+
+
+def _store(cpu, name, mode, pending):
+    write_pages = cpu.memory.write_pages
+    resolve = _resolver(cpu, mode, page_penalty=False)  # STA (Indirect),Y always takes 6 cycles
+    register = REGISTER_OF[name]
+
+    def handler(operand):
+        address = operand if resolve is None else resolve(operand)
+        write_pages[address >> 8][address & 0xff] = getattr(cpu, register)
+    return handler
+
+
+def _transfer(cpu, name, mode, pending):
+    source, target = TRANSFERS[name]
+    if pending is not None and target != 'sp':
+        def handler(operand):
+            value = getattr(cpu, source)
+            setattr(cpu, target, value)
+            pending.value = value
+        return handler
+
+    def handler(operand):
+        value = getattr(cpu, source)
+        setattr(cpu, target, value)
+        if target != 'sp':
+            cpu.status = (cpu.status & NOT_NZ) | NZ_TABLE[value]
+    return handler
+
+
+def _logical(cpu, name, mode, pending):
+    read = _reader(cpu, mode)
+
+    def handler(operand):
+        value = read(operand)
+        acc = cpu.acc & value if name == 'AND' else cpu.acc | value if name == 'ORA' else cpu.acc ^ value
+        cpu.acc = acc
+        if pending is None:
+            cpu.status = (cpu.status & NOT_NZ) | NZ_TABLE[acc]
+        else:
+            pending.value = acc
+    return handler
+
+
+def _bit(cpu, name, mode, pending):
+    read = _reader(cpu, mode)
+
+    def handler(operand):
+        value = read(operand)
+        cpu.status = (cpu.status & NOT_NVZ) | (value & (NEGATIVE | OVERFLOW)) | (0 if value & cpu.acc else ZERO)
+        if pending is not None:
+            pending.value = None
+    return handler
+
+
+def _arithmetic(cpu, name, mode, pending):
+    read = _reader(cpu, mode)
+    table = ADC_TABLE if name == 'ADC' else SBC_TABLE
+
+    def handler(operand):
+        value = read(operand)
+        status = cpu.status
+        result = table[((status & DECIMAL) << 14) | ((status & CARRY) << 16) | (cpu.acc << 8) | value]
+        cpu.acc = result & 0xff
+        cpu.status = (status & NOT_ADC_FLAGS) | (result >> 8)
+        if pending is not None:
+            pending.value = None
+    return handler
+
+
+def _compare(cpu, name, mode, pending):
+    read = _reader(cpu, mode)
+    register = REGISTER_OF[name]
+
+    def handler(operand):
+        value = read(operand)
+        cpu.status = (cpu.status & NOT_COMPARE_FLAGS) | (COMPARE_TABLE[(getattr(cpu, register) << 8) | value] >> 8)
+        if pending is not None:
+            pending.value = None
+    return handler
+
+
+def _shift(cpu, name, mode, pending):
+    table = SHIFT_TABLES[name]
+    rotate = len(table) > 0x100
+
+    def operation(value):
+        result = table[((cpu.status & CARRY) << 8) | value] if rotate else table[value]
+        cpu.status = (cpu.status & NOT_SHIFT_FLAGS) | (result >> 8)
+        if pending is not None:
+            pending.value = None
+        return result & 0xff
+    return _modifier(cpu, mode, operation)
+
+
+def _step_memory(cpu, name, mode, pending):
+    delta = 1 if name == 'INC' else -1
+
+    def operation(value):
+        result = (value + delta) & 0xff
+        if pending is None:
+            cpu.status = (cpu.status & NOT_NZ) | NZ_TABLE[result]
+        else:
+            pending.value = result
+        return result
+    return _modifier(cpu, mode, operation)
+
+
+def _step_register(cpu, name, mode, pending):
+    register = REGISTER_OF[name]
+    delta = 1 if name.startswith('IN') else -1
+    if pending is not None:
+        def handler(operand):
+            value = (getattr(cpu, register) + delta) & 0xff
+            setattr(cpu, register, value)
+            pending.value = value
+        return handler
+
+    def handler(operand):
+        value = (getattr(cpu, register) + delta) & 0xff
+        setattr(cpu, register, value)
+        cpu.status = (cpu.status & NOT_NZ) | NZ_TABLE[value]
+    return handler
+
+
+def _flag_change(cpu, name, mode, pending):
+    flag, value = FLAG_CHANGES[name]
+    mask = 0xff ^ flag
+
+    def handler(operand):
+        cpu.status = (cpu.status & mask) | value
+    return handler
+
+
+def _nop(cpu, name, mode, pending):
+    return lambda operand: None
+
+
+def _branch(cpu, name, mode, pending):
+    flag, value = BRANCHES[name]
+    clock = cpu.clock
+    if pending is not None and flag & NZ:
+        def handler(target):
+            result = pending.value
+            if (cpu.status if result is None else NZ_TABLE[result]) & flag == value:
+                pc = cpu.pc
+                clock.total_clock_cycles += 1 + ((target >> 8) != (pc >> 8))
+                cpu.pc = target
+                if target == pc - 2:
+                    _trap(cpu, target)
+        return handler
+
+    def handler(target):  # The operand of a branch is resolved to its target
+        if cpu.status & flag == value:
+            pc = cpu.pc
+            clock.total_clock_cycles += 1 + ((target >> 8) != (pc >> 8))
+            cpu.pc = target
+            if target == pc - 2:  # Branch to itself
+                _trap(cpu, target)
+    return handler
+
+
+def _jmp(cpu, name, mode, pending):
+    read_pages = cpu.memory.read_pages
+
+    def handler(operand):
+        if mode == 'Absolute':
+            target = operand
+        else:  # The second byte of 0xffff is read from 0x0000, like CPU.read_word_int does
+            high = (operand + 1) & 0xffff
+            target = read_pages[operand >> 8][operand & 0xff] | (read_pages[high >> 8][high & 0xff] << 8)
+        trapped = target == cpu.pc - 3  # Jump to itself
+        cpu.pc = target
+        if trapped:
+            _trap(cpu, target)
+    return handler
+
+
+def _jsr(cpu, name, mode, pending):
+    def handler(operand):
+        return_point = cpu.pc - 1
+        _push(cpu, return_point >> 8)
+        _push(cpu, return_point)
+        cpu.pc = operand
+    return handler
+
+
+def _rts(cpu, name, mode, pending):
+    def handler(operand):
+        low = _pull(cpu)
+        cpu.pc = (low | (_pull(cpu) << 8)) + 1
+    return handler
+
+
+def _rti(cpu, name, mode, pending):
+    def handler(operand):
+        if pending is not None:
+            pending.value = None
+        cpu.status = _pull(cpu) | BREAK | RESERVED
+        low = _pull(cpu)
+        cpu.pc = low | (_pull(cpu) << 8)
+    return handler
+
+
+def _brk(cpu, name, mode, pending):
+    read_pages = cpu.memory.read_pages
+
+    def handler(operand):
+        if pending is not None:
+            pending.materialise(cpu)
+        return_point = (cpu.pc + 1) & 0xffff  # BRK is followed by a padding byte
+        _push(cpu, return_point >> 8)
+        _push(cpu, return_point)
+        cpu.status |= BREAK
+        _push(cpu, cpu.status)
+        cpu.pc = read_pages[0xff][0xfe] | (read_pages[0xff][0xff] << 8)
+        cpu.status |= INTERRUPT
+    return handler
+
+
+def _stack(cpu, name, mode, pending):
+    def handler(operand):
+        if name == 'PHA':
+            _push(cpu, cpu.acc)
+        elif name == 'PHP':
+            if pending is not None:
+                pending.materialise(cpu)
+            _push(cpu, cpu.status)
+        elif name == 'PLA':
+            cpu.acc = _pull(cpu)
+            if pending is None:
+                cpu.status = (cpu.status & NOT_NZ) | NZ_TABLE[cpu.acc]
+            else:
+                pending.value = cpu.acc
+        else:
+            if pending is not None:
+                pending.value = None
+            cpu.status = _pull(cpu) | BREAK | RESERVED
+    return handler
+
+
+BUILDERS = {}
+for _builder, _names in ((_load, 'LDA LDX LDY'), (_store, 'STA STX STY'), (_transfer, 'TAX TAY TXA TYA TSX TXS'),
+                         (_logical, 'AND ORA EOR'), (_bit, 'BIT'), (_arithmetic, 'ADC SBC'), (_compare, 'CMP CPX CPY'),
+                         (_shift, 'ASL LSR ROL ROR'), (_step_memory, 'INC DEC'), (_step_register, 'INX INY DEX DEY'),
+                         (_flag_change, ' '.join(FLAG_CHANGES)), (_nop, 'NOP'), (_stack, 'PHA PHP PLA PLP'),
+                         (_branch, ' '.join(BRANCHES)), (_jmp, 'JMP'), (_jsr, 'JSR'), (_rts, 'RTS'), (_rti, 'RTI'),
+                         (_brk, 'BRK')):
+    for _name in _names.split():
+        BUILDERS[_name] = _builder
+
+
+def build_handlers(cpu: CPU, pending: PendingResult = None) -> list:
+    """
+    Function to build the handlers of every opcode of the instruction set for a cpu (and its current memory)
+    :param cpu: CPU: Cpu executing the handlers
+    :param pending: PendingResult: Result of the lazy flags, None to set the flags in every instruction
+    :return: list: 256 handler(operand) callables, None for the opcodes outside of the instruction set
+    """
+    handlers = [None] * 0x100
+    for opcode, entry in OPCODES.items():
+        handler = BUILDERS[entry.name](cpu, entry.name, entry.mode, pending)
+        if SETS_RESERVED[opcode]:
+            handler = _setting_reserved(cpu, handler)
+        handlers[opcode] = handler
+    return handlers
+
+
+def _setting_reserved(cpu: CPU, handler: Callable) -> Callable:
+    # The default finalise of the instructions sets the reserved bit
+    def reserved_handler(operand: int) -> None:
+        handler(operand)
+        cpu.status |= RESERVED
+    return reserved_handler
+
+
+class Fusion(NamedTuple):
+    name: str  # Key of PredecodeCache.fusions
+    opcodes: tuple  # Opcodes of the sequence, a branch can only be the last one
+    builder: Callable  # builder(cpu, operands, end, fired, name, pending) -> handler(operand) of the whole sequence
+
+
+# Builders of the handlers of the sequences: the operands are the resolved operands of the instructions, end is the
+# address following the sequence and fired[name] counts the executions. Like the other handlers, they are called after
+# the pc was moved to end and the base cycles of all instructions were counted. Every sequence contains an instruction
+# setting the reserved bit before its branch.
+
+def _taken(target: int, end: int) -> tuple:
+    # Extra clock cycles of a taken branch ending a sequence, and whether it branches to itself
+    return 1 + ((target >> 8) != (end >> 8)), target == end - 2
+
+
+def _fused_decrement_branch(cpu, operands, end, fired, name, pending):
+    # DEX ; BNE
+    clock = cpu.clock
+    target = operands[1]
+    taken, traps = _taken(target, end)
+    if pending is not None:
+        def handler(operand):
+            fired[name] += 1
+            idx = (cpu.idx - 1) & 0xff
+            cpu.idx = idx
+            cpu.status |= RESERVED
+            pending.value = idx
+            if idx:
+                clock.total_clock_cycles += taken
+                cpu.pc = target
+                if traps:
+                    _trap(cpu, target)
+        return handler
+
+    def handler(operand):
+        fired[name] += 1
+        idx = (cpu.idx - 1) & 0xff
+        cpu.idx = idx
+        cpu.status = (cpu.status & NOT_NZ) | NZ_TABLE[idx] | RESERVED
+        if idx:
+            clock.total_clock_cycles += taken
+            cpu.pc = target
+            if traps:
+                _trap(cpu, target)
+    return handler
+
+
+def _fused_compare_branch(cpu, operands, end, fired, name, pending):
+    # CMP #imm ; BEQ
+    clock = cpu.clock
+    value, target = operands
+    taken, traps = _taken(target, end)
+
+    def handler(operand):
+        fired[name] += 1
+        status = (cpu.status & NOT_COMPARE_FLAGS) | (COMPARE_TABLE[(cpu.acc << 8) | value] >> 8) | RESERVED
+        cpu.status = status
+        if pending is not None:
+            pending.value = None
+        if status & ZERO:
+            clock.total_clock_cycles += taken
+            cpu.pc = target
+            if traps:
+                _trap(cpu, target)
+    return handler
+
+
+def _fused_copy(cpu, operands, end, fired, name, pending):
+    # LDA abs,X ; STA abs,Y
+    clock = cpu.clock
+    read_pages, write_pages = cpu.memory.read_pages, cpu.memory.write_pages
+    source, destination = operands
+
+    def handler(operand):
+        fired[name] += 1
+        read = source + cpu.idx
+        write = destination + cpu.idy
+        value = read_pages[(read >> 8) & 0xff][read & 0xff]  # The addresses wrap around past 0xffff
+        cpu.acc = value
+        if pending is None:
+            cpu.status = (cpu.status & NOT_NZ) | NZ_TABLE[value] | RESERVED
+        else:
+            cpu.status |= RESERVED
+            pending.value = value
+        clock.total_clock_cycles += ((read >> 8) != (source >> 8)) + ((write >> 8) != (destination >> 8))
+        write_pages[(write >> 8) & 0xff][write & 0xff] = value
+    return handler
+
+
+def _fused_count_branch(cpu, operands, end, fired, name, pending):
+    # INY ; CPY #imm ; BNE
+    clock = cpu.clock
+    value, target = operands[1:]
+    taken, traps = _taken(target, end)
+
+    def handler(operand):
+        fired[name] += 1
+        idy = (cpu.idy + 1) & 0xff
+        cpu.idy = idy
+        # CPY replaces the negative and zero flags of INY
+        status = (cpu.status & NOT_COMPARE_FLAGS) | (COMPARE_TABLE[(idy << 8) | value] >> 8) | RESERVED
+        cpu.status = status
+        if pending is not None:
+            pending.value = None
+        if not status & ZERO:
+            clock.total_clock_cycles += taken
+            cpu.pc = target
+            if traps:
+                _trap(cpu, target)
+    return handler
+
+
+def _opcode(name: str, mode: str) -> int:
+    return next(opcode for opcode, entry in OPCODES.items() if (entry.name, entry.mode) == (name, mode))
+
+
+# First opcode -> sequence starting with it
+FUSIONS = {fusion.opcodes[0]: fusion for fusion in (
+    Fusion('DEX; BNE', (_opcode('DEX', 'Implied'), _opcode('BNE', 'Relative')), _fused_decrement_branch),
+    Fusion('CMP #imm; BEQ', (_opcode('CMP', 'Immediate'), _opcode('BEQ', 'Relative')), _fused_compare_branch),
+    Fusion('LDA abs,X; STA abs,Y', (_opcode('LDA', 'Absolute,X'), _opcode('STA', 'Absolute,Y')), _fused_copy),
+    Fusion('INY; CPY #imm; BNE', (_opcode('INY', 'Implied'), _opcode('CPY', 'Immediate'), _opcode('BNE', 'Relative')),
+           _fused_count_branch),
+)}
+# Size in bytes of the longest decoded entry
+MAX_LENGTH = max(sum(OPCODES[opcode].size for opcode in fusion.opcodes) for fusion in FUSIONS.values())
+
+
+class PredecodeCache:
+
+    def __init__(self, cpu: CPU, fuse: bool = True, lazy_flags: bool = False):
+        """
+        :param cpu: CPU: Cpu whose instructions are cached
+        :param fuse: bool: Decode the sequences of FUSIONS into single entries
+        :param lazy_flags: bool: Compute the negative and zero flags only when they are needed
+        """
+        self.cpu = cpu
+        self.fuse = fuse
+        # Result whose negative and zero flags are not in cpu.status yet, None without lazy flags
+        self.pending = PendingResult() if lazy_flags else None
+        # Address -> handler of the decoded instruction, None if not decoded. The extra page stays empty, it is what the
+        # negative pcs of branches below 0x0000 index, so they are interpreted.
+        self.handlers = [None] * (Memory.MAX_SIZE + Memory.PAGE_SIZE)
+        self.operands = [0] * Memory.MAX_SIZE  # Address -> resolved operand
+        self.cycles = bytearray(Memory.MAX_SIZE)  # Address -> base clock cycles
+        self.lengths = bytearray(Memory.MAX_SIZE)  # Address -> size in bytes
+        self.counts = bytearray(Memory.MAX_SIZE)  # Address -> number of instructions, more than 1 for the sequences
+        self.hits = 0  # Executions of decoded entries
+        self.misses = 0  # Entries decoded
+        self.invalidations = 0  # Decoded entries dropped because their bytes were written to
+        self.fusions = {fusion.name: 0 for fusion in FUSIONS.values()}  # Name -> executions of the sequence
+        self._memory = cpu.memory  # Memory the handlers were built for
+        self._opcode_handlers = build_handlers(cpu, self.pending)
+        self._memory.code_listeners.append(self.invalidate)
+
+    def decode(self, pc: int):
+        """
+        Method to decode the instruction at pc into the cache, with the instructions following it if they form one of
+        the sequences of FUSIONS
+        :param pc: int: Address of the instruction
+        :return: Callable: Handler of the entry, None if it can not be cached (opcodes outside of the instruction set,
+        code in device pages)
+        """
+        decoded = self._instruction(pc)
+        if decoded is None:
+            return None
+        opcode, size, operand = decoded
+        fusion = FUSIONS.get(opcode) if self.fuse else None
+        fused = None if fusion is None else self._fused(pc, fusion)
+        if fused is None:
+            handler, cycles, count = self._opcode_handlers[opcode], BASE_CYCLES[opcode], 1
+        else:
+            handler, size = fused
+            cycles, count = sum(BASE_CYCLES[opcode] for opcode in fusion.opcodes), len(fusion.opcodes)
+        self.operands[pc] = operand
+        self.cycles[pc] = cycles
+        self.lengths[pc] = size
+        self.counts[pc] = count
+        self.handlers[pc] = handler
+        self.misses += 1
+        self.cpu.memory.mark_code(pc, size)
+        return handler
+
+    def _instruction(self, pc: int):
+        # (opcode, size, resolved operand) of the instruction at pc, None if it can not be cached
+        memory = self.cpu.memory
+        read_pages = memory.read_pages
+        if not 0 <= pc < Memory.MAX_SIZE or isinstance(read_pages[pc >> 8], DevicePage):
+            return None
+        opcode = read_pages[pc >> 8][pc & 0xff]
+        entry = OPCODES.get(opcode)
+        if entry is None or pc + entry.size > Memory.MAX_SIZE or \
+                isinstance(read_pages[(pc + entry.size - 1) >> 8], DevicePage):
+            return None
+        operand = memory[pc + 1] if entry.size == 2 else memory[pc + 1] | (memory[pc + 2] << 8) if entry.size == 3 \
+            else 0
+        if entry.mode == 'Relative':
+            operand = pc + 2 + (operand ^ 0x80) - 0x80  # Not wrapped, like the branch instructions do
+        return opcode, entry.size, operand
+
+    def _fused(self, pc: int, fusion: Fusion):
+        # (handler, size) of the sequence starting at pc, None if the code does not match it
+        operands = []
+        address = pc
+        for opcode in fusion.opcodes:
+            decoded = self._instruction(address) if address < 0xffff else None  # The run stops at 0xffff
+            if decoded is None or decoded[0] != opcode:
+                return None
+            operands.append(decoded[2])
+            address += decoded[1]
+        handler = fusion.builder(self.cpu, tuple(operands), address, self.fusions, fusion.name, self.pending)
+        return handler, address - pc
+
+    def invalidate(self, address: int, size: int = 1) -> None:
+        """
+        Method to drop the decoded entries overlapping the given range. The memory calls it for the writes to the
+        marked pages (see Memory.mark_code).
+        :param address: int: First address of the range
+        :param size: int: Number of bytes
+        :return: None
+        """
+        handlers = self.handlers
+        lengths = self.lengths
+        for decoded in range(max(0, address - MAX_LENGTH + 1), address):
+            if handlers[decoded] is not None and decoded + lengths[decoded] > address:
+                handlers[decoded] = None
+                self.invalidations += 1
+        # Every entry starting in the range overlaps it (the slices keep the large ranges of restore cheap)
+        end = min(address + size, Memory.MAX_SIZE)
+        if address < end:
+            self.invalidations += end - address - handlers[address:end].count(None)
+            handlers[address:end] = [None] * (end - address)
+
+    def reset(self) -> None:
+        """
+        Method to drop all decoded instructions and rebuild the handlers, e.g. after replacing the memory of the cpu
+        :return: None
+        """
+        self.handlers[:] = [None] * len(self.handlers)
+        if self._memory is not self.cpu.memory:
+            self._memory.code_listeners.remove(self.invalidate)
+            self._memory = self.cpu.memory
+            self._memory.code_listeners.append(self.invalidate)
+            self._opcode_handlers = build_handlers(self.cpu, self.pending)
+
+    def run(self, max_cycles: int = None, max_instructions: int = None, until_pc=(), trap: bool = True) -> RunResult:
+        """
+        Method to execute instructions until one of the stop conditions of CPU.run is met
+        :param max_cycles: int: Cycle budget
+        :param max_instructions: int: Instruction budget
+        :param until_pc: Address(es) stopping the run before the instruction at them is executed
+        :param trap: bool: Stop after an instruction which jumps or branches to itself
+        :return: RunResult: Stop reason, program counter, executed instructions and clock cycles
+        """
+        cpu = self.cpu
+        clock = cpu.clock
+        if cpu.memory is not self._memory:
+            self.reset()
+        handlers, operands, cycles, lengths, counts, pending = \
+            self.handlers, self.operands, self.cycles, self.lengths, self.counts, self.pending
+        until_pc = frozenset((until_pc,) if isinstance(until_pc, int) else until_pc)
+        start_cycles = clock.total_clock_cycles
+        cycle_limit = inf if max_cycles is None else start_cycles + max_cycles
+        instruction_limit = inf if max_instructions is None else max_instructions
+        instructions = hits = 0
+        cpu.trap_detection = trap
+        try:
+            while True:
+                pc = cpu.pc
+                if pc in until_pc or instructions >= instruction_limit or \
+                        clock.total_clock_cycles >= cycle_limit or pc >= 0xffff:
+                    reason = self._stop_reason(until_pc, instructions >= instruction_limit, cycle_limit)
+                    break
+                instructions += 1
+                handler = handlers[pc]
+                if handler is not None:
+                    hits += 1
+                else:
+                    handler = self.decode(pc)
+                if handler is not None and counts[pc] > 1 and \
+                        self._splits(pc, instruction_limit - instructions, cycle_limit, until_pc):
+                    handler = None
+                if handler is None:
+                    self._interpret()
+                else:
+                    instructions += counts[pc] - 1
+                    cpu.pc = pc + lengths[pc]
+                    clock.total_clock_cycles += cycles[pc]
+                    handler(operands[pc])
+                if clock.total_clock_cycles >= clock.next_sync:
+                    clock.synchronise()
+        except Trap:
+            # The trapping instruction was executed completely
+            reason = CPU.STOP_TRAP
+        finally:
+            cpu.trap_detection = False
+            self.hits += hits
+            if pending is not None:
+                pending.materialise(cpu)
+        return RunResult(reason, cpu.pc, instructions, clock.total_clock_cycles - start_cycles)
+
+    def _interpret(self) -> None:
+        # Executes the instruction at pc with the interpreter, which needs the flags in cpu.status
+        if self.pending is not None:
+            self.pending.materialise(self.cpu)
+        self.cpu.instructions.execute(self.cpu.fetch_byte_int())
+
+    def _splits(self, pc: int, instructions_left: int, cycle_limit, until_pc: frozenset) -> bool:
+        # Whether the run could stop between the instructions of the sequence at pc. The clock cycles of its leading
+        # instructions never exceed the base cycles of the whole sequence.
+        return self.counts[pc] - 1 > instructions_left or \
+            self.cpu.clock.total_clock_cycles + self.cycles[pc] >= cycle_limit or \
+            not until_pc.isdisjoint(range(pc + 1, pc + self.lengths[pc]))
+
+    def _stop_reason(self, until_pc: frozenset, out_of_instructions: bool, cycle_limit) -> str:
+        # Same order as in CPU.run
+        if self.cpu.pc in until_pc:
+            return CPU.STOP_BREAKPOINT
+        if out_of_instructions:
+            return CPU.STOP_INSTRUCTIONS
+        if self.cpu.clock.total_clock_cycles >= cycle_limit:
+            return CPU.STOP_CYCLES
+        return CPU.STOP_END_OF_MEMORY
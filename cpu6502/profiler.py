@@ -0,0 +1,171 @@
+"""
+Profiler counting executions and clock cycles per opcode and per pc address.
+
+The profiler is a DispatchHook (cpu6502.hooks), so a cpu without a profiler attached runs exactly the same code as
+before. Records are buffered as packed ints and added to NumPy counters (256 entries per opcode, 65536 per pc) in
+batches, e.g.:
+
+    with Profiler(cpu) as profiler:
+        cpu.run(max_instructions=100000)
+    print(profiler.report(cpu.memory))
+"""
+import numpy as np
+
+from cpu6502.disassembler import OPCODES, branch_target, disassemble, disassemble_range
+from cpu6502.hooks import DispatchHook
+
+
+class Profiler(DispatchHook):
+    FLUSH_SIZE = 1 << 16  # Buffered records
+    JMP_ABSOLUTE = 0x4c
+
+    def __init__(self, cpu=None):
+        """
+        :param cpu: CPU: Cpu to be profiled straight away, see attach
+        """
+        self.opcode_counts = np.zeros(0x100, dtype=np.uint64)
+        self.opcode_cycles = np.zeros(0x100, dtype=np.uint64)
+        self.pc_counts = np.zeros(0x10000, dtype=np.uint64)
+        self.pc_cycles = np.zeros(0x10000, dtype=np.uint64)
+        self._buffer = []  # (cycles << 24) | (pc << 8) | opcode of the instructions not counted yet
+        super().__init__(cpu)
+
+    def wrap(self, handler, opcode: int):
+        cpu = self.cpu
+        clock = cpu.clock
+        buffer = self._buffer
+        append = buffer.append
+        flush = self.flush
+
+        def profiled():
+            start = clock.total_clock_cycles
+            pc = (cpu.pc - 1) & 0xffff  # The opcode was already fetched, which took one cycle
+            try:
+                handler()
+            finally:  # Traps are raised by completely executed instructions
+                append(((clock.total_clock_cycles - start + 1) << 24) | (pc << 8) | opcode)
+                if len(buffer) >= Profiler.FLUSH_SIZE:
+                    flush()
+        return profiled
+
+    def flush(self) -> None:
+        """
+        Method to add the buffered records to the counters
+        :return: None
+        """
+        if not self._buffer:
+            return
+        records = np.array(self._buffer, dtype=np.int64)
+        self._buffer.clear()
+        opcodes = records & 0xff
+        pcs = (records >> 8) & 0xffff
+        cycles = records >> 24
+        self.opcode_counts += np.bincount(opcodes, minlength=0x100).astype(np.uint64)
+        self.opcode_cycles += np.bincount(opcodes, weights=cycles, minlength=0x100).astype(np.uint64)
+        self.pc_counts += np.bincount(pcs, minlength=0x10000).astype(np.uint64)
+        self.pc_cycles += np.bincount(pcs, weights=cycles, minlength=0x10000).astype(np.uint64)
+
+    def clear(self) -> None:
+        """
+        Method to reset all counters
+        :return: None
+        """
+        self._buffer.clear()
+        for counter in (self.opcode_counts, self.opcode_cycles, self.pc_counts, self.pc_cycles):
+            counter.fill(0)
+
+    @property
+    def instructions(self) -> int:
+        self.flush()
+        return int(self.opcode_counts.sum())
+
+    @property
+    def cycles(self) -> int:
+        self.flush()
+        return int(self.opcode_cycles.sum())
+
+    def hot_opcodes(self, top: int = 10) -> list:
+        """
+        Method to get the opcodes which took the most cycles
+        :param top: int: Number of opcodes
+        :return: list: (opcode, executions, cycles), the most expensive first
+        """
+        self.flush()
+        order = np.argsort(self.opcode_cycles, kind='stable')[::-1][:top]
+        return [(int(opcode), int(self.opcode_counts[opcode]), int(self.opcode_cycles[opcode]))
+                for opcode in order if self.opcode_counts[opcode]]
+
+    def hot_pcs(self, top: int = 10) -> list:
+        """
+        Method to get the addresses of the instructions which took the most cycles
+        :param top: int: Number of addresses
+        :return: list: (pc, executions, cycles), the most expensive first
+        """
+        self.flush()
+        order = np.argsort(self.pc_cycles, kind='stable')[::-1][:top]
+        return [(int(pc), int(self.pc_counts[pc]), int(self.pc_cycles[pc])) for pc in order if self.pc_counts[pc]]
+
+    def loops(self, memory, top: int = 10) -> list:
+        """
+        Method to find the hottest loops, i.e. backward branches and absolute jumps with the instructions between
+        their target and themselves. Nested loops are reported separately.
+        :param memory: Memory: Memory containing the profiled program
+        :param top: int: Number of loops
+        :return: list: (start, end, executions of the loop back instruction, executions in the body, cycles in the
+        body), the most expensive first. end is the address after the loop back instruction.
+        """
+        self.flush()
+        loops = []
+        for pc in np.flatnonzero(self.pc_counts):
+            pc = int(pc)
+            opcode = memory[pc]
+            entry = OPCODES.get(opcode)
+            if entry is None:
+                continue
+            if entry.mode == 'Relative':
+                target = branch_target(pc, memory[(pc + 1) & 0xffff])
+            elif opcode == Profiler.JMP_ABSOLUTE:
+                target = memory[(pc + 1) & 0xffff] | (memory[(pc + 2) & 0xffff] << 8)
+            else:
+                continue
+            if target >= pc or self.pc_counts[pc] < 2:  # Traps (Bxx *) and code running once are not loops
+                continue
+            end = pc + entry.size
+            loops.append((target, end, int(self.pc_counts[pc]), int(self.pc_counts[target:end].sum()),
+                          int(self.pc_cycles[target:end].sum())))
+        return sorted(loops, key=lambda loop: -loop[4])[:top]
+
+    def report(self, memory, top: int = 10, listing=None, body_lines: int = 12) -> str:
+        """
+        Method to describe the profile: totals, the hottest opcodes, pc addresses and loops annotated with their
+        disassembly
+        :param memory: Memory: Memory containing the profiled program
+        :param top: int: Number of entries of every section
+        :param listing: Listing: Assembler listing used to label addresses (cpu6502.listing)
+        :param body_lines: int: Maximum number of disassembled instructions of a loop
+        :return: str: Report
+        """
+        def label(address: int) -> str:
+            return f'{address:04x}' if listing is None else f'{address:04x} {listing.label(address)}'
+
+        cycles = max(self.cycles, 1)
+        lines = [f'{self.instructions} instructions, {self.cycles} cycles', '', 'Hot opcodes:']
+        for opcode, count, opcode_cycles in self.hot_opcodes(top):
+            entry = OPCODES.get(opcode)
+            name = f'{entry.name} {entry.mode}' if entry else '???'
+            lines.append(f'  {opcode:02x} {name:<18} {count:>12} x {opcode_cycles:>12} cycles '
+                         f'{opcode_cycles / cycles:6.1%}')
+        lines += ['', 'Hot addresses:']
+        for pc, count, pc_cycles in self.hot_pcs(top):
+            lines.append(f'  {label(pc):<24} {disassemble(memory, pc)[0]:<16} {count:>12} x {pc_cycles:>12} cycles '
+                         f'{pc_cycles / cycles:6.1%}')
+        lines += ['', 'Hot loops:']
+        for start, end, iterations, count, loop_cycles in self.loops(memory, top):
+            lines.append(f'  {label(start)} - {label(end - 1)}: {iterations} iterations, {count} instructions, '
+                         f'{loop_cycles} cycles {loop_cycles / cycles:6.1%}')
+            body = disassemble_range(memory, start, end)
+            for address, text in body[:body_lines]:
+                lines.append(f'      {address:04x} {text:<16} {int(self.pc_counts[address]):>12}')
+            if len(body) > body_lines:
+                lines.append(f'      ... {len(body) - body_lines} more instructions')
+        return '\n'.join(lines)
@@ -0,0 +1,144 @@
+"""
+Headless batch runner: loads a program, runs it until a stop condition and prints a one line report.
+
+Usage: python -m cpu6502 program.bin [--load-address 0x0a] [--entry-pc 0x400] [--max-cycles N] [--max-instructions N]
+                                     [--break 0x3469] [--no-trap] [--success-pc 0x3469] [--console 0xf000]
+                                     [--profile [TOP]] [--trace trace.npy|trace.log] [--trace-size N] [--predecode]
+"""
+import argparse
+import sys
+import time
+from typing import NamedTuple
+
+from cpu6502.cpu import CPU
+from cpu6502.devices import console_bus
+from cpu6502.memory import Memory
+from cpu6502.predecode import PredecodeCache
+from cpu6502.profiler import Profiler
+from cpu6502.tracer import Tracer
+
+RESET_VECTOR = 0xfffc
+
+
+class RunReport(NamedTuple):
+    reason: str  # One of the CPU.STOP_* reasons
+    pc: int
+    instructions: int
+    cycles: int
+    elapsed: float
+
+    @property
+    def mips(self) -> float:
+        return self.instructions / self.elapsed / 1e6 if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f'Stopped ({self.reason}) at {hex(self.pc)} after {self.instructions} instructions, ' \
+               f'{self.cycles} cycles in {self.elapsed:.3f} s ({self.mips:.3f} MIPS)'
+
+
+def load(filepath: str, load_address: int = 0, entry_pc: int = None, speed_mhz: float = 0, io=None,
+         **kwargs) -> CPU:
+    """
+    Function to create a cpu with a program loaded into its memory
+    :param filepath: str: Path to the program (raw binary or Intel HEX, see Memory.load_file)
+    :param load_address: int: Address of the first byte of a raw binary
+    :param entry_pc: int: First instruction to be executed, read from the reset vector by default
+    :param speed_mhz: float: Target speed, 0 to run as fast as possible
+    :param io: I/O passed to CPU.reset, e.g. cpu6502.devices.console_bus
+    :return: CPU: Cpu ready to run the program
+    """
+    cpu = CPU(speed_mhz=speed_mhz)
+    cpu.reset(io=io, memory=Memory(), **kwargs)
+    if not cpu.memory.load_file(filepath, load_address):
+        raise ValueError(f'Cannot load {filepath}')
+    cpu.pc = cpu.memory[RESET_VECTOR] | (cpu.memory[RESET_VECTOR + 1] << 8) if entry_pc is None else entry_pc
+    cpu.clock.total_clock_cycles = 0
+    return cpu
+
+
+def run(cpu: CPU, max_cycles: int = None, max_instructions: int = None, breakpoints=(),
+        trap: bool = True, cache: PredecodeCache = None) -> RunReport:
+    """
+    Function to run the cpu until one of the stop conditions is met, see CPU.run
+    :param cpu: CPU: Cpu to be run
+    :param max_cycles: int: Cycle budget
+    :param max_instructions: int: Instruction budget
+    :param breakpoints: Addresses stopping the run before the instruction at them is executed
+    :param trap: bool: Stop when an instruction jumps or branches to itself
+    :param cache: PredecodeCache: Run the instructions through this cache of the cpu instead of the interpreter
+    :return: RunReport: Stop reason, counters and elapsed time
+    """
+    start = time.perf_counter()
+    result = (cpu.run if cache is None else cache.run)(max_cycles, max_instructions, breakpoints, trap=trap)
+    return RunReport(*result, time.perf_counter() - start)
+
+
+def address(value: str) -> int:
+    result = int(value, 0)
+    if not 0 <= result <= 0xffff:
+        raise argparse.ArgumentTypeError(f'{value} is out of memory bounds (0xffff)')
+    return result
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m cpu6502', description='Run a 6502 program headless')
+    parser.add_argument('program', help='raw binary or Intel HEX (.hex, .ihex, .ihx) file')
+    parser.add_argument('--load-address', type=address, default=0,
+                        help='address of the first byte of a raw binary (default: 0x0000)')
+    parser.add_argument('--entry-pc', type=address, help='first instruction (default: the reset vector)')
+    parser.add_argument('--max-cycles', type=int, help='stop after this many clock cycles')
+    parser.add_argument('--max-instructions', type=int, help='stop after this many instructions')
+    parser.add_argument('--break', dest='breakpoints', type=address, action='append', default=[],
+                        metavar='PC', help='stop before executing the instruction at PC (can be repeated)')
+    parser.add_argument('--no-trap', dest='trap', action='store_false',
+                        help='keep running when an instruction jumps or branches to itself')
+    parser.add_argument('--success-pc', type=address,
+                        help='exit with status 1 unless the run stops at this address')
+    parser.add_argument('--speed-mhz', type=float, default=0, help='target speed (default: unthrottled)')
+    parser.add_argument('--console', type=address, metavar='ADDRESS',
+                        help='attach a serial console (and a timer after it) printing to stdout')
+    parser.add_argument('--profile', type=int, nargs='?', const=10, metavar='TOP',
+                        help='print the TOP (default: 10) hottest opcodes, addresses and loops after the run')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='save the last executed instructions, as a nestest style log for .log / .txt files')
+    parser.add_argument('--trace-size', type=int, default=1 << 16, help='instructions kept by --trace')
+    parser.add_argument('--predecode', action='store_true',
+                        help='run through the predecoded instruction cache and print how often each fused sequence ran '
+                             '(not with --profile / --trace)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.predecode and (args.profile or args.trace):
+        print('--predecode bypasses the hooks of --profile and --trace', file=sys.stderr)
+        return 2
+    io_kwargs = {} if args.console is None else \
+        {'io': console_bus, 'address': args.console, 'timer_address': args.console + 4}
+    try:
+        cpu = load(args.program, args.load_address, args.entry_pc, args.speed_mhz, **io_kwargs)
+    except (OSError, ValueError) as error:
+        print(error, file=sys.stderr)
+        return 2
+    profiler = Profiler(cpu) if args.profile else None
+    tracer = Tracer(cpu, args.trace_size) if args.trace else None
+    cache = PredecodeCache(cpu) if args.predecode else None
+    report = run(cpu, args.max_cycles, args.max_instructions, args.breakpoints, args.trap, cache)
+    if cpu.io is not None:
+        cpu.io.refresh()
+    print(report)
+    if cache is not None:
+        print('Fused sequences: ' + ' | '.join(f'{name}: {count}' for name, count in cache.fusions.items()))
+    if tracer is not None:
+        tracer.detach()
+        tracer.save(args.trace, cpu.memory)
+    if profiler is not None:
+        profiler.detach()
+        print(profiler.report(cpu.memory, args.profile))
+    if args.success_pc is not None and report.pc != args.success_pc:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Snapshots of the state of a cpu (registers, status, clock cycles and RAM), see CPU.snapshot and CPU.restore.
+
+The RAM is kept as a tuple of immutable pages shared between consecutive snapshots of the same memory, so e.g. a
+rewind buffer of a snapshot per frame only stores the pages written in every frame. On disk a snapshot is a
+compressed .npz file storing every distinct page once.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from cpu6502.memory import Memory
+
+FORMAT_VERSION = 1
+
+
+class Snapshot(NamedTuple):
+    pc: int
+    sp: int
+    acc: int
+    idx: int
+    idy: int
+    status: int
+    cycles: int  # Total clock cycles
+    pages: tuple  # Memory.PAGES bytes objects, see Memory.snapshot_pages
+
+    @property
+    def image(self) -> np.ndarray:
+        """
+        Contents of the RAM
+        :return: np.ndarray: Memory.MAX_SIZE bytes (read-only)
+        """
+        return np.frombuffer(b''.join(self.pages), dtype=np.ubyte)
+
+    def save(self, filepath: str) -> None:
+        """
+        Method to save the snapshot as a compressed .npz file
+        :param filepath: str: Path to the file
+        :return: None
+        """
+        indices = {}
+        table = np.array([indices.setdefault(page, len(indices)) for page in self.pages], dtype=np.uint16)
+        unique = np.frombuffer(b''.join(indices), dtype=np.ubyte).reshape(-1, Memory.PAGE_SIZE)
+        registers = np.array([self.pc, self.sp, self.acc, self.idx, self.idy, self.status], dtype=np.uint16)
+        with open(filepath, 'wb') as file:
+            np.savez_compressed(file, version=FORMAT_VERSION, registers=registers,
+                                cycles=np.uint64(self.cycles), table=table, pages=unique)
+
+    @classmethod
+    def load(cls, filepath: str) -> 'Snapshot':
+        """
+        Method to load a snapshot saved with save
+        :param filepath: str: Path to the file
+        :return: Snapshot: Loaded snapshot
+        """
+        with np.load(filepath, allow_pickle=False) as archive:
+            if int(archive['version']) != FORMAT_VERSION:
+                raise ValueError(f'Unsupported snapshot version {int(archive["version"])} in {filepath}')
+            unique = [page.tobytes() for page in archive['pages']]
+            pages = tuple(unique[index] for index in archive['table'])
+            return cls(*(int(register) for register in archive['registers']), int(archive['cycles']), pages)
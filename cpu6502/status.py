@@ -0,0 +1,91 @@
+from collections.abc import Mapping, MutableMapping
+
+# Processor status bits, packed into a single byte in the same order as they are pushed on the stack
+CARRY = 0b00000001
+ZERO = 0b00000010
+INTERRUPT = 0b00000100
+DECIMAL = 0b00001000
+BREAK = 0b00010000
+RESERVED = 0b00100000
+OVERFLOW = 0b01000000
+NEGATIVE = 0b10000000
+
+NZ = NEGATIVE | ZERO
+NOT_NZ = 0xff ^ NZ
+
+FLAGS = {
+    'carry_flag': CARRY,
+    'zero_flag': ZERO,
+    'interrupt_flag': INTERRUPT,
+    'decimal_flag': DECIMAL,
+    'break_flag': BREAK,
+    'reserved': RESERVED,
+    'overflow_flag': OVERFLOW,
+    'negative_flag': NEGATIVE
+}
+
+# N and Z flags of every possible 8 bit result: status = (status & NOT_NZ) | NZ_TABLE[value]
+NZ_TABLE = [(value & NEGATIVE) | (ZERO if value == 0 else 0) for value in range(0x100)]
+
+
+def pack(flags: Mapping) -> int:
+    """
+    Function to pack a mapping of flag names to truth values into a status byte
+    :param flags: Mapping: Flag names (keys of FLAGS) mapped to their values
+    :return: int: Packed status byte
+    """
+    status = 0
+    for name, value in flags.items():
+        if value:
+            status |= FLAGS[name]
+    return status
+
+
+def flag_property(mask: int) -> property:
+    """
+    Function to create a bool property accessing a single bit of the packed status register of the CPU
+    :param mask: int: Bit mask of the flag
+    :return: property: Property reading and writing cpu.status
+    """
+
+    def getter(cpu) -> bool:
+        return bool(cpu.status & mask)
+
+    def setter(cpu, value) -> None:
+        if value:
+            cpu.status |= mask
+        else:
+            cpu.status &= 0xff ^ mask
+
+    return property(getter, setter)
+
+
+class StatusView(MutableMapping):
+    """
+    Dict-like view of the packed status register, e.g. cpu.ps['carry_flag']. Every read and write goes straight to
+    cpu.status, so the view never gets out of sync with the register.
+    """
+
+    def __init__(self, cpu):
+        self.cpu = cpu
+
+    def __getitem__(self, key: str) -> bool:
+        return bool(self.cpu.status & FLAGS[key])
+
+    def __setitem__(self, key: str, value) -> None:
+        if value:
+            self.cpu.status |= FLAGS[key]
+        else:
+            self.cpu.status &= 0xff ^ FLAGS[key]
+
+    def __delitem__(self, key: str):
+        raise TypeError('Processor status flags cannot be removed')
+
+    def __iter__(self):
+        return iter(FLAGS)
+
+    def __len__(self) -> int:
+        return len(FLAGS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
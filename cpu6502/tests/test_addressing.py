@@ -110,6 +110,17 @@ class TestAddressing:
         assert expected_address == addressing.absolute_y()
         assert setup_cpu.clock.total_clock_cycles == 3
 
+    @pytest.mark.parametrize('method, register', [('absolute_x', 'idx'), ('absolute_y', 'idy')])
+    @pytest.mark.parametrize('index', [0x01, 0x02, 0xff])
+    def test_absolute_indexed_wrap(self, setup_cpu, method, register, index):
+        setup_cpu.pc = 0x0200
+        setattr(setup_cpu, register, index)
+        setup_cpu.memory[0x0200] = 0xff
+        setup_cpu.memory[0x0201] = 0xff
+        addressing = cpu6502.instructions.AbstractInstruction(setup_cpu)
+        assert getattr(addressing, method)() == index - 1
+        assert setup_cpu.clock.total_clock_cycles == 3
+
     @pytest.mark.parametrize('address', [0x2a1, 0xff01, 0xfffe, 0xa01, 0x0101])
     @pytest.mark.parametrize('zp_address', [0x0, 0xfe, 0xaa, 0xaf, 0xab, 0xdc])
     @pytest.mark.parametrize('address_fst, address_snd', [(0x0, 0x01), (0x20, 0xaa), (0xfe, 0xaf), (0xab, 0xdc)])
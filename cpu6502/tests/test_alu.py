@@ -0,0 +1,175 @@
+import pytest
+
+from cpu6502.alu import ADC_TABLE, ASL_TABLE, COMPARE_TABLE, LSR_TABLE, ROL_TABLE, ROR_TABLE, SBC_TABLE, adc_index
+from cpu6502.status import CARRY, DECIMAL, NEGATIVE, OVERFLOW, ZERO
+
+
+def expected_flags(result: int, carry: bool, overflow: bool = False) -> int:
+    return (result & NEGATIVE) | (ZERO if result == 0 else 0) | (CARRY if carry else 0) | (OVERFLOW if overflow else 0)
+
+
+def signed(value: int) -> int:
+    return value - 0x100 if value & 0x80 else value
+
+
+def decimal_adc(acc: int, value: int, carry: int) -> tuple:
+    """
+    Reference NMOS decimal ADC, written out step by step after http://www.6502.org/tutorials/decimal_mode.html
+    :return: tuple: result, carry, negative, overflow, zero
+    """
+    al = (acc & 0x0f) + (value & 0x0f) + carry
+    if al >= 0x0a:
+        al = ((al + 0x06) & 0x0f) + 0x10
+    a = (acc & 0xf0) + (value & 0xf0) + al
+    intermediate = signed(acc & 0xf0) + signed(value & 0xf0) + al
+    if a >= 0xa0:
+        a += 0x60
+    return a & 0xff, a >= 0x100, (intermediate & 0x80) != 0, not -128 <= intermediate <= 127, \
+        (acc + value + carry) & 0xff == 0
+
+
+def decimal_sbc(acc: int, value: int, carry: int) -> tuple:
+    """
+    Reference NMOS decimal SBC, flags are computed as in binary mode
+    :return: tuple: result, carry, negative, overflow, zero
+    """
+    al = (acc & 0x0f) - (value & 0x0f) + carry - 1
+    if al < 0:
+        al = ((al - 0x06) & 0x0f) - 0x10
+    a = (acc & 0xf0) - (value & 0xf0) + al
+    if a < 0:
+        a -= 0x60
+    binary = acc - value - 1 + carry
+    difference = signed(acc) - signed(value) - 1 + carry
+    return a & 0xff, binary >= 0, (binary & 0x80) != 0, not -128 <= difference <= 127, binary & 0xff == 0
+
+
+class TestALU:
+
+    @pytest.mark.parametrize('carry', [0, 1])
+    def test_adc_table(self, carry):
+        for acc in range(0x100):
+            for value in range(0x100):
+                total = acc + value + carry
+                result = total & 0xff
+                signed = (acc ^ 0x80) - 0x80 + (value ^ 0x80) - 0x80 + carry
+                entry = ADC_TABLE[adc_index(acc, value, carry)]
+                assert entry & 0xff == result
+                assert entry >> 8 == expected_flags(result, total > 0xff, not -128 <= signed <= 127)
+
+    @pytest.mark.parametrize('carry', [0, 1])
+    def test_sbc_table(self, carry):
+        for acc in range(0x100):
+            for value in range(0x100):
+                total = acc - value - 1 + carry
+                result = total & 0xff
+                difference = signed(acc) - signed(value) - 1 + carry
+                entry = SBC_TABLE[adc_index(acc, value, carry)]
+                assert entry & 0xff == result
+                assert entry >> 8 == expected_flags(result, total >= 0, not -128 <= difference <= 127)
+
+    @pytest.mark.parametrize('table, reference', [(ADC_TABLE, decimal_adc), (SBC_TABLE, decimal_sbc)])
+    @pytest.mark.parametrize('carry', [0, 1])
+    def test_decimal_tables(self, table, reference, carry):
+        # Every operand, including the invalid BCD ones which the NMOS 6502 still gives well defined results for
+        for acc in range(0x100):
+            for value in range(0x100):
+                result, carry_out, negative, overflow, zero = reference(acc, value, carry)
+                entry = table[adc_index(acc, value, carry, 1)]
+                assert entry & 0xff == result
+                assert entry >> 8 == (CARRY if carry_out else 0) | (NEGATIVE if negative else 0) | \
+                    (OVERFLOW if overflow else 0) | (ZERO if zero else 0)
+
+    def test_compare_table(self):
+        for register in range(0x100):
+            for value in range(0x100):
+                result = (register - value) & 0xff
+                entry = COMPARE_TABLE[(register << 8) | value]
+                assert entry == result | (expected_flags(result, register >= value) << 8)
+
+    @pytest.mark.parametrize('carry', [0, 1])
+    @pytest.mark.parametrize('value', range(0x100))
+    def test_shift_tables(self, value, carry):
+        asl, lsr = (value << 1) & 0xff, value >> 1
+        rol, ror = ((value << 1) | carry) & 0xff, (value >> 1) | (carry << 7)
+        assert ASL_TABLE[value] == asl | (expected_flags(asl, value & 0x80) << 8)
+        assert LSR_TABLE[value] == lsr | (expected_flags(lsr, value & 0x01) << 8)
+        assert ROL_TABLE[(carry << 8) | value] == rol | (expected_flags(rol, value & 0x80) << 8)
+        assert ROR_TABLE[(carry << 8) | value] == ror | (expected_flags(ror, value & 0x01) << 8)
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestSBCFlags:
+
+    @pytest.mark.parametrize('acc, value, carry_flag, result, carry, overflow', [
+        (0x50, 0xf0, True, 0x60, False, False),
+        (0x50, 0xb0, True, 0xa0, False, True),
+        (0x50, 0x70, True, 0xe0, False, False),
+        (0x50, 0x30, True, 0x20, True, False),
+        (0xd0, 0xf0, True, 0xe0, False, False),
+        (0xd0, 0xb0, True, 0x20, True, False),
+        (0xd0, 0x70, True, 0x60, True, True),
+        (0xd0, 0x30, True, 0xa0, True, False),
+        (0x00, 0x00, False, 0xff, False, False),
+        (0x80, 0x00, False, 0x7f, True, True)])
+    def test_sbc_signed_overflow(self, setup_cpu, acc, value, carry_flag, result, carry, overflow):
+        setup_cpu.memory[0x0200] = 0xe9  # SBC instruction
+        setup_cpu.memory[0x0201] = value
+        setup_cpu.acc = acc
+        setup_cpu.ps['carry_flag'] = carry_flag
+        setup_cpu.execute(1)
+        assert setup_cpu.acc == result
+        assert setup_cpu.ps['carry_flag'] == carry
+        assert setup_cpu.ps['overflow_flag'] == overflow
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestDecimalMode:
+
+    @pytest.mark.parametrize('opcode, acc, value, carry_flag, result, carry', [
+        (0x69, 0x00, 0x00, False, 0x00, False),
+        (0x69, 0x79, 0x00, True, 0x80, False),
+        (0x69, 0x24, 0x56, False, 0x80, False),
+        (0x69, 0x93, 0x82, False, 0x75, True),
+        (0x69, 0x89, 0x76, False, 0x65, True),
+        (0x69, 0x99, 0x00, True, 0x00, True),
+        (0x69, 0x0f, 0x01, False, 0x16, False),
+        (0xe9, 0x00, 0x00, False, 0x99, False),
+        (0xe9, 0x00, 0x01, True, 0x99, False),
+        (0xe9, 0x0a, 0x00, True, 0x0a, True),
+        (0xe9, 0x0b, 0x00, False, 0x0a, True),
+        (0xe9, 0x9a, 0x00, False, 0x99, True),
+        (0xe9, 0x46, 0x12, True, 0x34, True),
+        (0xe9, 0x40, 0x13, True, 0x27, True),
+        (0xe9, 0x32, 0x02, False, 0x29, True),
+        (0xe9, 0x12, 0x21, True, 0x91, False)])
+    def test_decimal_immediate(self, setup_cpu, opcode, acc, value, carry_flag, result, carry):
+        setup_cpu.memory[0x0200] = opcode
+        setup_cpu.memory[0x0201] = value
+        setup_cpu.acc = acc
+        setup_cpu.ps['carry_flag'] = carry_flag
+        setup_cpu.ps['decimal_flag'] = True
+        setup_cpu.execute(1)
+        assert setup_cpu.acc == result
+        assert setup_cpu.ps['carry_flag'] == carry
+        assert setup_cpu.ps['decimal_flag']
+        assert setup_cpu.clock.total_clock_cycles == 2
+
+    @pytest.mark.parametrize('opcode, reference', [(0x69, decimal_adc), (0xe9, decimal_sbc)])
+    def test_decimal_valid_bcd(self, setup_cpu, opcode, reference):
+        # Run every valid BCD operand pair through the CPU, which has to agree with the reference model
+        bcd = [(tens << 4) | units for tens in range(10) for units in range(10)]
+        setup_cpu.memory[0x0200] = opcode
+        for carry in (0, 1):
+            for acc in bcd:
+                for value in bcd:
+                    setup_cpu.pc = 0x0200
+                    setup_cpu.memory[0x0201] = value
+                    setup_cpu.acc = acc
+                    setup_cpu.status = DECIMAL | carry
+                    setup_cpu.execute(1)
+                    result, carry_out, negative, overflow, zero = reference(acc, value, carry)
+                    assert setup_cpu.acc == result
+                    assert setup_cpu.status & CARRY == carry_out
+                    assert setup_cpu.status & (NEGATIVE | OVERFLOW | ZERO) == (NEGATIVE if negative else 0) | \
+                        (OVERFLOW if overflow else 0) | (ZERO if zero else 0)
@@ -17,7 +17,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         """
         x       y       r        Overflow
         1.... + 1.... = 0.... -> True
@@ -27,7 +27,7 @@ class TestADC:
         1.... + 0.... = 1.... -> False
         1.... + 0.... = 0.... -> False
 
-        (x == y) != r
+        (x == y) and (x != r)
         """
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
@@ -50,7 +50,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -73,7 +73,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -96,7 +96,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -120,7 +120,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -144,7 +144,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -168,7 +168,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -192,7 +192,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -217,7 +217,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -242,7 +242,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -267,7 +267,7 @@ class TestADC:
         expected_carry_flag = value + acc + carry_flag > 0xff
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ expected_value) & (value ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -288,11 +288,11 @@ class TestSBC:
         setup_cpu.memory[0x0201] = value
         setup_cpu.acc = acc
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -310,11 +310,11 @@ class TestSBC:
         setup_cpu.memory[0x1a] = value
         setup_cpu.acc = acc
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -333,11 +333,11 @@ class TestSBC:
         setup_cpu.acc = acc
         setup_cpu.idx = 0x20
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -356,11 +356,11 @@ class TestSBC:
         setup_cpu.memory[0xacb1] = value
         setup_cpu.acc = acc
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -380,11 +380,11 @@ class TestSBC:
         setup_cpu.acc = acc
         setup_cpu.idx = 0x01
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -404,11 +404,11 @@ class TestSBC:
         setup_cpu.acc = acc
         setup_cpu.idx = 0xff
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -428,11 +428,11 @@ class TestSBC:
         setup_cpu.acc = acc
         setup_cpu.idy = 0x01
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -452,11 +452,11 @@ class TestSBC:
         setup_cpu.acc = acc
         setup_cpu.idy = 0xff
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -477,11 +477,11 @@ class TestSBC:
         setup_cpu.memory[0x7a88] = value
         setup_cpu.acc = acc
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -502,11 +502,11 @@ class TestSBC:
         setup_cpu.memory[0x2137 + 0x01] = value
         setup_cpu.acc = acc
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -527,11 +527,11 @@ class TestSBC:
         setup_cpu.memory[0x2137 + 0xff] = value
         setup_cpu.acc = acc
         setup_cpu.ps['carry_flag'] = carry_flag
-        expected_value = np.ubyte(acc - value - (1 - carry_flag))
-        expected_carry_flag = acc - value - (1 - carry_flag) > 0xff
+        expected_value = np.ubyte((acc - value - (1 - carry_flag)) & 0xff)
+        expected_carry_flag = acc - value - (1 - carry_flag) >= 0
         expected_zero_flag = expected_value == 0
         expected_negative_flag = (expected_value & 0b10000000) != 0
-        expected_overflow_flag = ((value >> 7) == (acc >> 7)) != (expected_value >> 7)
+        expected_overflow_flag = ((acc ^ value) & (acc ^ expected_value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.acc == expected_value
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
@@ -552,7 +552,7 @@ class TestCMP:
         setup_cpu.acc = acc
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -568,7 +568,7 @@ class TestCMP:
         setup_cpu.acc = acc
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -585,7 +585,7 @@ class TestCMP:
         setup_cpu.idx = 0x10
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -602,7 +602,7 @@ class TestCMP:
         setup_cpu.acc = acc
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -620,7 +620,7 @@ class TestCMP:
         setup_cpu.idx = 0x01
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -638,7 +638,7 @@ class TestCMP:
         setup_cpu.idx = 0xff
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -656,7 +656,7 @@ class TestCMP:
         setup_cpu.idy = 0x01
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -674,7 +674,7 @@ class TestCMP:
         setup_cpu.idy = 0xff
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -693,7 +693,7 @@ class TestCMP:
         setup_cpu.idx = 0x2f
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -712,7 +712,7 @@ class TestCMP:
         setup_cpu.idy = 0x01
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -731,7 +731,7 @@ class TestCMP:
         setup_cpu.idy = 0xff
         expected_carry_flag = acc >= value
         expected_zero_flag = acc == value
-        expected_negative_flag = ((acc - value) >> 7)
+        expected_negative_flag = ((acc - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -750,7 +750,7 @@ class TestCPX:
         setup_cpu.idx = idx
         expected_carry_flag = idx >= value
         expected_zero_flag = idx == value
-        expected_negative_flag = ((idx - value) >> 7)
+        expected_negative_flag = ((idx - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -766,7 +766,7 @@ class TestCPX:
         setup_cpu.idx = idx
         expected_carry_flag = idx >= value
         expected_zero_flag = idx == value
-        expected_negative_flag = ((idx - value) >> 7)
+        expected_negative_flag = ((idx - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -783,7 +783,7 @@ class TestCPX:
         setup_cpu.idx = idx
         expected_carry_flag = idx >= value
         expected_zero_flag = idx == value
-        expected_negative_flag = ((idx - value) >> 7)
+        expected_negative_flag = ((idx - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -802,7 +802,7 @@ class TestCPY:
         setup_cpu.idy = idy
         expected_carry_flag = idy >= value
         expected_zero_flag = idy == value
-        expected_negative_flag = ((idy - value) >> 7)
+        expected_negative_flag = ((idy - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -818,7 +818,7 @@ class TestCPY:
         setup_cpu.idy = idy
         expected_carry_flag = idy >= value
         expected_zero_flag = idy == value
-        expected_negative_flag = ((idy - value) >> 7)
+        expected_negative_flag = ((idy - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -835,7 +835,7 @@ class TestCPY:
         setup_cpu.idy = idy
         expected_carry_flag = idy >= value
         expected_zero_flag = idy == value
-        expected_negative_flag = ((idy - value) >> 7)
+        expected_negative_flag = ((idy - value) & 0x80) != 0
         setup_cpu.execute(1)
         assert setup_cpu.ps['carry_flag'] == expected_carry_flag
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
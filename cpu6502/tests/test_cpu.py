@@ -6,6 +6,7 @@ import pytest
 from cpu6502.cpu import CPU
 from cpu6502.instructions.instructions import Instructions
 from cpu6502.memory import Memory
+from cpu6502.status import FLAGS, NEGATIVE, NZ, NZ_TABLE, ZERO
 
 
 @pytest.mark.usefixtures('setup_cpu')
@@ -22,7 +23,7 @@ class TestCPU:
             cpu.reset()
         pc_address = pc_address_snd + (pc_address_fst << 8)
         assert cpu.pc == pc_address
-        assert cpu.sp == 0xff
+        assert cpu.sp == 0xfe  # reset pushes idx
         assert cpu.acc == 0x0
         assert cpu.idx == 0x0
         assert cpu.idy == 0x0
@@ -30,6 +31,15 @@ class TestCPU:
         assert not cpu.ps['decimal_flag']
         assert cpu.clock.total_clock_cycles == 7
 
+    def test_cpu_reset_memory(self):
+        cpu = CPU()
+        memory = Memory()
+        memory[0xfffc], memory[0xfffd] = 0x00, 0x02
+        cpu.reset(memory=memory)
+        assert cpu.memory is memory
+        assert cpu.pc == 0x0200
+        assert memory[0x01ff] == 0x00  # idx pushed by reset
+
     @pytest.mark.parametrize('ps, result', [({
                                                  'carry_flag': True,
                                                  'zero_flag': True,
@@ -117,11 +127,20 @@ class TestCPU:
     @pytest.mark.parametrize('num_of_instructions', [0, 1, 2, 5])
     def test_cpu_execute(self, setup_cpu, num_of_instructions):
         with patch.object(Instructions, 'execute') as mocked_exec, \
-                patch.object(CPU, 'fetch_byte') as mocked_fetch:
+                patch.object(CPU, 'fetch_byte_int') as mocked_fetch:
             setup_cpu.execute(num_of_instructions)
             assert mocked_exec.call_count == num_of_instructions
             assert mocked_fetch.call_count == num_of_instructions
 
+    def test_cpu_dispatch_table(self, setup_cpu):
+        table = setup_cpu.instructions.dispatch_table
+        assert len(table) == 0x100
+        assert all(table[opcode] is not None for opcode in range(0x100))
+        lda_immediate, lda_finalise = table[0xa9]
+        lda_absolute, _ = table[0xad]
+        assert lda_immediate.__self__ is lda_absolute.__self__
+        assert lda_finalise.__self__ is lda_immediate.__self__
+
     @pytest.mark.parametrize('address', [0x0000, 0xffff, 0x0001, 0xfffe, 0x0e01])
     @pytest.mark.parametrize('value', [0x00, 0x01, 0xff, 0xfe, 0xae])
     def test_cpu_fetch_byte(self, setup_cpu, address, value):
@@ -140,6 +159,28 @@ class TestCPU:
         assert setup_cpu.clock.total_clock_cycles == 1
         assert setup_cpu.pc == pc_start
 
+    @pytest.mark.parametrize('address', [0x0000, 0xffff, 0x0001, 0xfffe, 0x0e01])
+    @pytest.mark.parametrize('value', [0x00, 0x01, 0xff, 0xfe, 0xae])
+    def test_cpu_fetch_byte_int(self, setup_cpu, address, value):
+        setup_cpu.pc = address
+        setup_cpu.memory[address] = value
+        data = setup_cpu.fetch_byte_int()
+        assert data == value
+        assert type(data) is int
+        assert setup_cpu.clock.total_clock_cycles == 1
+        assert setup_cpu.pc == address + 1
+
+    @pytest.mark.parametrize('address', [0x0000, 0xffff, 0x0001, 0xfffe, 0x0e01])
+    @pytest.mark.parametrize('value', [0x00, 0x01, 0xff, 0xfe, 0xae])
+    def test_cpu_read_byte_int(self, setup_cpu, address, value):
+        pc_start = setup_cpu.pc
+        setup_cpu.memory[address] = value
+        data = setup_cpu.read_byte_int(address)
+        assert data == value
+        assert type(data) is int
+        assert setup_cpu.clock.total_clock_cycles == 1
+        assert setup_cpu.pc == pc_start
+
     @pytest.mark.parametrize('address', [0x0200, 0xffff, 0x0001, 0xfffe, 0x0e01])
     @pytest.mark.parametrize('value', [0x00, 0x01, 0xff, 0xfe, 0xae])
     def test_cpu_write_byte_ok(self, setup_cpu, address, value):
@@ -151,10 +192,11 @@ class TestCPU:
 
     @pytest.mark.parametrize('address', [0x0100, 0x0101, 0x0120, 0x01fe, 0x01ff])
     def test_cpu_write_byte_on_stack(self, setup_cpu, address):
+        # The stack page is ordinary RAM
         pc_start = setup_cpu.pc
         setup_cpu.write_byte(address, 0x10)
-        assert setup_cpu.memory[address] == 0x0
-        assert setup_cpu.clock.total_clock_cycles == 0
+        assert setup_cpu.memory[address] == 0x10
+        assert setup_cpu.clock.total_clock_cycles == 1
         assert setup_cpu.pc == pc_start
 
     @pytest.mark.parametrize('address', [0x0000, 0xfffe, 0x0001, 0x0e01])
@@ -177,6 +219,30 @@ class TestCPU:
         assert setup_cpu.clock.total_clock_cycles == 2
         assert setup_cpu.pc == pc_start
 
+    @pytest.mark.parametrize('address', [0x0000, 0xfffe, 0x0001, 0x0e01])
+    @pytest.mark.parametrize('value', [0x0100, 0x0010, 0xffff, 0xfeef, 0xefef])
+    def test_cpu_fetch_word_int(self, setup_cpu, address, value):
+        setup_cpu.pc = address
+        setup_cpu.memory[address] = value
+        setup_cpu.memory[address + 1] = value >> 8
+        data = setup_cpu.fetch_word_int()
+        assert data == value
+        assert type(data) is int
+        assert setup_cpu.clock.total_clock_cycles == 2
+        assert setup_cpu.pc == address + 2
+
+    @pytest.mark.parametrize('address', [0x0000, 0x0001, 0xfffe, 0x0e01])
+    @pytest.mark.parametrize('value', [0x0100, 0x0010, 0xffff, 0xfeef, 0xefef])
+    def test_cpu_read_word_int(self, setup_cpu, address, value):
+        pc_start = setup_cpu.pc
+        setup_cpu.memory[address] = value
+        setup_cpu.memory[address + 1] = value >> 8
+        data = setup_cpu.read_word_int(address)
+        assert data == value
+        assert type(data) is int
+        assert setup_cpu.clock.total_clock_cycles == 2
+        assert setup_cpu.pc == pc_start
+
     @pytest.mark.parametrize('address', [0x0000, 0x0001, 0xfffe, 0x0e01])
     @pytest.mark.parametrize('value', [0x0100, 0x0010, 0xffff, 0xfeef, 0xefef])
     def test_cpu_write_word_ok(self, setup_cpu, address, value):
@@ -191,8 +257,9 @@ class TestCPU:
     def test_cpu_write_word_on_stack(self, setup_cpu, address):
         pc_start = setup_cpu.pc
         setup_cpu.write_word(address, 0xae10)
-        assert setup_cpu.memory[address] == 0x0
-        assert setup_cpu.clock.total_clock_cycles == 0
+        assert setup_cpu.memory[address] == 0x10
+        assert setup_cpu.memory[address + 1] == 0xae
+        assert setup_cpu.clock.total_clock_cycles == 2
         assert setup_cpu.pc == pc_start
 
     @pytest.mark.parametrize('value', [0x00, 0x01, 0xff, 0xfe, 0xae])
@@ -206,13 +273,13 @@ class TestCPU:
         assert setup_cpu.clock.total_clock_cycles == 2
         assert setup_cpu.pc == pc_start
 
-    def test_cpu_push_byte_on_stack_full(self, setup_cpu):
+    def test_cpu_push_byte_on_stack_wraps(self, setup_cpu):
         pc_start = setup_cpu.pc
         setup_cpu.sp = 0x00
         setup_cpu.push_byte_on_stack(0xab)
-        assert setup_cpu.memory[0x0100] == 0x0
-        assert setup_cpu.sp == 0x00
-        assert setup_cpu.clock.total_clock_cycles == 0
+        assert setup_cpu.memory[0x0100] == 0xab
+        assert setup_cpu.sp == 0xff
+        assert setup_cpu.clock.total_clock_cycles == 2
         assert setup_cpu.pc == pc_start
 
     @pytest.mark.parametrize('value', [0x00, 0x01, 0xff, 0xfe, 0xae])
@@ -226,12 +293,13 @@ class TestCPU:
         assert setup_cpu.clock.total_clock_cycles == 3
         assert setup_cpu.pc == pc_start
 
-    def test_cpu_pop_byte_from_stack_empty(self, setup_cpu):
+    def test_cpu_pop_byte_from_stack_wraps(self, setup_cpu):
         pc_start = setup_cpu.pc
         setup_cpu.sp = 0xff
-        assert setup_cpu.pull_byte_from_stack() is None
-        assert setup_cpu.sp == 0xff
-        assert setup_cpu.clock.total_clock_cycles == 0
+        setup_cpu.memory[0x0100] = 0xab
+        assert setup_cpu.pull_byte_from_stack() == hex(0xab)
+        assert setup_cpu.sp == 0x00
+        assert setup_cpu.clock.total_clock_cycles == 3
         assert setup_cpu.pc == pc_start
 
     @pytest.mark.parametrize('value', [0x0100, 0x0010, 0xffee, 0xeeff, 0xefef, 0xfefe])
@@ -247,13 +315,14 @@ class TestCPU:
         assert setup_cpu.pc == pc_start
 
     @pytest.mark.parametrize('sp', [0x00, 0x01])
-    def test_cpu_push_word_on_stack_full(self, setup_cpu, sp):
+    def test_cpu_push_word_on_stack_wraps(self, setup_cpu, sp):
         pc_start = setup_cpu.pc
         setup_cpu.sp = sp
         setup_cpu.push_word_on_stack(0xabcd)
-        assert setup_cpu.memory[sp + 0x0100] == 0x0
-        assert setup_cpu.sp == sp
-        assert setup_cpu.clock.total_clock_cycles == 0
+        assert setup_cpu.memory[sp + 0x0100] == 0xab
+        assert setup_cpu.memory[((sp - 1) & 0xff) + 0x0100] == 0xcd
+        assert setup_cpu.sp == (sp - 2) & 0xff
+        assert setup_cpu.clock.total_clock_cycles == 3
         assert setup_cpu.pc == pc_start
 
     @pytest.mark.parametrize('value', [0x0100, 0x0010, 0xffee, 0xeeff, 0xefef, 0xfefe])
@@ -261,18 +330,167 @@ class TestCPU:
     def test_cpu_pop_word_from_stack_ok(self, setup_cpu, value, sp):
         pc_start = setup_cpu.pc
         setup_cpu.sp = sp
-        setup_cpu.memory[setup_cpu.sp + 0x0102] = np.ubyte(value)
-        setup_cpu.memory[setup_cpu.sp + 0x0101] = np.ubyte(value >> 8)
+        setup_cpu.memory[setup_cpu.sp + 0x0102] = np.ubyte(value >> 8)
+        setup_cpu.memory[setup_cpu.sp + 0x0101] = np.ubyte(value)
         assert hex(value) == setup_cpu.pull_word_from_stack()
         assert setup_cpu.sp == sp + 2
         assert setup_cpu.clock.total_clock_cycles == 4
         assert setup_cpu.pc == pc_start
 
     @pytest.mark.parametrize('sp', [0xff, 0xfe])
-    def test_cpu_pop_word_from_stack_empty(self, setup_cpu, sp):
+    def test_cpu_pop_word_from_stack_wraps(self, setup_cpu, sp):
         pc_start = setup_cpu.pc
         setup_cpu.sp = sp
-        assert setup_cpu.pull_word_from_stack() is None
-        assert setup_cpu.sp == sp
-        assert setup_cpu.clock.total_clock_cycles == 0
+        setup_cpu.memory[((sp + 1) & 0xff) + 0x0100] = 0xcd
+        setup_cpu.memory[((sp + 2) & 0xff) + 0x0100] = 0xab
+        assert setup_cpu.pull_word_from_stack() == hex(0xabcd)
+        assert setup_cpu.sp == (sp + 2) & 0xff
+        assert setup_cpu.clock.total_clock_cycles == 4
         assert setup_cpu.pc == pc_start
+
+
+class TestClock:
+
+    def test_clock_invert_counts_cycles(self):
+        clock = CPU.Clock()
+        ~clock
+        ~clock
+        clock.clock()
+        assert clock.total_clock_cycles == 3
+        assert not clock.cycles
+
+    def test_clock_unlimited_never_synchronises(self):
+        clock = CPU.Clock(speed_mhz=0)
+        clock.total_clock_cycles = 10 ** 9
+        assert clock.total_clock_cycles < clock.next_sync
+
+    @pytest.mark.parametrize('speed_mhz, batch_cycles', [(1, 1000), (2, 500), (0.5, 16)])
+    def test_clock_synchronise_sleeps_when_ahead(self, speed_mhz, batch_cycles):
+        clock = CPU.Clock(speed_mhz=speed_mhz, batch_cycles=batch_cycles)
+        with patch('cpu6502.cpu.monotonic', side_effect=[100.0, 100.0]), patch('cpu6502.cpu.sleep') as mocked_sleep:
+            clock.synchronise()
+            assert clock.next_sync == batch_cycles
+            clock.total_clock_cycles = batch_cycles
+            clock.synchronise()
+        mocked_sleep.assert_called_once()
+        assert mocked_sleep.call_args[0][0] == pytest.approx(batch_cycles / (speed_mhz * 1000000))
+        assert clock.drift == 0.0
+        assert clock.next_sync == 2 * batch_cycles
+
+    def test_clock_synchronise_reports_drift(self):
+        clock = CPU.Clock(speed_mhz=1, batch_cycles=1000)
+        with patch('cpu6502.cpu.monotonic', side_effect=[100.0, 100.5]), patch('cpu6502.cpu.sleep') as mocked_sleep:
+            clock.synchronise()
+            clock.total_clock_cycles = 1000
+            clock.synchronise()
+        mocked_sleep.assert_not_called()
+        assert clock.drift == pytest.approx(0.5 - 0.001)
+
+    def test_cpu_execute_throttles_once_per_batch(self, setup_cpu):
+        setup_cpu.clock = CPU.Clock(speed_mhz=1, batch_cycles=10)
+        for address in range(0x0200, 0x0220):
+            setup_cpu.memory[address] = 0xea  # NOP instruction
+        with patch.object(CPU.Clock, 'synchronise', autospec=True,
+                          side_effect=lambda clock: setattr(clock, 'next_sync', clock.total_clock_cycles + 10)) \
+                as mocked_sync:
+            setup_cpu.execute(30)
+        assert setup_cpu.clock.total_clock_cycles == 60
+        assert mocked_sync.call_count == 6
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestStatus:
+
+    @pytest.mark.parametrize('name, mask', list(FLAGS.items()))
+    def test_status_view_writes_packed_byte(self, setup_cpu, name, mask):
+        setup_cpu.status = 0
+        setup_cpu.ps[name] = True
+        assert setup_cpu.status == mask
+        assert setup_cpu.ps[name]
+        assert getattr(setup_cpu, name)
+        setattr(setup_cpu, name, False)
+        assert setup_cpu.status == 0
+        assert not setup_cpu.ps[name]
+
+    @pytest.mark.parametrize('status', [0x00, 0x01, 0x80, 0xa5, 0xff])
+    def test_status_assignment(self, setup_cpu, status):
+        setup_cpu.ps = status
+        assert setup_cpu.status == status
+        assert dict(setup_cpu.ps) == {name: bool(status & mask) for name, mask in FLAGS.items()}
+        setup_cpu.ps = dict(setup_cpu.ps)
+        assert setup_cpu.status == status
+
+    @pytest.mark.parametrize('value', range(0x100))
+    def test_nz_table(self, value):
+        assert NZ_TABLE[value] & ZERO == (ZERO if value == 0 else 0)
+        assert NZ_TABLE[value] & NEGATIVE == value & 0x80
+        assert NZ_TABLE[value] & (0xff ^ NZ) == 0
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestRun:
+    # LDX #$00; INX; CPX #$05; BNE -5; JMP $0207
+    PROGRAM = [0xa2, 0x00, 0xe8, 0xe0, 0x05, 0xd0, 0xfb, 0x4c, 0x07, 0x02]
+
+    @pytest.fixture(autouse=True)
+    def load_program(self, setup_cpu):
+        for address, value in enumerate(self.PROGRAM, start=0x0200):
+            setup_cpu.memory[address] = value
+
+    def test_run_trap(self, setup_cpu):
+        result = setup_cpu.run()
+        assert result == (CPU.STOP_TRAP, 0x0207, 1 + 5 * 3 + 1, 2 + 5 * (2 + 2 + 3) - 1 + 3)
+        assert result.cycles == setup_cpu.clock.total_clock_cycles
+        assert setup_cpu.idx == 0x05
+
+    def test_run_no_trap(self, setup_cpu):
+        result = setup_cpu.run(max_instructions=100, trap=False)
+        assert result.reason == CPU.STOP_INSTRUCTIONS
+        assert result.instructions == 100
+        assert result.pc == 0x0207
+
+    @pytest.mark.parametrize('until_pc, instructions', [(0x0207, 16), ([0x0205, 0x0207], 3), (0x0200, 0)])
+    def test_run_until_pc(self, setup_cpu, until_pc, instructions):
+        result = setup_cpu.run(until_pc=until_pc)
+        assert result.reason == CPU.STOP_BREAKPOINT
+        assert result.instructions == instructions
+
+    def test_run_until_predicate(self, setup_cpu):
+        result = setup_cpu.run(until=lambda cpu: cpu.idx == 3)
+        assert result.reason == CPU.STOP_PREDICATE
+        assert result.pc == 0x0203
+        assert setup_cpu.idx == 3
+
+    @pytest.mark.parametrize('max_cycles, cycles', [(0, 0), (1, 2), (6, 6), (7, 9)])
+    def test_run_max_cycles(self, setup_cpu, max_cycles, cycles):
+        result = setup_cpu.run(max_cycles=max_cycles)
+        assert result.reason == CPU.STOP_CYCLES
+        assert result.cycles == cycles
+
+    def test_run_end_of_memory(self, setup_cpu):
+        setup_cpu.pc = 0xffff
+        assert setup_cpu.run() == (CPU.STOP_END_OF_MEMORY, 0xffff, 0, 0)
+
+    @pytest.mark.parametrize('program, trap_address, instructions', [([0x4c, 0x00, 0x02], 0x0200, 1),  # JMP $0200
+                                                                     ([0x6c, 0x10, 0x02], 0x0200, 1),  # JMP ($0210)
+                                                                     ([0xea, 0xd0, 0xfe], 0x0201, 2),  # NOP; BNE *
+                                                                     ([0xea, 0x90, 0xfe], 0x0201, 2)])  # NOP; BCC *
+    def test_run_trap_address(self, setup_cpu, program, trap_address, instructions):
+        for address, value in enumerate(program, start=0x0200):
+            setup_cpu.memory[address] = value
+        setup_cpu.memory[0x0210] = 0x00
+        setup_cpu.memory[0x0211] = 0x02
+        setup_cpu.status = 0
+        result = setup_cpu.run()
+        assert result.reason == CPU.STOP_TRAP
+        assert result.pc == setup_cpu.pc == trap_address
+        assert result.instructions == instructions
+        assert not setup_cpu.trap_detection
+
+    def test_execute_ignores_traps(self, setup_cpu):
+        setup_cpu.memory[0x0200] = 0x4c
+        setup_cpu.memory[0x0201] = 0x00
+        setup_cpu.memory[0x0202] = 0x02
+        setup_cpu.execute(3)
+        assert setup_cpu.pc == 0x0200
+        assert setup_cpu.clock.total_clock_cycles == 9
@@ -0,0 +1,140 @@
+import io
+from unittest.mock import patch
+
+import pytest
+
+from cpu6502.cpu import CPU
+from cpu6502.devices import Device, DeviceBus, SerialConsole, Timer, console_bus
+from cpu6502.memory import DevicePage, Memory
+
+
+@pytest.fixture(scope='function')
+def setup_bus(setup_cpu) -> DeviceBus:
+    bus = DeviceBus({0xf000: SerialConsole(loopback=True), 0xf004: Timer()})
+    setup_cpu.io = bus
+    bus.connect(setup_cpu)
+    return bus
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestDeviceBus:
+
+    def test_ram_pages_untouched(self, setup_cpu, setup_bus):
+        memory = setup_cpu.memory
+        assert memory.read_pages[0xef] is not memory.read_pages[0xf0]
+        assert all(type(page) is memoryview for index, page in enumerate(memory.read_pages) if index != 0xf0)
+
+    def test_fallback_to_memory(self, setup_cpu, setup_bus):
+        setup_cpu.memory[0xf010] = 0x42
+        assert setup_cpu.memory[0xf010] == 0x42
+        assert setup_cpu.memory.data[0xf010] == 0x42
+
+    def test_connect_again(self, setup_cpu, setup_bus):
+        setup_bus.connect(setup_cpu)
+        setup_cpu.memory[0xf010] = 0x42
+        assert setup_cpu.memory[0xf010] == 0x42
+        assert setup_cpu.memory.data[0xf010] == 0x42
+        assert setup_cpu.memory[0xf001] & SerialConsole.TX_READY
+
+    def test_device_spanning_pages(self, setup_cpu, setup_bus):
+        class Recorder(Device):
+            size = 0x10
+
+            def __init__(self):
+                self.registers = [0] * self.size
+
+            def read(self, register: int) -> int:
+                return self.registers[register]
+
+            def write(self, register: int, value: int) -> None:
+                self.registers[register] = value
+
+        recorder = setup_bus.attach(0x12f8, Recorder())
+        setup_cpu.write_byte(0x12ff, 0x01)
+        setup_cpu.write_byte(0x1300, 0x02)
+        assert recorder.registers[0x07:0x09] == [0x01, 0x02]
+        assert setup_cpu.memory.data[0x12ff] == 0x00
+        assert setup_cpu.read_byte_int(0x1300) == 0x02
+
+    @pytest.mark.parametrize('address', [0xf001, 0xf005, 0xfffe, -1])
+    def test_attach_invalid(self, setup_bus, address):
+        with pytest.raises(ValueError):
+            setup_bus.attach(address, Timer())
+
+    def test_reset_with_io(self):
+        cpu = CPU()
+        memory = Memory()
+        with patch.object(CPU, 'initialise_memory'):
+            cpu.memory = memory
+            cpu.reset(io=console_bus, stream=io.StringIO())
+        assert isinstance(cpu.io, DeviceBus)
+        assert cpu.io.cpu is cpu
+        assert isinstance(cpu.memory.read_pages[0xf0], DevicePage)
+        assert cpu.memory[0xf001] == SerialConsole.TX_READY
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestSerialConsole:
+
+    def test_console_program(self, setup_cpu, setup_bus):
+        program = [0xa2, 0x00,  # LDX #$00
+                   0xbd, 0x10, 0x02,  # LDA $0210,X
+                   0xf0, 0x06,  # BEQ +6
+                   0x8d, 0x00, 0xf0,  # STA $F000
+                   0xe8,  # INX
+                   0xd0, 0xf5]  # BNE -11
+        for address, value in enumerate(program + [0x00, 0x00, 0x00] + list(b'HELLO\x00'), start=0x0200):
+            setup_cpu.memory[address] = value
+        setup_cpu.execute(2 + 5 * 5 + 2)
+        console = setup_bus.devices[0][1]
+        assert bytes(console.output) == b'HELLO'
+        stream = io.StringIO()
+        console.stream = stream
+        setup_bus.refresh()
+        setup_bus.refresh()
+        assert stream.getvalue() == 'HELLO'
+
+    def test_console_input(self, setup_cpu, setup_bus):
+        console = setup_bus.devices[0][1]
+        console.loopback = False
+        assert setup_cpu.memory[0xf001] == SerialConsole.TX_READY
+        console.send('A')
+        assert setup_cpu.memory[0xf001] == SerialConsole.TX_READY | SerialConsole.RX_READY
+        assert setup_cpu.memory[0xf000] == ord('A')
+        assert setup_cpu.memory[0xf000] == 0x00
+        setup_cpu.memory[0xf000] = ord('B')
+        assert setup_cpu.memory[0xf001] == SerialConsole.TX_READY
+
+    def test_console_loopback(self, setup_cpu, setup_bus):
+        setup_cpu.memory[0xf000] = ord('Z')
+        assert setup_cpu.memory[0xf001] & SerialConsole.RX_READY
+        assert setup_cpu.memory[0xf000] == ord('Z')
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestTimer:
+
+    def test_timer_counts_cycles(self, setup_cpu, setup_bus):
+        setup_cpu.memory[0xf004] = 0xff
+        setup_cpu.memory[0xf005] = 0x00
+        setup_cpu.memory[0xf006] = Timer.RUNNING
+        setup_cpu.clock.total_clock_cycles += 0x10
+        assert setup_cpu.memory[0xf004] == 0xef
+        assert setup_cpu.memory[0xf005] == 0x00
+        assert setup_cpu.memory[0xf007] == 0x00
+        setup_cpu.clock.total_clock_cycles += 0xf0
+        assert setup_cpu.memory[0xf004] == 0xff
+        assert setup_cpu.memory[0xf007] == Timer.EXPIRED
+        assert setup_cpu.memory[0xf007] == 0x00
+
+    def test_timer_stopped(self, setup_cpu, setup_bus):
+        setup_cpu.memory[0xf005] = 0x10
+        setup_cpu.memory[0xf006] = Timer.RUNNING
+        setup_cpu.clock.total_clock_cycles += 0x20
+        setup_cpu.memory[0xf006] = 0x00
+        setup_cpu.clock.total_clock_cycles += 0x20
+        assert setup_cpu.memory[0xf006] == 0x00
+        assert (setup_cpu.memory[0xf005] << 8) | setup_cpu.memory[0xf004] == 0x10ff - 0x20
+        setup_cpu.memory[0xf006] = Timer.RUNNING
+        setup_cpu.clock.total_clock_cycles += 0x20
+        assert (setup_cpu.memory[0xf005] << 8) | setup_cpu.memory[0xf004] == 0x10ff - 0x40
@@ -0,0 +1,35 @@
+import pytest
+
+from cpu6502.disassembler import OPCODES, disassemble, disassemble_range
+
+
+class TestDisassembler:
+
+    @pytest.mark.parametrize('program, text', [
+        ([0xea], 'NOP'),
+        ([0x0a], 'ASL A'),
+        ([0xa9, 0x42], 'LDA #$42'),
+        ([0xa5, 0x10], 'LDA $10'),
+        ([0xb6, 0x10], 'LDX $10,Y'),
+        ([0xbd, 0x34, 0x12], 'LDA $1234,X'),
+        ([0x6c, 0xfc, 0xff], 'JMP ($FFFC)'),
+        ([0xa1, 0x10], 'LDA ($10,X)'),
+        ([0x91, 0x10], 'STA ($10),Y'),
+        ([0xd0, 0xfe], 'BNE $0200'),
+        ([0x10, 0x04], 'BPL $0206'),
+        ([0x02], '.byte $02'),
+    ])
+    def test_disassemble(self, setup_cpu, program, text):
+        for address, value in enumerate(program, start=0x0200):
+            setup_cpu.memory[address] = value
+        assert disassemble(setup_cpu.memory, 0x0200) == (text, len(program))
+
+    def test_disassemble_range(self, setup_cpu):
+        for address, value in enumerate([0xa2, 0x05, 0xca, 0xd0, 0xfd, 0x60], start=0x0200):
+            setup_cpu.memory[address] = value
+        assert disassemble_range(setup_cpu.memory, 0x0200, 0x0206) == [
+            (0x0200, 'LDX #$05'), (0x0202, 'DEX'), (0x0203, 'BNE $0202'), (0x0205, 'RTS')]
+
+    def test_all_opcodes(self):
+        assert len(OPCODES) == 151
+        assert OPCODES[0x6c].mode == 'Indirect'
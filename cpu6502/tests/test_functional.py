@@ -1,27 +1,52 @@
-from unittest.mock import patch
+import json
+import os
 
 import pytest
 
 from cpu6502.cpu import CPU
-from cpu6502.memory import Memory
+from cpu6502.functional import LISTING_PATH, SKIPPED_LOOPS, run_functional_test, setup_cpu as setup_functional
+from cpu6502.listing import Listing
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             'benchmarks', 'functional_baseline.json')
+
+
+@pytest.fixture(scope='module')
+def listing() -> Listing:
+    return Listing.load(LISTING_PATH)
 
 
-@pytest.mark.usefixtures('setup_cpu')
 class TestFunctional:
 
-    def test_functional(self, setup_cpu):
-        memory = Memory()
-        try:
-            memory.load_binary_file('6502_functional_test.bin', start_offset=0xa)
-        except FileNotFoundError:
-            memory.load_binary_file('cpu6502/tests/6502_functional_test.bin', start_offset=0xa)
-        with patch.object(CPU, 'initialise_memory'):
-            setup_cpu.memory = memory
-            setup_cpu.reset()
-            setup_cpu.pc = 0x400
-
-        old_pc = setup_cpu.pc
-        while setup_cpu.pc < 0xffff:
-            setup_cpu.execute(1)
-            assert setup_cpu.pc != old_pc
-            old_pc = setup_cpu.pc
+    def test_functional(self, listing):
+        result = run_functional_test(setup_functional(), fast=True)
+        # Every failed test traps on its own address, only the success trap passes
+        assert result.reason == CPU.STOP_TRAP
+        assert result.pc == listing.find('test passed'), listing.describe(result.pc)
+
+    def test_baseline(self):
+        # The speed is checked by benchmarks/functional_benchmark.py (tox -e benchmark), the run itself here
+        with open(BASELINE_PATH) as file:
+            baseline = json.load(file)['fast']
+        result = run_functional_test(setup_functional(), fast=True)
+        assert (result.instructions, result.cycles, result.pc) == \
+               (baseline['instructions'], baseline['cycles'], baseline['pc'])
+
+    def test_skipped_loops(self, listing):
+        # Each skipped loop ends with the check of its test number, so test_case stays consistent
+        for start, end in SKIPPED_LOOPS.items():
+            assert listing.lines[end].startswith('lda test_case')
+            assert listing.lines[start] in ('cld', 'sed')
+
+    def test_instruction_budget(self):
+        result = run_functional_test(setup_functional(), max_instructions=1000)
+        assert result.reason == CPU.STOP_INSTRUCTIONS
+        assert result.instructions == 1000
+
+    @pytest.mark.slow
+    def test_functional_full(self, listing):
+        # The whole ROM, including the exhaustive ADC / SBC loops (~30M instructions): pytest -m slow
+        result = run_functional_test(setup_functional(), fast=False)
+        assert result.reason == CPU.STOP_TRAP
+        assert result.pc == listing.find('test passed'), listing.describe(result.pc)
@@ -54,8 +54,8 @@ class TestRTS:
     def test_rts_implied(self, setup_cpu, sp):
         setup_cpu.memory[0x200] = 0x60
         setup_cpu.sp = sp
-        setup_cpu.memory[setup_cpu.sp + 0x0102] = 0xcd
-        setup_cpu.memory[setup_cpu.sp + 0x0101] = 0xff
+        setup_cpu.memory[setup_cpu.sp + 0x0102] = 0xff  # Return address is little endian on the stack
+        setup_cpu.memory[setup_cpu.sp + 0x0101] = 0xcd
         setup_cpu.execute(1)
         assert setup_cpu.pc == 0xffcd + 1
         assert setup_cpu.sp == sp + 2
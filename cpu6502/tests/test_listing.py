@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from cpu6502.listing import Listing
+
+LISTING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '6502_functional_test.lst')
+
+
+@pytest.fixture(scope='module')
+def listing() -> Listing:
+    return Listing.load(LISTING_PATH)
+
+
+class TestListing:
+
+    @pytest.mark.parametrize('address, label', [(0x0400, 'start'), (0x346f, 'chkdad'), (0x3477, 'chkdad+0x8'),
+                                                (0x37ab, 'irq_trap'), (0x0009, '0x9')])
+    def test_label(self, listing, address, label):
+        assert listing.label(address) == label
+
+    def test_describe(self, listing):
+        assert listing.describe(0x3477) == 'chkdad+0x8 (0x3477): bne * ;failed not equal (non zero)'
+        assert listing.describe(0x3469).endswith(': jmp * ;test passed, no errors')
+
+    def test_find(self, listing):
+        assert listing.find('test passed') == 0x3469
+        assert listing.find('no such instruction') is None
+
+    def test_macro_lines(self, listing):
+        # Expanded macro lines ('>') are instructions, macro invocations without bytes are not
+        assert listing.lines[0x3469] == 'jmp * ;test passed, no errors'
+        assert 'success' not in listing.lines.values()
@@ -606,7 +606,7 @@ class TestBIT:
         setup_cpu.memory[0xc4] = value
         setup_cpu.acc = acc
         expected_zero_flag = ((value & acc) == 0)
-        expected_overflow_flag = (value & 0b01000000)
+        expected_overflow_flag = (value & 0b01000000) != 0
         expected_negative_flag = (value & 0b10000000 != 0)
         setup_cpu.execute(1)
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
@@ -623,7 +623,7 @@ class TestBIT:
         setup_cpu.memory[0xe22c] = value
         setup_cpu.acc = acc
         expected_zero_flag = ((value & acc) == 0)
-        expected_overflow_flag = (value & 0b01000000)
+        expected_overflow_flag = (value & 0b01000000) != 0
         expected_negative_flag = (value & 0b10000000 != 0)
         setup_cpu.execute(1)
         assert setup_cpu.ps['zero_flag'] == expected_zero_flag
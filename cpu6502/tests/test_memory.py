@@ -0,0 +1,221 @@
+import numpy as np
+import pytest
+
+from cpu6502.memory import CodePage, Memory
+
+
+def intel_hex_record(address: int, record_type: int, data: bytes) -> str:
+    record = bytes([len(data), address >> 8, address & 0xff, record_type]) + data
+    return ':' + (record + bytes([-sum(record) & 0xff])).hex().upper()
+
+
+class TestMemory:
+
+    @pytest.mark.parametrize('start_offset', [0x0000, 0x000a, 0x0200, 0xfffc])
+    def test_load_binary_file(self, tmp_path, start_offset):
+        path = tmp_path / 'program.bin'
+        path.write_bytes(bytes([0xa9, 0x01, 0x00, 0xff]))
+        memory = Memory()
+        memory[0x0100] = 0x42
+        data = memory.data
+        assert memory.load_binary_file(str(path), start_offset=start_offset)
+        assert memory.data is data
+        assert list(memory.data[start_offset:start_offset + 4]) == [0xa9, 0x01, 0x00, 0xff]
+        assert memory[0x0100] == 0x42
+        assert np.count_nonzero(memory.data) == 4
+
+    def test_load_binary_file_too_big(self, tmp_path):
+        path = tmp_path / 'program.bin'
+        path.write_bytes(bytes(0x10))
+        memory = Memory()
+        assert not memory.load_binary_file(str(path), start_offset=0xfff8)
+
+    def test_load_binary_file_mmap(self, tmp_path):
+        path = tmp_path / 'rom.bin'
+        path.write_bytes(bytes(range(0x100)) * 0x100)
+        memory = Memory()
+        other = Memory()
+        assert memory.load_binary_file(str(path), mmap=True)
+        assert other.load_binary_file(str(path), mmap=True)
+        assert isinstance(memory.data, np.memmap)
+        assert memory[0x12ab] == 0xab
+        memory[0x12ab] = 0x00
+        assert memory[0x12ab] == 0x00
+        assert other[0x12ab] == 0xab
+        assert path.read_bytes()[0x12ab] == 0xab
+
+    def test_load_intel_hex_file(self, tmp_path):
+        path = tmp_path / 'program.hex'
+        path.write_text('\n'.join([
+            intel_hex_record(0x0200, 0x00, bytes([0xa9, 0x01])),
+            intel_hex_record(0xfffc, 0x00, bytes([0x00, 0x02])),
+            intel_hex_record(0x0000, 0x02, bytes([0x00, 0x10])),
+            intel_hex_record(0x0000, 0x00, bytes([0xea])),
+            intel_hex_record(0x0000, 0x01, b''),
+            intel_hex_record(0x0300, 0x00, bytes([0xff]))]))
+        memory = Memory()
+        assert memory.load_file(str(path))
+        assert list(memory.data[0x0200:0x0202]) == [0xa9, 0x01]
+        assert list(memory.data[0xfffc:0xfffe]) == [0x00, 0x02]
+        assert memory[0x0100] == 0xea
+        assert memory[0x0300] == 0x00
+
+    @pytest.mark.parametrize('line', [':00000001FE', 'XYZ', ':0100000000', ':0200000000FE'])
+    def test_load_intel_hex_file_invalid(self, tmp_path, line):
+        path = tmp_path / 'program.hex'
+        path.write_text(line)
+        memory = Memory()
+        assert not memory.load_intel_hex_file(str(path))
+
+    def test_load_segments(self, tmp_path):
+        program, vectors = tmp_path / 'program.bin', tmp_path / 'vectors.ihx'
+        program.write_bytes(bytes([0xea, 0xea]))
+        vectors.write_text(intel_hex_record(0xfffc, 0x00, bytes([0x00, 0x02])))
+        memory = Memory()
+        assert memory.load_segments([(str(program), 0x0200), str(vectors)])
+        assert list(memory.data[0x0200:0x0202]) == [0xea, 0xea]
+        assert list(memory.data[0xfffc:0xfffe]) == [0x00, 0x02]
+
+
+class TestPagedMemory:
+
+    @pytest.mark.parametrize('address, value, expected', [(0x0000, 0x01, 0x01), (0x01ff, 0x1ff, 0xff),
+                                                          (0xffff, 0xfeef, 0xef), (0x1234, np.ubyte(0xae), 0xae)])
+    def test_set_item(self, address, value, expected):
+        memory = Memory()
+        memory[address] = value
+        assert memory[address] == expected
+        assert type(memory[address]) is int
+        assert memory.data[address] == expected
+
+    def test_out_of_bounds(self):
+        memory = Memory()
+        with pytest.raises(IndexError):
+            memory[0x10000] = 0x01
+        with pytest.raises(IndexError):
+            _ = memory[0x10000]
+
+    def test_slice(self):
+        memory = Memory()
+        memory.map_rom(0x0100, bytes(range(0x100)))
+        assert list(memory[0x01fe:0x0202]) == [0xfe, 0xff, 0x00, 0x00]
+
+    def test_map_region(self):
+        memory = Memory()
+        ram = np.zeros(0x0800, dtype=np.ubyte)
+        memory.map_region(0x8000, ram)
+        memory[0x8001] = 0x42
+        memory[0x8800] = 0x43
+        assert ram[0x0001] == 0x42
+        assert memory.data[0x8001] == 0x00
+        assert memory.data[0x8800] == 0x43
+
+    def test_map_rom(self):
+        memory = Memory()
+        memory.map_rom(0xff00, bytes([0xea] * 0x100))
+        memory[0xff10] = 0x00
+        assert memory[0xff10] == 0xea
+        assert memory[0xfe10] == 0x00
+
+    def test_map_rom_file(self, tmp_path):
+        path = tmp_path / 'rom.bin'
+        path.write_bytes(bytes([0xa9] * 0x1000))
+        memory, other = Memory(), Memory()
+        rom = memory.map_rom(0xf000, str(path))
+        other.map_rom(0xf000, str(path))
+        memory[0xf000] = 0x00
+        assert isinstance(rom, np.memmap)
+        assert memory[0xf000] == other[0xf000] == 0xa9
+        assert memory[0xefff] == 0x00
+
+    def test_bank_switching(self):
+        # 128K cartridge seen through a 16K window at 0x8000
+        cartridge = np.repeat(np.arange(8, dtype=np.ubyte), 0x4000)
+        memory = Memory()
+        for bank in range(8):
+            memory.map_region(0x8000, cartridge, offset=bank * 0x4000, size=0x4000)
+            assert memory[0x8000] == memory[0xbfff] == bank
+            memory[0x9000] = 0xf0 | bank
+            assert cartridge[bank * 0x4000 + 0x1000] == 0xf0 | bank
+        assert memory[0xc000] == 0x00
+
+    def test_mirror(self):
+        memory = Memory()
+        memory.mirror(0x0800, 0x1800, 0x0000, 0x0800)
+        memory[0x0001] = 0x11
+        memory[0x1802] = 0x22
+        assert memory[0x0801] == memory[0x1001] == memory[0x1801] == 0x11
+        assert memory[0x0002] == 0x22
+
+    def test_map_device(self):
+        accesses = []
+        memory = Memory()
+        memory.map_device(0xd000, 0x0200, read=lambda address: address & 0xff,
+                          write=lambda address, value: accesses.append((address, value)))
+        memory[0xd1ff] = 0x42
+        assert memory[0xd123] == 0x23
+        assert accesses == [(0xd1ff, 0x42)]
+        assert memory[0xd200] == 0x00
+
+    @pytest.mark.parametrize('address, offset, size', [(0x8001, 0, 0x100), (0x8000, 0, 0x80), (0xff00, 0, 0x200),
+                                                       (0x8000, 0x0f00, 0x200)])
+    def test_map_region_invalid(self, address, offset, size):
+        memory = Memory()
+        with pytest.raises(ValueError):
+            memory.map_region(address, np.zeros(0x1000, dtype=np.ubyte), offset, size)
+
+
+class TestCodeTracking:
+
+    @pytest.fixture(scope='function')
+    def memory(self) -> tuple:
+        memory = Memory()
+        writes = []
+        memory.code_listeners.append(lambda address, size: writes.append((address, size)))  # Both arguments required
+        return memory, writes
+
+    def test_mark_code(self, memory):
+        memory, writes = memory
+        memory.mark_code(0x02f0, 0x20)
+        assert memory.code_pages[0x02] == memory.code_pages[0x03] == 1
+        assert isinstance(memory.write_pages[0x02], CodePage)
+        memory[0x0205] = 0x42
+        memory[0x0205] = 0x42  # Unchanged, not reported
+        memory[0x0310] = 0x01
+        assert writes == [(0x0205, 1), (0x0310, 1)]
+        assert memory[0x0205] == memory.data[0x0205] == 0x42
+
+    def test_data_pages(self, memory):
+        memory, writes = memory
+        memory.mark_code(0x0200)
+        memory[0x0400] = 0x42
+        assert writes == []
+        assert isinstance(memory.write_pages[0x04], memoryview)
+
+    def test_mirror(self, memory):
+        memory, writes = memory
+        memory.mirror(0x0800, 0x0800, 0x0000, 0x0800)
+        memory.mark_code(0x0200)
+        memory[0x0a10] = 0x01
+        memory.mark_code(0x0a00)
+        memory[0x0211] = 0x02
+        assert writes == [(0x0210, 1), (0x0211, 1), (0x0a11, 1)]
+
+    def test_remap(self, memory):
+        memory, writes = memory
+        memory.mark_code(0x8000, 0x200)
+        memory.map_rom(0x8000, bytes(0x100))
+        assert writes == [(0x8000, 0x100)]
+        assert (memory.code_pages[0x80], memory.code_pages[0x81]) == (0, 1)
+        memory.mark_code(0x8000)
+        memory[0x8000] = 0x01  # Written to the ROM sink
+        assert writes == [(0x8000, 0x100)]
+
+    def test_code_written(self, memory):
+        memory, writes = memory
+        memory.mark_code(0x0200)
+        memory.data[0x0100:0x0300] = 0x01
+        memory.code_written(0x0100, 0x100)
+        memory.code_written(0x0100, 0x200)
+        memory.restore_pages(memory.snapshot_pages())
+        assert writes == [(0x0100, 0x200), (0x0000, Memory.MAX_SIZE)]
@@ -47,7 +47,7 @@ class TestBRK:
         setup_cpu.pc = pc
         setup_cpu.execute(1)
         assert setup_cpu.memory[setup_cpu.sp + 0x0101] == bin_ps
-        assert setup_cpu.memory[setup_cpu.sp + 0x0102] == pc_snd + 1
+        assert setup_cpu.memory[setup_cpu.sp + 0x0102] == pc_snd + 2  # Return address skips the padding byte
         assert setup_cpu.memory[setup_cpu.sp + 0x0103] == pc_fst
         assert setup_cpu.ps['break_flag']
         assert setup_cpu.ps['interrupt_flag']
@@ -106,10 +106,23 @@ class TestRTI:
         setup_cpu.memory[0x0200] = 0x40  # RTI instruction
         setup_cpu.sp = 0x60
         setup_cpu.memory[0x0161] = bin_ps
-        setup_cpu.memory[0x0162] = pc_fst
-        setup_cpu.memory[0x0163] = pc_snd
+        setup_cpu.memory[0x0162] = pc_snd  # Return address is little endian on the stack
+        setup_cpu.memory[0x0163] = pc_fst
         expected_pc = pc_snd + (pc_fst << 8)
         setup_cpu.execute(1)
         assert setup_cpu.pc == expected_pc
         assert setup_cpu.ps == ps
         assert setup_cpu.clock.total_clock_cycles == 6
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestIllegalOpcode:
+
+    @pytest.mark.parametrize('opcode', [0x02, 0x37, 0xab, 0xff])
+    def test_illegal_opcode_skipped(self, setup_cpu, opcode):
+        setup_cpu.memory[0x0200] = opcode
+        setup_cpu.acc = 0x12
+        setup_cpu.execute(1)
+        assert setup_cpu.pc == 0x0201
+        assert setup_cpu.acc == 0x12
+        assert setup_cpu.clock.total_clock_cycles == 1
@@ -0,0 +1,44 @@
+import pytest
+
+from cpu6502.cpu import CPU
+from cpu6502.parallel import apply, result_dtype, run_variants
+
+# sta $10 ; asl ; clc ; adc $10 ; sta $11 ; jmp * (stores 3 * A at 0x11)
+PROGRAM = [0x85, 0x10, 0x0a, 0x18, 0x65, 0x10, 0x85, 0x11, 0x4c, 0x08, 0x02]
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestParallel:
+
+    @pytest.fixture(scope='function')
+    def snapshot(self, setup_cpu):
+        for address, value in enumerate(PROGRAM, start=0x0200):
+            setup_cpu.memory[address] = value
+        setup_cpu.pc = 0x0200
+        return setup_cpu.snapshot()
+
+    def test_sweep(self, snapshot):
+        results = run_variants(snapshot, [{'acc': value} for value in range(0x100)], capture=[0x10, 0x11],
+                               workers=2)
+        assert results.dtype == result_dtype([0x10, 0x11])
+        assert results['index'].tolist() == list(range(0x100))
+        assert (results['reason'] == CPU.STOP_TRAP).all()
+        assert (results['pc'] == 0x0208).all()
+        assert results['memory'][:, 0].tolist() == list(range(0x100))
+        assert results['memory'][:, 1].tolist() == [value * 3 & 0xff for value in range(0x100)]
+        assert (results['instructions'] == 6).all()
+        assert (results['cycles'] == results['cycles'][0]).all()
+
+    def test_memory_perturbation(self, snapshot):
+        # Patch the program: asl -> nop, so 2 * A is stored
+        results = run_variants(snapshot, [{'acc': 0x05}, {'acc': 0x05, 0x0202: 0xea}], max_instructions=3,
+                               workers=2, batch_size=1)
+        assert results['reason'].tolist() == [CPU.STOP_INSTRUCTIONS] * 2
+        assert results['acc'].tolist() == [0x0a, 0x05]
+        assert results.dtype.names[-1] == 'cycles'
+
+    def test_apply(self, setup_cpu):
+        apply(setup_cpu, {'idx': 0x12, 'status': 0x24, 0x0300: 0x42})
+        assert (setup_cpu.idx, setup_cpu.status, setup_cpu.memory[0x0300]) == (0x12, 0x24, 0x42)
+        with pytest.raises(ValueError):
+            apply(setup_cpu, {'clock': 0})
@@ -0,0 +1,215 @@
+import numpy as np
+import pytest
+
+from cpu6502.cpu import CPU
+from cpu6502.disassembler import OPCODES
+from cpu6502.functional import SUCCESS_PC, run_functional_test, setup_cpu as setup_functional
+from cpu6502.memory import Memory
+from cpu6502.predecode import PredecodeCache
+from cpu6502.status import NEGATIVE, RESERVED, ZERO
+
+# ldx #5 ; loop: dex ; bne loop ; jmp *
+COUNTDOWN = [0xa2, 0x05, 0xca, 0xd0, 0xfd, 0x4c, 0x05, 0x02]
+# ldx #0 ; loop: lda $3000,x ; sta $4000,x ; inx ; bne loop ; inc $0204 ; inc $0207 ; dec $20 ; bne loop ; jmp *
+# Copies $20 pages from 0x3000 to 0x4000 by patching the high bytes of the absolute operands after every page
+PAGE_COPY = [0xa2, 0x00, 0xbd, 0x00, 0x30, 0x9d, 0x00, 0x40, 0xe8, 0xd0, 0xf7, 0xee, 0x04, 0x02, 0xee, 0x07, 0x02,
+             0xc6, 0x20, 0xd0, 0xed, 0x4c, 0x15, 0x02]
+PAGES_COPIED = 3
+# ldx #4 ; ldy #0 ; copy: lda $30fe,x ; sta $40fe,y ; iny ; cpy #4 ; bne copy ; wait: dex ; bne wait ; cmp #0 ; beq * ;
+# jmp * (every sequence of FUSIONS, the indexed accesses cross pages)
+SEQUENCES = [0xa2, 0x04, 0xa0, 0x00, 0xbd, 0xfe, 0x30, 0x99, 0xfe, 0x40, 0xc8, 0xc0, 0x04, 0xd0, 0xf5, 0xca, 0xd0, 0xfd,
+             0xc9, 0x00, 0xf0, 0xfe, 0x4c, 0x16, 0x02]
+# lda #$80 ; ldx #0 ; php ; inx ; bne * (the flags pushed by php and tested by bne are pending)
+PENDING_FLAGS = [0xa9, 0x80, 0xa2, 0x00, 0x08, 0xe8, 0xd0, 0xfe]
+# ldx #2 ; lda $ffff,x ; ldy #4 ; sta ($10),y ; jmp ($ffff) ; jmp * (every address wraps around past 0xffff)
+WRAPPED_ADDRESSES = [0xa2, 0x02, 0xbd, 0xff, 0xff, 0xa0, 0x04, 0x91, 0x10, 0x6c, 0xff, 0xff, 0x4c, 0x0c, 0x02]
+# ldx #2 ; ldy #3 ; lda $ffff,x ; sta $ffff,y ; jmp * (the fused copy wraps around past 0xffff)
+WRAPPED_COPY = [0xa2, 0x02, 0xa0, 0x03, 0xbd, 0xff, 0xff, 0x99, 0xff, 0xff, 0x4c, 0x0a, 0x02]
+RANDOM_RUNS = 20
+STATES_PER_OPCODE = 6
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestPredecodeCache:
+
+    @staticmethod
+    def load(cpu: CPU, program: list) -> CPU:
+        for address, value in enumerate(program, start=0x0200):
+            cpu.memory[address] = value
+        cpu.pc = 0x0200
+        return cpu
+
+    @staticmethod
+    def interpreted(cpu: CPU, **conditions) -> tuple:
+        # Result and final state of the interpreter from the current state of cpu, which is left unchanged
+        snapshot = cpu.snapshot()
+        result = cpu.run(**conditions)
+        state = cpu.snapshot()
+        cpu.restore(snapshot)
+        return result, state
+
+    @pytest.mark.parametrize('lazy_flags', [False, True])
+    def test_functional(self, lazy_flags):
+        interpreted = run_functional_test(setup_functional())
+        result = run_functional_test(setup_functional(), predecode=True, lazy_flags=lazy_flags)
+        assert result == interpreted
+        assert (result.reason, result.pc) == (CPU.STOP_TRAP, SUCCESS_PC)
+
+    @pytest.fixture(scope='function')
+    def sequences(self, setup_cpu):
+        self.load(setup_cpu, SEQUENCES)
+        setup_cpu.memory[0x3102] = 0x00  # Copied 4 times, cmp #0 ; beq * traps
+        return setup_cpu
+
+    def test_counters(self, setup_cpu):
+        cache = PredecodeCache(self.load(setup_cpu, COUNTDOWN), fuse=False)
+        result = cache.run()
+        assert result == (CPU.STOP_TRAP, 0x0205, 12, 2 + 5 * 2 + 4 * 3 + 2 + 3)
+        assert (cache.misses, cache.hits) == (4, 8)
+        assert (cache.handlers[0x0202] is not None, cache.lengths[0x0203], cache.operands[0x0203]) == (True, 2, 0x0202)
+        assert cache.cycles[0x0205] == 3
+
+    def test_self_modifying_code(self, setup_cpu):
+        self.load(setup_cpu, PAGE_COPY)
+        for offset in range(PAGES_COPIED * 0x100):
+            setup_cpu.memory[0x3000 + offset] = offset * 7 & 0xff
+        setup_cpu.memory[0x20] = PAGES_COPIED
+        expected, state = self.interpreted(setup_cpu)
+        cache = PredecodeCache(setup_cpu)
+        assert cache.run() == expected
+        assert setup_cpu.snapshot() == state
+        assert cache.invalidations == 2 * PAGES_COPIED  # The patched instructions, after every page
+        assert cache.misses == 10 + 2 * (PAGES_COPIED - 1)  # Decoded again unless the loop is over
+
+    @pytest.mark.parametrize('value, pc', [(0x00, 0x0214), (0x80, 0x0216)])
+    def test_fusions(self, sequences, value, pc):
+        sequences.memory[0x3102] = value
+        expected, state = self.interpreted(sequences)
+        cache = PredecodeCache(sequences)
+        result = cache.run()
+        assert result == expected
+        assert (result.reason, result.pc) == (CPU.STOP_TRAP, pc)
+        assert sequences.snapshot() == state
+        assert cache.fusions == {'DEX; BNE': 4, 'CMP #imm; BEQ': 1, 'LDA abs,X; STA abs,Y': 4, 'INY; CPY #imm; BNE': 4}
+        assert (cache.counts[0x020a], cache.lengths[0x020a], cache.cycles[0x020a]) == (3, 5, 6)
+        sequences.memory[0x020c] = 0x05  # cpy #5
+        assert cache.handlers[0x020a] is None
+        assert cache.invalidations == 1
+
+    def test_split_sequences(self, sequences):
+        # Every stop condition met between the instructions of a sequence stops the run there
+        start = sequences.snapshot()
+        expected, _ = self.interpreted(sequences)
+        conditions = [{'max_instructions': count} for count in range(1, expected.instructions)] + \
+                     [{'max_cycles': cycles} for cycles in range(1, expected.cycles)] + \
+                     [{'until_pc': pc} for pc in range(0x0200, 0x0216)]
+        cache = PredecodeCache(sequences)
+        for condition in conditions:
+            expected, state = self.interpreted(sequences, **condition)  # Restoring the memory drops every entry
+            assert cache.run(**condition) == expected, f'{condition}'
+            assert sequences.snapshot() == state, f'{condition}'
+            sequences.restore(start)
+
+    def test_not_fused(self, sequences):
+        expected, _ = self.interpreted(sequences)
+        cache = PredecodeCache(sequences, fuse=False)
+        assert cache.run() == expected
+        assert not any(cache.fusions.values())
+        assert max(cache.counts) == 1
+
+    @pytest.mark.parametrize('conditions', [{'max_instructions': 7}, {'max_cycles': 11}, {'until_pc': 0x0203}])
+    def test_stop_conditions(self, setup_cpu, conditions):
+        self.load(setup_cpu, COUNTDOWN)
+        expected, state = self.interpreted(setup_cpu, **conditions)
+        assert PredecodeCache(setup_cpu).run(**conditions) == expected
+        assert setup_cpu.snapshot() == state
+
+    def test_wrapped_addresses(self, setup_cpu):
+        self.load(setup_cpu, WRAPPED_ADDRESSES)
+        setup_cpu.memory[0x0001], setup_cpu.memory[0x10], setup_cpu.memory[0x11] = 0x5a, 0xff, 0xff
+        setup_cpu.memory[0xffff], setup_cpu.memory[0x0000] = 0x0c, 0x02
+        expected, state = self.interpreted(setup_cpu)
+        assert PredecodeCache(setup_cpu).run() == expected
+        assert setup_cpu.snapshot() == state
+        assert (setup_cpu.pc, setup_cpu.acc, setup_cpu.memory[0x0003]) == (0x020c, 0x5a, 0x5a)
+
+    def test_wrapped_copy(self, setup_cpu):
+        self.load(setup_cpu, WRAPPED_COPY)
+        setup_cpu.memory[0x0001] = 0x5a
+        expected, state = self.interpreted(setup_cpu)
+        cache = PredecodeCache(setup_cpu)
+        assert cache.run() == expected
+        assert setup_cpu.snapshot() == state
+        assert cache.fusions['LDA abs,X; STA abs,Y'] == 1
+        assert setup_cpu.memory[0x0002] == 0x5a
+
+    def test_not_cached(self, setup_cpu):
+        # Opcodes outside of the instruction set are interpreted
+        cache = PredecodeCache(self.load(setup_cpu, [0x02, 0x4c, 0x01, 0x02]))
+        assert cache.run() == (CPU.STOP_TRAP, 0x0201, 2, 4)
+        assert cache.handlers[0x0200] is None
+        assert cache.misses == 1
+
+    def test_memory_replaced(self, setup_cpu):
+        cache = PredecodeCache(self.load(setup_cpu, COUNTDOWN))
+        cache.run()
+        setup_cpu.memory = Memory()
+        self.load(setup_cpu, [0xa9, 0x42, 0x4c, 0x02, 0x02])
+        assert cache.run() == (CPU.STOP_TRAP, 0x0202, 2, 5)
+        assert setup_cpu.acc == 0x42
+
+    @pytest.mark.parametrize('lazy_flags', [False, True])
+    def test_matches_cpu(self, setup_cpu, lazy_flags):
+        # Every opcode from random states, twice in a row (decoded, then cached), compared with the interpreter of a
+        # second cpu restored to the same state before each execution
+        rng = np.random.default_rng(6502)
+        cache = PredecodeCache(setup_cpu, lazy_flags=lazy_flags)
+        reference = CPU()
+        reference.memory = Memory()
+        opcodes = np.repeat(sorted(OPCODES), STATES_PER_OPCODE)
+        for opcode in opcodes:
+            setup_cpu.memory.data[:] = rng.integers(0, 0x100, Memory.MAX_SIZE, dtype=np.ubyte)
+            setup_cpu.memory.code_written(0x0000, Memory.MAX_SIZE)
+            setup_cpu.memory[0x0200] = int(opcode)
+            registers = [int(register) for register in rng.integers(0, 0x100, 5)]
+            for execution in range(2):
+                setup_cpu.pc = 0x0200
+                setup_cpu.acc, setup_cpu.idx, setup_cpu.idy, setup_cpu.sp, setup_cpu.status = registers
+                setup_cpu.status |= RESERVED
+                reference.restore(setup_cpu.snapshot())
+                expected = reference.run(max_instructions=1, trap=False)
+                assert cache.run(max_instructions=1, trap=False) == expected, f'{OPCODES[opcode]}'
+                assert setup_cpu.snapshot() == reference.snapshot(), f'{OPCODES[opcode]}'
+        assert cache.hits + cache.misses == 2 * len(opcodes)
+        assert cache.hits > 0.9 * len(opcodes)  # Unless the first execution wrote to the instruction
+
+    def test_lazy_flags(self, setup_cpu):
+        self.load(setup_cpu, PENDING_FLAGS)
+        expected, state = self.interpreted(setup_cpu)
+        cache = PredecodeCache(setup_cpu, lazy_flags=True)
+        assert cache.run() == expected
+        assert setup_cpu.snapshot() == state
+        assert setup_cpu.memory[0x0100 + ((setup_cpu.sp + 1) & 0xff)] & (NEGATIVE | ZERO) == ZERO
+        assert setup_cpu.status & (NEGATIVE | ZERO) == 0
+        assert cache.pending.value is None
+
+    @pytest.mark.parametrize('lazy_flags', [False, True])
+    def test_random_programs(self, setup_cpu, lazy_flags):
+        # Differential check against the interpreter of a second cpu, the runs of random lengths stop with flags pending
+        rng = np.random.default_rng(6502)
+        cache = PredecodeCache(setup_cpu, lazy_flags=lazy_flags)
+        reference = CPU()
+        reference.memory = Memory()
+        for run in range(RANDOM_RUNS):
+            setup_cpu.memory.data[:] = rng.integers(0, 0x100, Memory.MAX_SIZE, dtype=np.ubyte)
+            setup_cpu.memory.code_written(0x0000, Memory.MAX_SIZE)
+            setup_cpu.pc = 0x0200
+            setup_cpu.acc, setup_cpu.idx, setup_cpu.idy, setup_cpu.sp, setup_cpu.status = \
+                map(int, rng.integers(0, 0x100, 5))
+            reference.restore(setup_cpu.snapshot())
+            for length in map(int, rng.integers(1, 50, 10)):
+                expected = reference.run(max_instructions=length)
+                assert cache.run(max_instructions=length) == expected, f'run {run}'
+                assert setup_cpu.snapshot() == reference.snapshot(), f'run {run}'
+                if expected.reason != CPU.STOP_INSTRUCTIONS:
+                    break
@@ -0,0 +1,60 @@
+import pytest
+
+from cpu6502.cpu import CPU
+from cpu6502.profiler import Profiler
+
+# ldx #$05 ; loop: dex ; bne loop ; jmp *
+PROGRAM = [0xa2, 0x05, 0xca, 0xd0, 0xfd, 0x4c, 0x05, 0x02]
+
+
+@pytest.fixture(scope='function')
+def setup_program(setup_cpu) -> CPU:
+    for address, value in enumerate(PROGRAM, start=0x0200):
+        setup_cpu.memory[address] = value
+    setup_cpu.pc = 0x0200
+    return setup_cpu
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestProfiler:
+
+    def test_counts(self, setup_program):
+        with Profiler(setup_program) as profiler:
+            result = setup_program.run()
+        assert result.reason == CPU.STOP_TRAP
+        assert profiler.instructions == result.instructions == 12
+        assert profiler.cycles == result.cycles
+        assert profiler.pc_counts[0x0200:0x0206].tolist() == [1, 0, 5, 5, 0, 1]
+        assert profiler.opcode_counts[0xca] == 5
+        assert profiler.opcode_cycles[0xca] == 10
+        assert profiler.pc_cycles[0x0205] == 3
+
+    def test_detach(self, setup_program):
+        table = setup_program.instructions.dispatch_table
+        profiler = Profiler(setup_program)
+        assert setup_program.instructions.dispatch_table is not table
+        with pytest.raises(ValueError):
+            profiler.attach(setup_program)
+        profiler.detach()
+        assert setup_program.instructions.dispatch_table is table
+        setup_program.execute(3)
+        assert profiler.instructions == 0
+
+    def test_execute_and_flush(self, setup_program, monkeypatch):
+        monkeypatch.setattr(Profiler, 'FLUSH_SIZE', 2)
+        profiler = Profiler(setup_program)
+        setup_program.execute(5)
+        assert len(profiler._buffer) == 1
+        assert profiler.instructions == 5
+        profiler.clear()
+        assert profiler.instructions == 0
+        profiler.detach()
+
+    def test_report(self, setup_program):
+        with Profiler(setup_program) as profiler:
+            setup_program.run()
+        assert profiler.hot_pcs(2) == [(0x0203, 5, 14), (0x0202, 5, 10)]  # BNE is taken 4 times
+        assert profiler.loops(setup_program.memory) == [(0x0202, 0x0205, 5, 10, 24)]
+        report = profiler.report(setup_program.memory)
+        assert '0202 - 0204: 5 iterations, 10 instructions, 24 cycles' in report
+        assert '0203 BNE $0202' in report
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from cpu6502.runner import load, main, run
+
+ROM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '6502_functional_test.bin')
+
+PROGRAM = bytes([0xa2, 0x00,  # LDX #$00
+                 0xe8,  # INX
+                 0xe0, 0x05,  # CPX #$05
+                 0xd0, 0xfb,  # BNE -5
+                 0x8e, 0x00, 0xf0,  # STX $F000
+                 0x4c, 0x0a, 0x02])  # JMP $020A
+
+
+@pytest.fixture(scope='function')
+def program(tmp_path) -> str:
+    path = tmp_path / 'program.bin'
+    path.write_bytes(PROGRAM)
+    return str(path)
+
+
+class TestRunner:
+
+    def test_load(self, program):
+        cpu = load(program, load_address=0x0200, entry_pc=0x0200)
+        assert cpu.pc == 0x0200
+        assert cpu.memory[0x0200] == 0xa2
+        assert cpu.clock.total_clock_cycles == 0
+
+    def test_load_reset_vector(self, tmp_path):
+        path = tmp_path / 'rom.bin'
+        path.write_bytes(bytes(0x0ffc) + bytes([0x34, 0x12, 0x00, 0x00]))
+        assert load(str(path), load_address=0xf000).pc == 0x1234
+
+    def test_run_trap(self, program):
+        report = run(load(program, load_address=0x0200, entry_pc=0x0200))
+        assert report.reason == 'trap'
+        assert report.pc == 0x020a
+        assert report.instructions == 1 + 5 * 3 + 2
+        assert report.cycles == 2 + 5 * (2 + 2 + 3) - 1 + 4 + 3
+
+    @pytest.mark.parametrize('kwargs, reason, pc', [({'max_instructions': 4}, 'instructions', 0x0202),
+                                                    ({'max_cycles': 4}, 'cycles', 0x0203),
+                                                    ({'breakpoints': [0x0207]}, 'breakpoint', 0x0207)])
+    def test_run_stop_conditions(self, program, kwargs, reason, pc):
+        report = run(load(program, load_address=0x0200, entry_pc=0x0200), **kwargs)
+        assert report.reason == reason
+        assert report.pc == pc
+
+    def test_main(self, program, capsys):
+        assert main([program, '--load-address', '0x200', '--entry-pc', '0x200', '--success-pc', '0x20a',
+                     '--console', '0xf000']) == 0
+        output = capsys.readouterr().out
+        assert '\x05' in output
+        assert 'Stopped (trap) at 0x20a after 18 instructions' in output
+
+    def test_main_failure(self, program, capsys):
+        assert main([program, '--load-address', '0x200', '--entry-pc', '0x200', '--success-pc', '0x300']) == 1
+        assert main([program, '--load-address', '0xfffe']) == 2
+
+    def test_main_functional_rom(self, capsys):
+        assert main([ROM_PATH, '--load-address', '0xa', '--entry-pc', '0x400', '--max-instructions', '1000']) == 0
+        assert 'Stopped (instructions) at' in capsys.readouterr().out
+
+    def test_main_profile(self, program, capsys):
+        assert main([program, '--load-address', '0x200', '--entry-pc', '0x200', '--profile', '3']) == 0
+        output = capsys.readouterr().out
+        assert '18 instructions' in output
+        assert 'Hot opcodes:' in output and 'Hot loops:' in output
+
+    def test_main_trace(self, program, tmp_path, capsys):
+        trace = str(tmp_path / 'trace.log')
+        assert main([program, '--load-address', '0x200', '--entry-pc', '0x200', '--trace', trace,
+                     '--trace-size', '4']) == 0
+        lines = open(trace).read().splitlines()
+        assert len(lines) == 4
+        assert lines[-1].startswith('020A  ')
+
+    def test_main_predecode(self, capsys):
+        assert main([ROM_PATH, '--load-address', '0xa', '--entry-pc', '0x400', '--max-instructions', '100000',
+                     '--predecode']) == 0
+        output = capsys.readouterr().out
+        assert 'Stopped (instructions) at' in output
+        assert 'Fused sequences: DEX; BNE: ' in output
+        assert main([ROM_PATH, '--predecode', '--profile']) == 2
@@ -0,0 +1,69 @@
+import pytest
+
+from cpu6502.memory import Memory
+from cpu6502.snapshot import Snapshot
+
+# ldx #$05 ; loop: dex ; txa ; sta $0300,x ; bne loop ; jmp *
+PROGRAM = [0xa2, 0x05, 0xca, 0x8a, 0x9d, 0x00, 0x03, 0xd0, 0xf9, 0x4c, 0x09, 0x02]
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestSnapshot:
+
+    @pytest.fixture(scope='function')
+    def setup_program(self, setup_cpu):
+        for address, value in enumerate(PROGRAM, start=0x0200):
+            setup_cpu.memory[address] = value
+        setup_cpu.pc = 0x0200
+        return setup_cpu
+
+    def test_restore(self, setup_program):
+        cpu = setup_program
+        cpu.execute(5)
+        snapshot = cpu.snapshot()
+        assert (snapshot.pc, snapshot.idx) == (0x0202, 0x04)
+        first = cpu.run()
+        cpu.restore(snapshot)
+        assert (cpu.pc, cpu.idx, cpu.status, cpu.clock.total_clock_cycles) == \
+            (snapshot.pc, snapshot.idx, snapshot.status, snapshot.cycles)
+        assert cpu.memory[0x0304] == 0x04
+        assert cpu.memory[0x0303] == 0x00
+        assert cpu.run() == first
+        assert cpu.memory[0x0301] == 0x01
+
+    def test_shared_pages(self, setup_program):
+        cpu = setup_program
+        first = cpu.snapshot()
+        cpu.memory[0x0301] = 0x42
+        second = cpu.snapshot()
+        changed = [page for page in range(Memory.PAGES) if first.pages[page] is not second.pages[page]]
+        assert changed == [0x03]
+        assert first.pages[0x03][0x01] == 0x00
+        assert second.pages[0x03][0x01] == 0x42
+        assert cpu.snapshot().pages == second.pages
+
+    def test_restore_on_another_cpu(self, setup_program, setup_cpu):
+        snapshot = setup_program.snapshot()
+        other = type(setup_program)()
+        other.memory = Memory()
+        other.restore(snapshot)
+        assert other.snapshot() == snapshot
+        assert other.memory[0x0200] == 0xa2
+
+    def test_image(self, setup_program):
+        image = setup_program.snapshot().image
+        assert len(image) == Memory.MAX_SIZE
+        assert image[0x0200:0x0200 + len(PROGRAM)].tolist() == PROGRAM
+
+    def test_invalid_pages(self, setup_program):
+        with pytest.raises(ValueError):
+            setup_program.memory.restore_pages((bytes(Memory.PAGE_SIZE),) * 10)
+
+    def test_save_load(self, setup_program, tmp_path):
+        setup_program.execute(5)
+        snapshot = setup_program.snapshot()
+        path = str(tmp_path / 'state.npz')
+        snapshot.save(path)
+        assert Snapshot.load(path) == snapshot
+        # Every distinct page is stored once, the empty pages compress away
+        assert (tmp_path / 'state.npz').stat().st_size < 4096
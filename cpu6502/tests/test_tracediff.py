@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from cpu6502.tracediff import diff_traces, main, parse_hex, parse_text
+from cpu6502.tracer import TRACE_DTYPE
+
+NESTEST = """C000  4C F5 C5  JMP $C5F5                       A:00 X:00 Y:00 P:24 SP:FD PPU:  0, 21 CYC:7
+C5F5  A2 00     LDX #$00                        A:00 X:00 Y:00 P:24 SP:FD PPU:  0, 30 CYC:10
+C5F7  86 00     STX $00 = 00                    A:00 X:00 Y:00 P:26 SP:FD PPU:  0, 36 CYC:12
+"""
+
+
+def make_trace(count: int = 100) -> np.ndarray:
+    records = np.zeros(count, dtype=TRACE_DTYPE)
+    records['pc'] = 0x0200 + np.arange(count)
+    records['opcode'] = 0xea
+    records['x'] = np.arange(count)
+    records['p'] = 0x20
+    records['sp'] = 0xfd
+    records['cycles'] = 7 + 2 * np.arange(count)
+    return records
+
+
+@pytest.fixture(scope='function')
+def traces(tmp_path):
+    def save(name: str, records: np.ndarray) -> str:
+        path = str(tmp_path / name)
+        np.save(path, records)
+        return path
+    return save
+
+
+class TestTraceDiff:
+
+    def test_parse_hex(self):
+        assert parse_hex(np.array([b'00', b'fF', b'A5'])).tolist() == [0x00, 0xff, 0xa5]
+        assert parse_hex(np.array([b'C5F5'])).tolist() == [0xc5f5]
+
+    def test_parse_nestest(self):
+        records, present = parse_text(NESTEST + 'not a trace line\n')
+        assert all(present[field].all() for field in TRACE_DTYPE.names)
+        assert records['pc'].tolist() == [0xc000, 0xc5f5, 0xc5f7]
+        assert records['opcode'].tolist() == [0x4c, 0xa2, 0x86]
+        assert records['p'].tolist() == [0x24, 0x24, 0x26]
+        assert records['sp'].tolist() == [0xfd] * 3
+        assert records['cycles'].tolist() == [7, 10, 12]
+
+    def test_parse_key_value(self):
+        records, present = parse_text('PC:C000 A:01 X:02 Y:03 SP:FD P:24\nPC:C003 A:01 X:02 Y:04 SP:FD P:A4\n')
+        assert {field for field in TRACE_DTYPE.names if present[field].all()} == {'pc', 'a', 'x', 'y', 'sp', 'p'}
+        assert not present['opcode'].any() and not present['cycles'].any()
+        assert records['y'].tolist() == [0x03, 0x04]
+        assert records['p'].tolist() == [0x24, 0xa4]
+
+    def test_equal(self, traces):
+        assert diff_traces(traces('a.npy', make_trace()), traces('b.npy', make_trace()), chunk_size=7) is None
+
+    def test_divergence(self, traces):
+        reference = make_trace()
+        reference['p'][57] |= 0x01
+        reference['a'][57] = 0x42
+        reference['a'][80] = 0x42
+        divergence = diff_traces(traces('a.npy', make_trace()), traces('b.npy', reference), context=3,
+                                 chunk_size=10)
+        assert divergence.index == 57
+        assert divergence.fields == [('a', 0x00, 0x42), ('p', 0x20, 0x21)]
+        assert divergence.context_start == 54
+        assert divergence.ours['pc'].tolist() == list(range(0x0200 + 54, 0x0200 + 61))
+        assert '(carry_flag)' in str(divergence)
+        assert '>         57  0239' in str(divergence)
+
+    def test_early_divergence(self, traces):
+        # Fewer records than the context before the divergence
+        reference = make_trace()
+        reference['x'][3] = 0x42
+        divergence = diff_traces(traces('a.npy', make_trace()), traces('b.npy', reference), context=5)
+        assert divergence.index == 3
+        assert divergence.context_start == 0
+        assert divergence.ours['pc'].tolist()[:4] == list(range(0x0200, 0x0204))
+
+    def test_ignore_and_mask(self, traces):
+        reference = make_trace()
+        reference['p'] |= 0x10
+        reference['cycles'] += 100
+        ours, reference = traces('a.npy', make_trace()), traces('b.npy', reference)
+        assert diff_traces(ours, reference).fields == [('p', 0x20, 0x30)]
+        assert diff_traces(ours, reference, p_mask=0xef) is None
+        assert diff_traces(ours, reference, ignore=('p',)) is None
+        assert diff_traces(ours, reference, ignore=('p',), relative_cycles=False).fields == [('cycles', 7, 107)]
+
+    @pytest.mark.parametrize('chunk_size', [2, 3, 100])
+    def test_missing_field(self, tmp_path, chunk_size):
+        # A late line without cycles is compared without them, whatever the chunk it is read in
+        lines = [f'{0xc000 + offset:04X}  EA        NOP  A:00 X:00 Y:00 P:24 SP:FD CYC:{7 + 2 * offset}'
+                 for offset in range(8)]
+        ours, reference = tmp_path / 'ours.log', tmp_path / 'reference.log'
+        ours.write_text('\n'.join(lines) + '\n')
+        lines[6] = lines[6].split(' CYC:')[0]
+        reference.write_text('\n'.join(lines) + '\n')
+        assert diff_traces(str(ours), str(reference), chunk_size=chunk_size) is None
+        lines[7] = lines[7].replace('X:00', 'X:01').replace('CYC:21', 'CYC:22')
+        reference.write_text('\n'.join(lines) + '\n')
+        divergence = diff_traces(str(ours), str(reference), chunk_size=chunk_size)
+        assert (divergence.index, divergence.fields) == (7, [('x', 0x00, 0x01), ('cycles', 14, 15)])
+
+    def test_length(self, traces):
+        divergence = diff_traces(traces('a.npy', make_trace(100)), traces('b.npy', make_trace(90)), chunk_size=8)
+        assert divergence.index == 90
+        assert divergence.fields == [('length', 100, 90)]
+        assert 'reference ends after 90 instructions' in str(divergence)
+
+    def test_text_against_binary(self, traces, tmp_path):
+        records, _ = parse_text(NESTEST)
+        log = tmp_path / 'nestest.log'
+        log.write_text(NESTEST)
+        records['x'][2] = 0x01
+        divergence = diff_traces(traces('a.npy', records), str(log))
+        assert divergence.index == 2
+        assert divergence.fields == [('x', 0x01, 0x00)]
+
+    def test_main(self, traces, capsys):
+        ours = traces('a.npy', make_trace())
+        assert main([ours, traces('b.npy', make_trace())]) == 0
+        assert main([ours, traces('c.npy', make_trace(50))]) == 1
+        assert 'diverge at instruction 50' in capsys.readouterr().out
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from cpu6502.cpu import CPU
+from cpu6502.profiler import Profiler
+from cpu6502.tracer import TRACE_DTYPE, Tracer
+
+# ldx #$05 ; loop: dex ; bne loop ; jmp *
+PROGRAM = [0xa2, 0x05, 0xca, 0xd0, 0xfd, 0x4c, 0x05, 0x02]
+
+
+@pytest.fixture(scope='function')
+def setup_program(setup_cpu) -> CPU:
+    for address, value in enumerate(PROGRAM, start=0x0200):
+        setup_cpu.memory[address] = value
+    setup_cpu.pc = 0x0200
+    return setup_cpu
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestTracer:
+
+    def test_records(self, setup_program):
+        setup_program.acc = 0x42
+        with Tracer(setup_program) as tracer:
+            result = setup_program.run()
+        records = tracer.records()
+        assert len(tracer) == len(records) == result.instructions == 12
+        assert records['pc'].tolist() == [0x200] + [0x202, 0x203] * 5 + [0x205]
+        assert records['x'].tolist()[:4] == [0x00, 0x05, 0x04, 0x04]
+        assert (records['a'] == 0x42).all()
+        # The state before every instruction, the trapping one included
+        assert records['cycles'][0] == 0
+        assert records['cycles'][1] == 2
+        assert records[-1]['opcode'] == 0x4c
+
+    def test_ring(self, setup_program, monkeypatch):
+        monkeypatch.setattr(Tracer, 'CHUNK_SIZE', 3)
+        with Tracer(setup_program, size=4) as tracer:
+            setup_program.run()
+        assert len(tracer) == 4
+        assert tracer.recorded == 12
+        assert tracer.records()['pc'].tolist() == [0x203, 0x202, 0x203, 0x205]
+        assert tracer.last(2)['pc'].tolist() == [0x203, 0x205]
+        tracer.clear()
+        assert len(tracer) == 0
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            Tracer(size=0)
+
+    def test_stacked_hooks(self, setup_program):
+        table = setup_program.instructions.dispatch_table
+        profiler = Profiler(setup_program)
+        tracer = Tracer(setup_program)
+        setup_program.run()
+        tracer.detach()
+        profiler.detach()
+        assert setup_program.instructions.dispatch_table is table
+        assert profiler.instructions == len(tracer) == 12
+
+    def test_format(self, setup_program):
+        setup_program.sp = 0xfd
+        with Tracer(setup_program) as tracer:
+            setup_program.execute(1)
+        record = tracer.records()[0]
+        assert Tracer.format_record(record, setup_program.memory) == \
+            '0200  A2 05     LDX #$05                        A:00 X:00 Y:00 P:' \
+            f'{int(record["p"]):02X} SP:FD CYC:0'
+        assert Tracer.format_record(record).startswith('0200  A2                ')
+
+    def test_save(self, setup_program, tmp_path):
+        with Tracer(setup_program) as tracer:
+            setup_program.run()
+        tracer.save(str(tmp_path / 'trace.npy'))
+        loaded = np.load(str(tmp_path / 'trace.npy'))
+        assert loaded.dtype == TRACE_DTYPE
+        assert (loaded == tracer.records()).all()
+        tracer.save(str(tmp_path / 'trace.log'), setup_program.memory)
+        lines = (tmp_path / 'trace.log').read_text().splitlines()
+        assert len(lines) == 12
+        assert lines[-1].startswith('0205  4C 05 02  JMP $0205')
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from cpu6502.cpu import CPU
+from cpu6502.functional import SUCCESS_PC, run_functional_test, setup_cpu as setup_functional
+from cpu6502.translator import Translator
+
+# ldx #0 ; loop: lda $3000,x ; sta $4000,x ; inx ; bne loop ; inc $0204 ; inc $0207 ; dec $20 ; bne loop ; jmp *
+# Copies $20 pages from 0x3000 to 0x4000 by patching the high bytes of the absolute operands after every page
+PAGE_COPY = [0xa2, 0x00, 0xbd, 0x00, 0x30, 0x9d, 0x00, 0x40, 0xe8, 0xd0, 0xf7, 0xee, 0x04, 0x02, 0xee, 0x07, 0x02,
+             0xc6, 0x20, 0xd0, 0xed, 0x4c, 0x15, 0x02]
+PAGES_COPIED = 3
+# loop: lda #1 ; sta $10 ; inc $0201 ; jmp loop (the immediate operand is patched by the block itself)
+PATCHED_IMMEDIATE = [0xa9, 0x01, 0x85, 0x10, 0xee, 0x01, 0x02, 0x4c, 0x00, 0x02]
+# ldx #2 ; lda $ffff,x ; ldy #4 ; sta $fffe,y ; sta ($10),y ; jmp * (every address wraps around past 0xffff)
+WRAPPED_ADDRESSES = [0xa2, 0x02, 0xbd, 0xff, 0xff, 0xa0, 0x04, 0x99, 0xfe, 0xff, 0x91, 0x10, 0x4c, 0x0c, 0x02]
+RANDOM_RUNS = 20
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestTranslator:
+
+    @pytest.fixture(scope='function')
+    def page_copy(self, setup_cpu):
+        for address, value in enumerate(PAGE_COPY, start=0x0200):
+            setup_cpu.memory[address] = value
+        for offset in range(PAGES_COPIED * 0x100):
+            setup_cpu.memory[0x3000 + offset] = offset * 7 & 0xff
+        setup_cpu.memory[0x20] = PAGES_COPIED
+        setup_cpu.pc = 0x0200
+        return setup_cpu
+
+    @staticmethod
+    def interpreted(cpu: CPU, **conditions) -> tuple:
+        # Result and final state of the interpreter from the current state of cpu, which is left unchanged
+        snapshot = cpu.snapshot()
+        result = cpu.run(**conditions)
+        state = cpu.snapshot()
+        cpu.restore(snapshot)
+        return result, state
+
+    def test_functional(self):
+        interpreted = run_functional_test(setup_functional())
+        result = run_functional_test(setup_functional(), translate=True)
+        assert result == interpreted
+        assert (result.reason, result.pc) == (CPU.STOP_TRAP, SUCCESS_PC)
+
+    def test_self_modifying_code(self, page_copy):
+        expected, state = self.interpreted(page_copy)
+        translator = Translator(page_copy)
+        assert translator.run() == expected
+        assert page_copy.snapshot() == state
+        assert [page_copy.memory[0x4000 + offset] for offset in range(PAGES_COPIED * 0x100)] == \
+               [offset * 7 & 0xff for offset in range(PAGES_COPIED * 0x100)]
+        assert translator.translations > 0
+        assert translator.invalidations > 0
+
+    def test_block_patching_itself(self, setup_cpu):
+        for address, value in enumerate(PATCHED_IMMEDIATE, start=0x0200):
+            setup_cpu.memory[address] = value
+        setup_cpu.pc = 0x0200
+        expected, state = self.interpreted(setup_cpu, max_instructions=400)
+        assert Translator(setup_cpu).run(max_instructions=400) == expected
+        assert setup_cpu.snapshot() == state
+        assert setup_cpu.memory[0x10] == 100
+
+    def test_wrapped_addresses(self, setup_cpu):
+        for address, value in enumerate(WRAPPED_ADDRESSES, start=0x0200):
+            setup_cpu.memory[address] = value
+        setup_cpu.memory[0x0001], setup_cpu.memory[0x10], setup_cpu.memory[0x11] = 0x5a, 0xff, 0xff
+        setup_cpu.pc = 0x0200
+        expected, state = self.interpreted(setup_cpu)
+        translator = Translator(setup_cpu)
+        translator.HOT_THRESHOLD = 1
+        assert translator.run() == expected
+        assert setup_cpu.snapshot() == state
+        assert (setup_cpu.acc, setup_cpu.memory[0x0002], setup_cpu.memory[0x0003]) == (0x5a, 0x5a, 0x5a)
+
+    @pytest.mark.parametrize('conditions', [{'max_instructions': 1000}, {'max_cycles': 3001},
+                                            {'until_pc': 0x0208}, {'until_pc': 0x0211}])
+    def test_stop_conditions(self, page_copy, conditions):
+        expected, state = self.interpreted(page_copy, **conditions)
+        translator = Translator(page_copy)
+        translator.HOT_THRESHOLD = 1
+        assert translator.run(**conditions) == expected
+        assert page_copy.snapshot() == state
+
+    def test_blocks(self, page_copy):
+        translator = Translator(page_copy)
+        block = translator.translate(0x0202)
+        # The taken branches leave the block, it follows their fall-through up to jmp *
+        assert block.ranges == ((0x0202, 0x0218),)
+        assert block.length == 9
+        assert translator.code[0x0202] == translator.code[0x0217] == 1
+        assert translator.translate(0x0215).length == 1  # jmp *
+        page_copy.memory[0x0300] = 0xff  # Not an instruction
+        assert translator.translate(0x0300) is None
+
+    def test_host_writes(self, page_copy):
+        translator = Translator(page_copy)
+        translator.HOT_THRESHOLD = 1
+        translator.run(until_pc=0x020b)
+        assert 0x0202 in translator.blocks
+        page_copy.memory[0x0207] = 0x41  # sta $4000,x -> sta $4100,x
+        assert 0x0202 not in translator.blocks
+        assert translator.code[0x0207] == 0
+        page_copy.pc = 0x0200
+        translator.run(until_pc=0x020b)
+        assert page_copy.memory[0x41ff] == 0xff * 7 & 0xff
+        page_copy.memory.data[0x0207] = 0x42  # Bypasses the page tables
+        page_copy.memory.code_written(0x0207)
+        assert 0x0202 not in translator.blocks
+
+    def test_interpreted_writes(self, page_copy):
+        # The interpreter patches the code of the translated inner loop between two translated runs
+        translator = Translator(page_copy)
+        translator.HOT_THRESHOLD = 1
+        translator.run(until_pc=0x020b)
+        page_copy.run(until_pc=0x0202)
+        assert page_copy.memory[0x0204] == 0x31
+        translator.run(until_pc=0x020b)
+        assert [page_copy.memory[0x4100 + offset] for offset in range(0x100)] == \
+               [offset * 7 & 0xff for offset in range(0x100, 0x200)]
+
+    def test_random_programs(self, setup_cpu):
+        rng = np.random.default_rng(6502)
+        translator = Translator(setup_cpu)
+        translator.HOT_THRESHOLD = 1
+        for run in range(RANDOM_RUNS):
+            setup_cpu.memory.data[:] = rng.integers(0, 0x100, len(setup_cpu.memory.data), dtype=np.ubyte)
+            setup_cpu.memory.code_written(0x0000, len(setup_cpu.memory.data))  # Drops the blocks of the previous run
+            setup_cpu.pc = 0x0200
+            setup_cpu.acc, setup_cpu.idx, setup_cpu.idy, setup_cpu.sp, setup_cpu.status = \
+                map(int, rng.integers(0, 0x100, 5))
+            expected, state = self.interpreted(setup_cpu, max_instructions=300)
+            assert translator.run(max_instructions=300) == expected, f'run {run}'
+            assert setup_cpu.snapshot() == state, f'run {run}'
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from cpu6502.cpu import CPU
+from cpu6502.disassembler import OPCODES
+from cpu6502.parallel import result_dtype
+from cpu6502.status import RESERVED
+from cpu6502.vector import VectorCPU
+
+# sta $10 ; asl ; clc ; adc $10 ; sta $11 ; jmp * (stores 3 * A at 0x11)
+PROGRAM = [0x85, 0x10, 0x0a, 0x18, 0x65, 0x10, 0x85, 0x11, 0x4c, 0x08, 0x02]
+STATES_PER_OPCODE = 6
+
+
+@pytest.mark.usefixtures('setup_cpu')
+class TestVectorCPU:
+
+    @pytest.fixture(scope='function')
+    def snapshot(self, setup_cpu):
+        for address, value in enumerate(PROGRAM, start=0x0200):
+            setup_cpu.memory[address] = value
+        setup_cpu.pc = 0x0200
+        return setup_cpu.snapshot()
+
+    def test_sweep(self, snapshot):
+        engine = VectorCPU.from_snapshot(snapshot, 0x100)
+        engine.acc[:] = np.arange(0x100)
+        results = engine.run(capture=[0x10, 0x11])
+        assert results.dtype == result_dtype([0x10, 0x11])
+        assert (results['reason'] == CPU.STOP_TRAP).all()
+        assert (results['pc'] == 0x0208).all()
+        assert results['memory'][:, 0].tolist() == list(range(0x100))
+        assert results['memory'][:, 1].tolist() == [value * 3 & 0xff for value in range(0x100)]
+        assert (results['instructions'] == 6).all()
+        assert (results['cycles'] - snapshot.cycles == 16).all()
+
+    def test_stop_conditions(self, snapshot):
+        engine = VectorCPU.from_snapshot(snapshot, 3)
+        engine.pc[1:] = 0x0204, 0x0206
+        results = engine.run(max_instructions=2)
+        assert results['reason'].tolist() == [CPU.STOP_INSTRUCTIONS, CPU.STOP_INSTRUCTIONS, CPU.STOP_TRAP]
+        assert engine.pc.tolist() == [0x0203, 0x0208, 0x0208]
+        results = engine.run(until_pc=0x0206, max_cycles=100)
+        assert results['reason'].tolist() == [CPU.STOP_BREAKPOINT, CPU.STOP_TRAP, CPU.STOP_TRAP]
+        assert engine.instructions.tolist() == [4, 3, 3]
+        with pytest.raises(ValueError):
+            engine.run(trap=False)
+
+    def test_snapshot_round_trip(self, setup_cpu, snapshot):
+        engine = VectorCPU.from_snapshot(snapshot, 2)
+        engine.acc[1] = 0x21
+        engine.run()
+        setup_cpu.restore(engine.snapshot(1))
+        assert (setup_cpu.pc, setup_cpu.acc, setup_cpu.memory[0x11]) == (0x0208, 0x63, 0x63)
+        assert setup_cpu.clock.total_clock_cycles == engine.cycles[1]
+
+    def test_matches_cpu(self, setup_cpu):
+        # Every opcode from random states, one instance per state, compared with the cpu instruction by instruction
+        rng = np.random.default_rng(6502)
+        opcodes = np.repeat(sorted(OPCODES), STATES_PER_OPCODE)
+        engine = VectorCPU(len(opcodes), rng.integers(0, 0x100, 0x10000, dtype=np.ubyte))
+        engine.memory[:, :0x100] = rng.integers(0, 0x100, (len(opcodes), 0x100), dtype=np.ubyte)
+        engine.memory[:, 0x0200] = opcodes
+        engine.memory[:, 0x0201:0x0203] = rng.integers(0, 0x100, (len(opcodes), 2), dtype=np.ubyte)
+        for register in ('acc', 'idx', 'idy', 'sp', 'status'):
+            getattr(engine, register)[:] = rng.integers(0, 0x100, len(opcodes))
+        engine.status |= RESERVED
+        engine.pc[:] = 0x0200
+        before = [engine.snapshot(instance) for instance in range(len(opcodes))]
+        engine.run(max_instructions=1, trap=False)
+        for instance, snapshot in enumerate(before):
+            setup_cpu.restore(snapshot)
+            setup_cpu.run(max_instructions=1, trap=False)
+            expected = setup_cpu.snapshot()
+            actual = engine.snapshot(instance)
+            assert actual[:7] == expected[:7], f'{OPCODES[opcodes[instance]]} from {snapshot[:7]}'
+            assert actual.pages == expected.pages, f'{OPCODES[opcodes[instance]]} from {snapshot[:7]}'
+
+    def test_illegal_opcode(self):
+        engine = VectorCPU(1)
+        engine.memory[0, 0x0200] = 0x02
+        engine.pc[:] = 0x0200
+        engine.step()
+        assert (engine.pc[0], engine.cycles[0], engine.status[0]) == (0x0201, 1, RESERVED)
@@ -0,0 +1,287 @@
+"""
+Trace diff: finds the first instruction at which two execution traces diverge, e.g. a trace of this emulator against
+the log of a reference emulator.
+
+Traces are read in chunks, either as .npy files of TRACE_DTYPE records (cpu6502.tracer) or as text logs with one
+instruction per line: nestest style ('C000  4C F5 C5  JMP $C5F5  A:00 X:00 Y:00 P:24 SP:FD ... CYC:7') or key value
+style ('PC:C000 A:00 X:00 Y:00 P:24 SP:FD'). Lines without registers are skipped. Chunks are parsed and compared
+with vectorised NumPy operations, a field is compared only on the records where both traces have it.
+
+Usage: python -m cpu6502.tracediff ours.npy reference.log [--context 5] [--ignore cycles] [--p-mask 0xcf]
+                                    [--absolute-cycles] [--chunk-size N]
+"""
+import argparse
+import re
+import sys
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from cpu6502.status import FLAGS
+from cpu6502.tracer import TRACE_DTYPE, Tracer
+
+FIELDS = TRACE_DTYPE.names
+# Presence of every field of a record, a text log line may lack the opcode or the cycles
+PRESENT_DTYPE = np.dtype([(field, bool) for field in FIELDS])
+TEXT_LINE = re.compile(
+    r'^\s*(?:PC[:=]\s*)?(?P<pc>[0-9A-Fa-f]{4})\b(?:\s+(?P<opcode>[0-9A-Fa-f]{2})\b)?'
+    r'.*?\bA:(?P<a>[0-9A-Fa-f]{2})\s+X:(?P<x>[0-9A-Fa-f]{2})\s+Y:(?P<y>[0-9A-Fa-f]{2})\s+'
+    r'(?:P:(?P<p>[0-9A-Fa-f]{2})\s+SP:(?P<sp>[0-9A-Fa-f]{2})|SP:(?P<sp2>[0-9A-Fa-f]{2})\s+P:(?P<p2>[0-9A-Fa-f]{2}))'
+    r'(?:.*?\bCYC:\s*(?P<cycles>\d+))?', re.MULTILINE)
+# ASCII code -> value of the hexadecimal digit
+HEX_DIGITS = np.zeros(0x100, dtype=np.uint8)
+HEX_DIGITS[np.frombuffer(b'0123456789abcdef', dtype=np.uint8)] = np.arange(16)
+HEX_DIGITS[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+
+
+class Divergence(NamedTuple):
+    index: int  # Instruction number, 0 for the first one
+    fields: list  # (field, ours, reference) of every mismatching field, [('length', ours, reference)] at an end
+    ours: np.ndarray  # Context: records before and at (and after) the divergence
+    reference: np.ndarray
+    context_start: int  # Instruction number of the first context record
+
+    def __str__(self) -> str:
+        lines = [f'Traces diverge at instruction {self.index}:']
+        for field, ours, reference in self.fields:
+            if field == 'length':
+                lines.append(f'  {"ours" if ours < reference else "reference"} ends after {min(ours, reference)} '
+                             f'instructions')
+            elif field == 'p':
+                names = ', '.join(name for name, bit in FLAGS.items() if (ours ^ reference) & bit)
+                lines.append(f'  p: {ours:02x} != {reference:02x} ({names})')
+            else:
+                lines.append(f'  {field}: {ours:x} != {reference:x}')
+        for title, records in (('ours', self.ours), ('reference', self.reference)):
+            lines.append(f'{title}:')
+            for number, record in enumerate(records, start=self.context_start):
+                marker = '>' if number == self.index else ' '
+                lines.append(f'{marker} {number:>10}  {Tracer.format_record(record)}')
+        return '\n'.join(lines)
+
+
+def parse_hex(column: np.ndarray) -> np.ndarray:
+    """
+    Function to parse a column of fixed width hexadecimal strings
+    :param column: np.ndarray: Bytes strings ('S' dtype) of equal length
+    :return: np.ndarray: Parsed values (uint64)
+    """
+    width = column.dtype.itemsize
+    digits = HEX_DIGITS[column.view(np.uint8).reshape(-1, width)].astype(np.uint64)
+    return digits @ (np.uint64(16) ** np.arange(width - 1, -1, -1, dtype=np.uint64))
+
+
+def parse_text(text: str) -> tuple:
+    """
+    Function to parse the lines of a text log
+    :param text: str: Complete lines of the log
+    :return: tuple: (TRACE_DTYPE records, PRESENT_DTYPE presence of their fields)
+    """
+    matches = [match.groupdict() for match in TEXT_LINE.finditer(text)]
+    records = np.zeros(len(matches), dtype=TRACE_DTYPE)
+    present = np.zeros(len(matches), dtype=PRESENT_DTYPE)
+    if not matches:
+        return records, present
+    for match in matches:
+        if match['p'] is None:
+            match['p'], match['sp'] = match['p2'], match['sp2']
+    for field in FIELDS:
+        values = [match[field] for match in matches]
+        present[field] = [value is not None for value in values]
+        if not present[field].any():
+            continue
+        column = np.array(['0' if value is None else value for value in values], dtype='S')
+        records[field] = column.astype(np.uint64) if field == 'cycles' else parse_hex(column)
+    return records, present
+
+
+def read_trace(filepath: str, chunk_size: int = 1 << 16) -> Iterator[tuple]:
+    """
+    Function to read a trace file in chunks
+    :param filepath: str: .npy file of TRACE_DTYPE records or a text log
+    :param chunk_size: int: Records (or lines of text) per chunk
+    :return: Iterator[tuple]: (TRACE_DTYPE records, PRESENT_DTYPE presence of their fields)
+    """
+    if filepath.lower().endswith('.npy'):
+        trace = np.load(filepath, mmap_mode='r')
+        if trace.dtype != TRACE_DTYPE:
+            raise ValueError(f'{filepath} is not a trace, its records are {trace.dtype}')
+        for start in range(0, len(trace), chunk_size):
+            records = np.array(trace[start:start + chunk_size])
+            present = np.ones(len(records), dtype=PRESENT_DTYPE)
+            yield records, present
+        return
+    with open(filepath, encoding='latin-1') as file:
+        while True:
+            lines = file.readlines(chunk_size * 80)  # Size hint in characters
+            if not lines:
+                return
+            yield parse_text(''.join(lines))
+
+
+class TraceReader:
+    """
+    Reader returning the records of a trace, with the presence of their fields, in slices of any length
+    """
+
+    def __init__(self, filepath: str, chunk_size: int = 1 << 16):
+        self.chunks = read_trace(filepath, chunk_size)
+        self.pending = np.zeros(0, dtype=TRACE_DTYPE)
+        self.present = np.zeros(0, dtype=PRESENT_DTYPE)  # Presence of the fields of the pending records
+        self.exhausted = False
+
+    def fill(self, count: int) -> None:
+        """
+        Method to read chunks until at least count records are pending or the trace ends
+        """
+        parts, presences = [self.pending], [self.present]
+        pending = len(self.pending)
+        while pending < count and not self.exhausted:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.exhausted = True
+                break
+            records, present = chunk
+            parts.append(records)
+            presences.append(present)
+            pending += len(records)
+        self.pending = np.concatenate(parts)
+        self.present = np.concatenate(presences)
+
+    def take(self, count: int) -> np.ndarray:
+        records = self.pending[:count]
+        self.pending = self.pending[count:]
+        self.present = self.present[count:]
+        return records
+
+
+def mismatches(ours: np.ndarray, reference: np.ndarray, fields: list, p_mask: int,
+               cycle_offsets: tuple, present: np.ndarray = None) -> np.ndarray:
+    """
+    Function to compare two slices of records of equal length
+    :param present: np.ndarray: PRESENT_DTYPE fields present in both slices, None if every field is present
+    :return: np.ndarray: Boolean mask of the mismatching records
+    """
+    mask = np.zeros(len(ours), dtype=bool)
+    for field in fields:
+        left = ours[field]
+        right = reference[field]
+        if field == 'p':
+            left = left & p_mask
+            right = right & p_mask
+        elif field == 'cycles':
+            left = left.astype(np.int64) - cycle_offsets[0]
+            right = right.astype(np.int64) - cycle_offsets[1]
+        mask |= (left != right) if present is None else (left != right) & present[field]
+    return mask
+
+
+def diff_traces(ours_path: str, reference_path: str, context: int = 5, ignore=(), p_mask: int = 0xff,
+                relative_cycles: bool = True, chunk_size: int = 1 << 16):
+    """
+    Function to find the first divergence of two traces
+    :param ours_path: str: Trace of this emulator
+    :param reference_path: str: Trace of the reference
+    :param context: int: Number of records shown before and after the divergence
+    :param ignore: Fields not to be compared (see TRACE_DTYPE)
+    :param p_mask: int: Status bits to be compared, e.g. 0xcf to ignore the break and reserved bits
+    :param relative_cycles: bool: Compare the cycles elapsed since the first record of each trace
+    :param chunk_size: int: Records per chunk
+    :return: Divergence: First divergence, None if the traces are equal
+    """
+    readers = (TraceReader(ours_path, chunk_size), TraceReader(reference_path, chunk_size))
+    history = [np.zeros(0, dtype=TRACE_DTYPE)] * 2  # Last context records before the compared slice
+    index = 0
+    fields = [field for field in FIELDS if field not in ignore]
+    cycle_offsets = None
+    while True:
+        for reader in readers:
+            reader.fill(chunk_size)
+        count = min(len(reader.pending) for reader in readers)
+        if count == 0:
+            if readers[0].pending.size == readers[1].pending.size == 0:
+                return None
+            lengths = tuple(index + len(reader.pending) for reader in readers)
+            return _divergence(readers, history, index, [('length', *lengths)], context)
+        if cycle_offsets is None:
+            cycle_offsets = tuple(_first_cycles(reader) if relative_cycles else 0 for reader in readers)
+        present = _both_present(readers[0].present[:count], readers[1].present[:count])
+        mask = mismatches(readers[0].pending[:count], readers[1].pending[:count], fields, p_mask, cycle_offsets,
+                          present)
+        wrong = np.flatnonzero(mask)
+        if wrong.size:
+            first = int(wrong[0])
+            for side in range(2):
+                history[side] = _tail(history[side], readers[side].take(first), context)
+            index += first
+            ours, reference = readers[0].pending[0], readers[1].pending[0]
+            compared = ((field, *_compared(field, ours, reference, p_mask, cycle_offsets))
+                        for field in fields if present[first][field])
+            differences = [difference for difference in compared if difference[1] != difference[2]]
+            return _divergence(readers, history, index, differences, context)
+        for side in range(2):
+            history[side] = _tail(history[side], readers[side].take(count), context)
+        index += count
+
+
+def _first_cycles(reader: TraceReader) -> int:
+    # Cycles of the first pending record which has them
+    present = np.flatnonzero(reader.present['cycles'])
+    return int(reader.pending['cycles'][present[0]]) if present.size else 0
+
+
+def _both_present(ours: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    present = np.empty(len(ours), dtype=PRESENT_DTYPE)
+    for field in FIELDS:
+        present[field] = ours[field] & reference[field]
+    return present
+
+
+def _tail(history: np.ndarray, records: np.ndarray, context: int) -> np.ndarray:
+    return np.concatenate((history, records))[max(0, len(history) + len(records) - context):]
+
+
+def _compared(field: str, ours, reference, p_mask: int, cycle_offsets: tuple) -> tuple:
+    left, right = int(ours[field]), int(reference[field])
+    if field == 'p':
+        return left & p_mask, right & p_mask
+    if field == 'cycles':
+        return left - cycle_offsets[0], right - cycle_offsets[1]
+    return left, right
+
+
+def _divergence(readers: tuple, history: list, index: int, fields: list, context: int) -> Divergence:
+    for reader in readers:
+        reader.fill(context + 1)
+    ours, reference = (np.concatenate((history[side], readers[side].pending[:context + 1])) for side in range(2))
+    return Divergence(index, fields, ours, reference, index - len(history[0]))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m cpu6502.tracediff',
+                                     description='Find the first instruction at which two traces diverge')
+    parser.add_argument('ours', help='trace of this emulator (.npy or text log)')
+    parser.add_argument('reference', help='trace of the reference emulator (.npy or text log)')
+    parser.add_argument('--context', type=int, default=5, help='records shown around the divergence')
+    parser.add_argument('--ignore', action='append', default=[], choices=FIELDS, help='field not to be compared')
+    parser.add_argument('--p-mask', type=lambda value: int(value, 0), default=0xff,
+                        help='status bits to be compared (default: 0xff, 0xcf ignores the B and reserved bits)')
+    parser.add_argument('--absolute-cycles', dest='relative_cycles', action='store_false',
+                        help='compare the cycle counts as they are, not relative to the first record')
+    parser.add_argument('--chunk-size', type=int, default=1 << 16, help='records read at once')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    divergence = diff_traces(args.ours, args.reference, args.context, args.ignore, args.p_mask,
+                             args.relative_cycles, args.chunk_size)
+    if divergence is None:
+        print('Traces are equal')
+        return 0
+    print(divergence)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Execution tracer recording the state of the cpu before every instruction (pc, opcode, A, X, Y, SP, P and the clock
+cycle count) into a preallocated ring buffer of TRACE_DTYPE records, so that the last instructions are available
+after a crash or a trap, e.g.:
+
+    with Tracer(cpu, size=1000) as tracer:
+        cpu.run()
+    print(tracer.format(tracer.last(20), cpu.memory))
+
+The tracer is a DispatchHook (cpu6502.hooks), so a cpu without a tracer attached runs exactly the same code as
+before. States are buffered as tuples and copied into the ring in chunks. Traces are saved as .npy files (loadable
+with np.load(mmap_mode='r')) or as nestest style text logs, see cpu6502.tracediff to compare them.
+"""
+import numpy as np
+
+from cpu6502.disassembler import disassemble
+from cpu6502.hooks import DispatchHook
+
+TRACE_DTYPE = np.dtype([('pc', np.uint16), ('opcode', np.uint8), ('a', np.uint8), ('x', np.uint8), ('y', np.uint8),
+                        ('sp', np.uint8), ('p', np.uint8), ('cycles', np.uint64)])
+TEXT_EXTENSIONS = ('.log', '.txt')
+
+
+class Tracer(DispatchHook):
+    CHUNK_SIZE = 4096  # Buffered states
+
+    def __init__(self, cpu=None, size: int = 1 << 16):
+        """
+        :param cpu: CPU: Cpu to be traced straight away, see attach
+        :param size: int: Number of instructions kept, the oldest ones are overwritten
+        """
+        if size < 1:
+            raise ValueError(f'Trace size must be positive, not {size}')
+        self.ring = np.zeros(size, dtype=TRACE_DTYPE)
+        self.recorded = 0  # Instructions copied to the ring since the start
+        self._buffer = []
+        super().__init__(cpu)
+
+    def wrap(self, handler, opcode: int):
+        cpu = self.cpu
+        clock = cpu.clock
+        buffer = self._buffer
+        append = buffer.append
+        flush = self.flush
+
+        def traced():
+            # The state before the instruction, the opcode was already fetched, which took one cycle
+            append(((cpu.pc - 1) & 0xffff, opcode, cpu.acc, cpu.idx, cpu.idy, cpu.sp, cpu.status,
+                    clock.total_clock_cycles - 1))
+            if len(buffer) >= Tracer.CHUNK_SIZE:
+                flush()
+            handler()
+        return traced
+
+    def flush(self) -> None:
+        """
+        Method to copy the buffered states into the ring
+        :return: None
+        """
+        if not self._buffer:
+            return
+        size = len(self.ring)
+        chunk = np.array(self._buffer[-size:], dtype=TRACE_DTYPE)
+        self.recorded += len(self._buffer) - len(chunk)
+        self._buffer.clear()
+        start = self.recorded % size
+        head = min(len(chunk), size - start)
+        self.ring[start:start + head] = chunk[:head]
+        self.ring[:len(chunk) - head] = chunk[head:]
+        self.recorded += len(chunk)
+
+    def clear(self) -> None:
+        """
+        Method to drop all recorded instructions
+        :return: None
+        """
+        self._buffer.clear()
+        self.recorded = 0
+
+    def __len__(self) -> int:
+        self.flush()
+        return min(self.recorded, len(self.ring))
+
+    def records(self) -> np.ndarray:
+        """
+        Method to get the kept instructions
+        :return: np.ndarray: TRACE_DTYPE records, the oldest first
+        """
+        self.flush()
+        size = len(self.ring)
+        if self.recorded <= size:
+            return self.ring[:self.recorded].copy()
+        start = self.recorded % size
+        return np.concatenate((self.ring[start:], self.ring[:start]))
+
+    def last(self, count: int) -> np.ndarray:
+        """
+        Method to get the last instructions, e.g. the ones leading to a trap
+        :param count: int: Number of instructions
+        :return: np.ndarray: TRACE_DTYPE records, the oldest first
+        """
+        return self.records()[-count:] if count > 0 else np.zeros(0, dtype=TRACE_DTYPE)
+
+    @staticmethod
+    def format_record(record, memory=None) -> str:
+        """
+        Method to format a record as a nestest style log line, e.g.
+        'C000  4C F5 C5  JMP $C5F5                       A:00 X:00 Y:00 P:24 SP:FD CYC:7'
+        :param record: TRACE_DTYPE record
+        :param memory: Memory: Memory used to disassemble the instruction, only the opcode is printed without it.
+        It should still contain the traced program.
+        :return: str: Log line
+        """
+        pc = int(record['pc'])
+        if memory is None:
+            code = f'{int(record["opcode"]):02X}'
+            text = ''
+        else:
+            text, size = disassemble(memory, pc)
+            code = ' '.join(f'{int(memory[(pc + offset) & 0xffff]):02X}' for offset in range(size))
+        return f'{pc:04X}  {code:<8}  {text:<30}  A:{int(record["a"]):02X} X:{int(record["x"]):02X} ' \
+               f'Y:{int(record["y"]):02X} P:{int(record["p"]):02X} SP:{int(record["sp"]):02X} ' \
+               f'CYC:{int(record["cycles"])}'
+
+    @staticmethod
+    def format(records: np.ndarray, memory=None) -> str:
+        """
+        Method to format records as a nestest style log, see format_record
+        :return: str: Log lines
+        """
+        return '\n'.join(Tracer.format_record(record, memory) for record in records)
+
+    def save(self, filepath: str, memory=None) -> None:
+        """
+        Method to save the kept instructions, as a text log if the extension of filepath is one of TEXT_EXTENSIONS,
+        as a .npy file otherwise
+        :param filepath: str: Path to the trace file
+        :param memory: Memory: Memory used to disassemble the instructions of a text log
+        :return: None
+        """
+        if filepath.lower().endswith(TEXT_EXTENSIONS):
+            with open(filepath, 'w') as file:
+                for record in self.records():
+                    file.write(Tracer.format_record(record, memory) + '\n')
+        else:
+            np.save(filepath, self.records(), allow_pickle=False)
@@ -0,0 +1,633 @@
+"""
+Basic block translator: compiles the run of instructions starting at a pc up to the next branch, jump, return or
+BRK (the instruction set of 6502_instructions.json) into a single Python function, e.g.:
+
+    translator = Translator(cpu)
+    result = translator.run(max_instructions=1000000)
+
+Operands are decoded once, at translation time: zero page and absolute addresses, immediate values and branch
+targets become constants of the generated code and the registers are kept in local variables for the whole block.
+A block follows absolute jumps, subroutine calls and the not taken side of branches (the taken side leaves it), so
+a loop body usually is a single block. Only blocks entered HOT_THRESHOLD times are translated, colder code is
+interpreted.
+
+The generated functions are cached by their entry pc. The pages of their code are marked in the memory (see
+Memory.mark_code), which reports every write changing a byte of a marked page, so writes to the code of a cached
+block (self modifying code, the host) drop the block and a block writing to its own code leaves at the next
+instruction. Pages written to are not followed into by the blocks of other pages, and the compiled variants of
+patched code are kept, so code patched back and forth is not recompiled. Writes bypassing the page tables have to
+be reported with Memory.code_written.
+
+The results are the ones of the interpreter, including the clock cycles and the quirks of the instructions, but the
+registers and the clock are only updated at the end of a block and the clock is synchronised once per block.
+"""
+import re
+from math import inf
+from typing import Callable, NamedTuple
+
+from cpu6502.alu import ADC_TABLE, ASL_TABLE, COMPARE_TABLE, LSR_TABLE, NOT_ADC_FLAGS, NOT_COMPARE_FLAGS, \
+    NOT_SHIFT_FLAGS, ROL_TABLE, ROR_TABLE, SBC_TABLE
+from cpu6502.cpu import CPU, RunResult
+from cpu6502.disassembler import BRANCHES, CYCLES, FLAG_CHANGES, OPCODES, REGISTER_OF, SETS_RESERVED, TRANSFERS
+from cpu6502.instructions import Trap
+from cpu6502.memory import DevicePage, Memory
+from cpu6502.status import BREAK, CARRY, DECIMAL, INTERRUPT, NEGATIVE, NOT_NZ, NZ_TABLE, OVERFLOW, RESERVED, ZERO
+
+IN_BLOCK = re.compile(r'IN_BLOCK\((\w+)\)')
+NOT_NVZ = 0xff ^ (NEGATIVE | OVERFLOW | ZERO)
+REGISTERS = 'acc, idx, idy, sp, status'
+WRITE_BACK = f'cpu.acc, cpu.idx, cpu.idy, cpu.sp, cpu.status = {REGISTERS}'
+
+
+class Block(NamedTuple):
+    start: int  # Address of the first instruction
+    ranges: tuple  # (first, last + 1) address ranges of the code of the block
+    length: int  # Number of instructions
+    lead_cycles: int  # Most clock cycles taken before the last instruction starts
+    inner: frozenset  # Addresses of the instructions after the first one
+    function: Callable  # Executes the block, returns the number of executed instructions
+    source: str  # Generated code
+
+
+class BlockTrap(Trap):
+    """
+    Trap raised by a translated block, which knows how many instructions it executed
+    """
+
+    def __init__(self, address: int, instructions: int):
+        super().__init__(address)
+        self.instructions = instructions
+
+
+class _Builder:
+    """
+    Generator of the code of one block. The emitters append the code of the instructions, the registers are the
+    local variables acc, idx, idy, sp and status, penalty cycles are counted in extra.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.cycles = 0  # Cycles of the instructions emitted so far, without penalties
+        self.count = 0  # Instructions emitted so far
+        self.extra = False  # Some instruction may take penalty cycles
+        self.reserved = False  # The reserved bit is set, it stays set until the end of the block
+
+    def emit(self, *lines: str) -> None:
+        self.lines.extend(lines)
+
+    def leave(self, pc: str, indent: str = '') -> None:
+        """
+        Method to emit the exit of the block after the instructions emitted so far
+        :param pc: str: Expression of the next pc
+        :param indent: str: Indentation of the emitted lines
+        """
+        cycles = f'{self.cycles} + extra' if self.extra else f'{self.cycles}'
+        self.emit(f'{indent}cpu.pc = {pc}', f'{indent}{WRITE_BACK}', f'{indent}clock.total_clock_cycles += {cycles}')
+
+    def trap(self, address: int, indent: str = '') -> None:
+        self.emit(f'{indent}if cpu.trap_detection:', f'{indent}    raise BlockTrap(0x{address:04x}, {self.count})')
+
+    def penalty(self, condition: str) -> None:
+        if not self.extra:
+            self.lines.insert(0, 'extra = 0')
+            self.extra = True
+        self.emit(f'extra += {condition}')
+
+    def address(self, mode: str, operand: int, penalty: bool = True) -> str:
+        """
+        Method to emit the address resolution of an addressing mode
+        :return: str: Expression of the address, a constant if it is known at translation time
+        """
+        if mode in ('ZeroPage', 'Absolute'):
+            return f'0x{operand:04x}'
+        if mode in ('ZeroPage,X', 'ZeroPage,Y'):
+            self.emit(f'a = (0x{operand:02x} + {"idx" if mode.endswith("X") else "idy"}) & 0xff')
+        elif mode in ('Absolute,X', 'Absolute,Y'):
+            self.emit(f'a = 0x{operand:04x} + {"idx" if mode.endswith("X") else "idy"}')
+            self.penalty(f'(a >> 8) != 0x{operand >> 8:02x}')
+            self.emit('a &= 0xffff')
+        elif mode == '(Indirect,X)':
+            self.emit(f'p = (0x{operand:02x} + idx) & 0xff',
+                      'a = read_pages[0][p] | (read_pages[(p + 1) >> 8][(p + 1) & 0xff] << 8)')
+        else:  # (Indirect),Y, the word is read without wrapping around the zero page, like CPU.read_word_int does
+            self.emit(f'a = ({read(operand)} | ({read(operand + 1)} << 8)) + idy')
+            if penalty:
+                self.penalty('(a >> 8) != ((a + idy) >> 8)')
+            self.emit('a &= 0xffff')
+        return 'a'
+
+    def operand(self, mode: str, operand: int) -> str:
+        """
+        :return: str: Expression of the operand value
+        """
+        if mode == 'Immediate':
+            return f'0x{operand:02x}'
+        return read(self.address(mode, operand))
+
+    def finish(self, opcode: int, written: tuple = (), following: int = None) -> None:
+        """
+        Method to emit the end of an instruction: the reserved bit of the default finalise and, after writes, the
+        check for self modifying code, which leaves the block if the write hit its code
+        :param written: tuple: Expressions of the written addresses
+        :param following: int: Address of the next instruction
+        """
+        self.cycles += CYCLES[opcode]
+        self.count += 1
+        if SETS_RESERVED[opcode] and not self.reserved:
+            self.emit(f'status |= 0x{RESERVED:02x}')
+            self.reserved = True
+        for address in written:
+            # The memory drops the blocks hit by the write (see Memory.mark_code), IN_BLOCK(address) is replaced by the
+            # test of the address ranges of this block, see function
+            self.emit(f'if IN_BLOCK({address}):')
+            self.leave(f'0x{following:04x}', '    ')
+            self.emit(f'    return {self.count}')
+
+    def function(self, start: int, ranges: list) -> str:
+        """
+        :return: str: Code of a factory(*NAMES) returning the function of the block
+        """
+        def in_block(match) -> str:
+            if match[1].startswith('0x'):  # Known at translation time, the compiler drops the dead branches
+                return str(any(first <= int(match[1], 16) < last for first, last in ranges))
+            return '(' + ' or '.join(f'0x{first:04x} <= {match[1]} < 0x{last:04x}' for first, last in ranges) + ')'
+        body = IN_BLOCK.sub(in_block, '\n'.join(f'        {line}' for line in self.lines))
+        return f'def factory({", ".join(NAMES)}):\n    def block_{start:04x}():\n        {REGISTERS} = ' \
+               f'cpu.acc, cpu.idx, cpu.idy, cpu.sp, cpu.status\n{body}\n    return block_{start:04x}\n'
+
+
+def read(address) -> str:
+    if isinstance(address, int):
+        return f'read_pages[0x{address >> 8:02x}][0x{address & 0xff:02x}]'
+    if address.startswith('0x'):
+        return read(int(address, 16))
+    return f'read_pages[{address} >> 8][{address} & 0xff]'
+
+
+def write(address: str, value: str) -> str:
+    if address.startswith('0x'):
+        return f'write_pages[{address[:-2]}][0x{address[-2:]}] = {value}'
+    return f'write_pages[{address} >> 8][{address} & 0xff] = {value}'
+
+
+def following_address(opcode: int, address: int, operand: int):
+    """
+    Function to find where a block continues after an instruction: after the instruction, at the fall through of a
+    branch (taken branches leave the block) or at the target of JSR and JMP absolute
+    :return: int: Address of the next instruction of the block, None if the instruction ends the block
+    """
+    entry = OPCODES[opcode]
+    if entry.name in ('RTS', 'RTI', 'BRK') or entry.name == 'JMP' and (entry.mode == 'Indirect' or operand == address):
+        return None
+    if entry.name in ('JMP', 'JSR'):
+        return operand
+    return address + entry.size
+
+
+# Emitters of the instructions: emitter(builder, name, mode, operand, address of the instruction, opcode, following),
+# following is the address of the next instruction of the block (None after the last one of a block)
+
+def _load(builder: _Builder, name, mode, operand, pc, opcode, following):
+    register = REGISTER_OF[name]
+    builder.emit(f'{register} = {builder.operand(mode, operand)}', f'status = (status & {NOT_NZ}) | NZ[{register}]')
+    builder.finish(opcode)
+
+
+def _store(builder: _Builder, name, mode, operand, pc, opcode, following):
+    address = builder.address(mode, operand, penalty=False)  # STA (Indirect),Y always takes 6 cycles
+    builder.emit(write(address, REGISTER_OF[name]))
+    builder.finish(opcode, (address,), following)
+
+
+def _transfer(builder: _Builder, name, mode, operand, pc, opcode, following):
+    source, target = TRANSFERS[name]
+    builder.emit(f'{target} = {source}')
+    if target != 'sp':
+        builder.emit(f'status = (status & {NOT_NZ}) | NZ[{target}]')
+    builder.finish(opcode)
+
+
+def _logical(builder: _Builder, name, mode, operand, pc, opcode, following):
+    symbol = {'AND': '&', 'ORA': '|', 'EOR': '^'}[name]
+    builder.emit(f'acc {symbol}= {builder.operand(mode, operand)}', f'status = (status & {NOT_NZ}) | NZ[acc]')
+    builder.finish(opcode)
+
+
+def _bit(builder: _Builder, name, mode, operand, pc, opcode, following):
+    builder.emit(f'v = {builder.operand(mode, operand)}',
+                 f'status = (status & {NOT_NVZ}) | (v & {NEGATIVE | OVERFLOW}) | ({ZERO} if v & acc == 0 else 0)')
+    builder.finish(opcode)
+
+
+def _arithmetic(builder: _Builder, name, mode, operand, pc, opcode, following):
+    builder.emit(f'r = {name}_TABLE[((status & {DECIMAL}) << 14) | ((status & {CARRY}) << 16) | (acc << 8) | '
+                 f'{builder.operand(mode, operand)}]',
+                 'acc = r & 0xff', f'status = (status & {NOT_ADC_FLAGS}) | (r >> 8)')
+    builder.finish(opcode)
+
+
+def _compare(builder: _Builder, name, mode, operand, pc, opcode, following):
+    builder.emit(f'status = (status & {NOT_COMPARE_FLAGS}) | '
+                 f'(COMPARE_TABLE[({REGISTER_OF[name]} << 8) | {builder.operand(mode, operand)}] >> 8)')
+    builder.finish(opcode)
+
+
+def _modify(builder: _Builder, mode, operand, opcode, following, operation: str, flags: str):
+    """
+    Function to emit a read-modify-write instruction
+    :param operation: str: Expression of the result r computed from the value v
+    :param flags: str: Statement updating the status from the result r
+    """
+    if mode == 'Accumulator':
+        builder.emit('v = acc', f'r = {operation}', flags, 'acc = r & 0xff')
+        builder.finish(opcode)
+        return
+    address = builder.address(mode, operand)
+    builder.emit(f'v = {read(address)}', f'r = {operation}', write(address, 'r & 0xff'), flags)
+    builder.finish(opcode, (address,), following)
+
+
+def _shift(builder: _Builder, name, mode, operand, pc, opcode, following):
+    index = f'(status & {CARRY}) << 8 | v' if name in ('ROL', 'ROR') else 'v'
+    _modify(builder, mode, operand, opcode, following, f'{name}_TABLE[{index}]',
+            f'status = (status & {NOT_SHIFT_FLAGS}) | (r >> 8)')
+
+
+def _step_memory(builder: _Builder, name, mode, operand, pc, opcode, following):
+    _modify(builder, mode, operand, opcode, following, f'(v {"+" if name == "INC" else "-"} 1) & 0xff',
+            f'status = (status & {NOT_NZ}) | NZ[r]')
+
+
+def _step_register(builder: _Builder, name, mode, operand, pc, opcode, following):
+    register = REGISTER_OF[name]
+    builder.emit(f'{register} = ({register} {"+" if name.startswith("IN") else "-"} 1) & 0xff',
+                 f'status = (status & {NOT_NZ}) | NZ[{register}]')
+    builder.finish(opcode)
+
+
+def _flag_change(builder: _Builder, name, mode, operand, pc, opcode, following):
+    flag, value = FLAG_CHANGES[name]
+    builder.emit(f'status |= {flag}' if value else f'status &= {0xff ^ flag}')
+    builder.finish(opcode)
+
+
+def _nop(builder: _Builder, name, mode, operand, pc, opcode, following):
+    builder.finish(opcode)
+
+
+def _push(builder: _Builder, value: str, address: str = None) -> None:
+    if address is not None:
+        builder.emit(f'{address} = 0x100 | sp')
+    builder.emit(f'write_pages[1][sp] = {value}', 'sp = (sp - 1) & 0xff')
+
+
+def _pull(builder: _Builder, target: str) -> None:
+    builder.emit('sp = (sp + 1) & 0xff', f'{target} = read_pages[1][sp]')
+
+
+def _stack(builder: _Builder, name, mode, operand, pc, opcode, following):
+    if name in ('PHA', 'PHP'):
+        _push(builder, 'acc' if name == 'PHA' else 'status', 'w')
+        builder.finish(opcode, ('w',), following)
+    elif name == 'PLA':
+        _pull(builder, 'acc')
+        builder.emit(f'status = (status & {NOT_NZ}) | NZ[acc]')
+        builder.finish(opcode)
+    else:
+        _pull(builder, 'status')
+        builder.emit(f'status |= {BREAK | RESERVED}')
+        builder.finish(opcode)
+
+
+def _branch(builder: _Builder, name, mode, operand, pc, opcode, following):
+    flag, value = BRANCHES[name]
+    fall_through = pc + 2
+    target = fall_through + (operand ^ 0x80) - 0x80  # Not wrapped, like the branch instructions do
+    taken_cycles = 1 + ((target >> 8) != (fall_through >> 8))
+    builder.finish(opcode)
+    # The taken branch leaves the block, the block goes on with the fall through
+    builder.emit(f'if status & {flag}:' if value else f'if not status & {flag}:')
+    builder.cycles += taken_cycles
+    builder.leave(f'{target:#06x}', '    ')  # Negative below the first page
+    if operand == 0xfe:  # Branch to itself
+        builder.trap(target, '    ')
+    builder.emit(f'    return {builder.count}')
+    builder.cycles -= taken_cycles
+
+
+def _jmp(builder: _Builder, name, mode, operand, pc, opcode, following):
+    if mode == 'Absolute':
+        builder.finish(opcode)
+        if operand == pc:  # Jump to itself
+            builder.leave(f'0x{pc:04x}')
+            builder.trap(pc)
+        return
+    builder.emit(f't = {read(operand)} | ({read((operand + 1) & 0xffff)} << 8)')
+    builder.finish(opcode)
+    builder.leave('t')
+    builder.emit(f'if t == 0x{pc:04x}:')
+    builder.trap(pc, '    ')
+
+
+def _jsr(builder: _Builder, name, mode, operand, pc, opcode, following):
+    return_point = pc + 2
+    _push(builder, f'0x{return_point >> 8:02x}', 'w')
+    _push(builder, f'0x{return_point & 0xff:02x}', 'w2')
+    builder.finish(opcode, ('w', 'w2'), following)
+
+
+def _rts(builder: _Builder, name, mode, operand, pc, opcode, following):
+    _pull(builder, 't')
+    _pull(builder, 'h')
+    builder.finish(opcode)
+    builder.leave('(t | (h << 8)) + 1')
+
+
+def _rti(builder: _Builder, name, mode, operand, pc, opcode, following):
+    _pull(builder, 'status')
+    builder.emit(f'status |= {BREAK | RESERVED}')
+    _pull(builder, 't')
+    _pull(builder, 'h')
+    builder.finish(opcode)
+    builder.leave('t | (h << 8)')
+
+
+def _brk(builder: _Builder, name, mode, operand, pc, opcode, following):
+    return_point = (pc + 2) & 0xffff
+    _push(builder, f'0x{return_point >> 8:02x}')
+    _push(builder, f'0x{return_point & 0xff:02x}')
+    builder.emit(f'status |= {BREAK}')
+    _push(builder, 'status')
+    builder.emit(f'status |= {INTERRUPT}')
+    builder.finish(opcode)
+    builder.leave(f'{read(0xfffe)} | ({read(0xffff)} << 8)')
+
+
+EMITTERS = {}
+for _emitter, _names in ((_load, 'LDA LDX LDY'), (_store, 'STA STX STY'), (_transfer, 'TAX TAY TXA TYA TSX TXS'),
+                         (_logical, 'AND ORA EOR'), (_bit, 'BIT'), (_arithmetic, 'ADC SBC'), (_compare, 'CMP CPX CPY'),
+                         (_shift, 'ASL LSR ROL ROR'), (_step_memory, 'INC DEC'), (_step_register, 'INX INY DEX DEY'),
+                         (_flag_change, ' '.join(FLAG_CHANGES)), (_nop, 'NOP'), (_stack, 'PHA PHP PLA PLP'),
+                         (_branch, ' '.join(BRANCHES)), (_jmp, 'JMP'), (_jsr, 'JSR'), (_rts, 'RTS'), (_rti, 'RTI'),
+                         (_brk, 'BRK')):
+    for _name in _names.split():
+        EMITTERS[_name] = _emitter
+
+# Names available to the generated code, see Translator.compile
+NAMES = ('cpu', 'clock', 'read_pages', 'write_pages', 'BlockTrap', 'NZ', 'ADC_TABLE', 'SBC_TABLE', 'COMPARE_TABLE',
+         'ASL_TABLE', 'LSR_TABLE', 'ROL_TABLE', 'ROR_TABLE')
+
+
+class Translator:
+    MAX_BLOCK_LENGTH = 64  # Instructions
+    HOT_THRESHOLD = 8  # Entries into a block before it is translated, colder code is interpreted
+    MAX_VARIANTS = 1 << 14  # Compiled blocks kept for code which is patched and patched back
+
+    def __init__(self, cpu: CPU):
+        """
+        :param cpu: CPU: Cpu whose code is translated
+        """
+        self.cpu = cpu
+        self.blocks = {}  # Entry pc -> Block
+        self.singles = {}  # Entry pc -> Block of a single instruction, used to stop exactly at the run limits
+        self.code = bytearray(Memory.MAX_SIZE)  # 1 for the bytes of the instructions of the cached blocks
+        self.translations = 0  # Blocks compiled
+        self.invalidations = 0  # Blocks dropped because their code was written to
+        self._heat = bytearray(Memory.MAX_SIZE)  # Entries into the blocks which are not translated yet
+        self._volatile = bytearray(Memory.PAGES)  # 1 for pages whose code was written to, blocks do not run into them
+        self._covering = {}  # Address -> cached blocks with instructions at it
+        self._variants = {}  # (single, decoded instructions) -> Block, also the dropped ones
+        self._memory = cpu.memory  # Memory whose page tables the compiled blocks use
+        self._memory.code_listeners.append(self.invalidate)
+
+    def decode(self, pc: int, max_length: int) -> tuple:
+        """
+        Method to decode the instructions of the block starting at pc, see following_address
+        :return: tuple: (address, opcode, operand) of every instruction
+        """
+        memory = self.cpu.memory
+        read_pages = memory.read_pages
+        instructions = []
+        addresses = set()
+        address = pc
+        while len(instructions) < max_length and address is not None and 0 <= address < 0xffff and \
+                address not in addresses:
+            if instructions and self._volatile[address >> 8] and (address >> 8) != (instructions[-1][0] >> 8):
+                break
+            opcode = memory[address]
+            entry = OPCODES.get(opcode)
+            if entry is None or address + entry.size > Memory.MAX_SIZE or \
+                    isinstance(read_pages[address >> 8], DevicePage) or \
+                    isinstance(read_pages[(address + entry.size - 1) >> 8], DevicePage):
+                break
+            operand = memory[address + 1] if entry.size == 2 else \
+                memory[address + 1] | (memory[address + 2] << 8) if entry.size == 3 else 0
+            instructions.append((address, opcode, operand))
+            addresses.add(address)
+            address = following_address(opcode, address, operand)
+        return tuple(instructions)
+
+    def translate(self, pc: int, max_length: int = None):
+        """
+        Method to translate the block starting at pc and cache it
+        :param pc: int: Address of the first instruction
+        :param max_length: int: Maximum number of instructions (MAX_BLOCK_LENGTH by default), 1 for a single
+        instruction block (cached apart)
+        :return: Block: Translated block, None if the instruction at pc can not be translated (opcodes outside of the
+        instruction set, code in device pages)
+        """
+        if self.cpu.memory is not self._memory:
+            self.reset()
+        instructions = self.decode(pc, max_length or self.MAX_BLOCK_LENGTH)
+        if not instructions:
+            return None
+        key = (max_length == 1, instructions)
+        block = self._variants.get(key)
+        if block is None:
+            block = self.build(instructions)
+            if len(self._variants) >= self.MAX_VARIANTS:
+                self._variants.clear()
+            self._variants[key] = block
+        (self.singles if max_length == 1 else self.blocks)[pc] = block
+        covering = self._covering
+        for first, last in block.ranges:
+            for address in range(first, last):
+                covering.setdefault(address, set()).add(block)
+            self.code[first:last] = b'\x01' * (last - first)
+            self._memory.mark_code(first, last - first)
+        return block
+
+    def build(self, instructions: tuple) -> Block:
+        """
+        Method to generate and compile the code of decoded instructions, see decode
+        :return: Block: Compiled block
+        """
+        builder = _Builder()
+        lead_cycles = 0
+        ranges = []
+        following = None
+        for number, (address, opcode, operand) in enumerate(instructions):
+            lead_cycles = builder.cycles + 2 * builder.count  # Penalties take at most 2 cycles per instruction
+            entry = OPCODES[opcode]
+            following = following_address(opcode, address, operand)
+            if ranges and ranges[-1][1] == address:
+                ranges[-1][1] += entry.size
+            else:
+                ranges.append([address, address + entry.size])
+            EMITTERS[entry.name](builder, entry.name, entry.mode, operand, address, opcode, following)
+        if following is not None:  # Stopped by the length, a loop or an instruction which can not be translated
+            builder.leave(f'0x{following:04x}')
+        builder.emit(f'return {builder.count}')
+        start = instructions[0][0]
+        source = builder.function(start, ranges)
+        self.translations += 1
+        return Block(start, tuple(map(tuple, ranges)), len(instructions), lead_cycles,
+                     frozenset(address for address, _, _ in instructions[1:]), self.compile(source, start), source)
+
+    def compile(self, source: str, pc: int) -> Callable:
+        """
+        Method to compile the generated code of a block
+        :return: Callable: Function executing the block
+        """
+        memory = self._memory
+        namespace = {}
+        exec(compile(source, f'<block 0x{pc:04x}>', 'exec'), namespace)
+        return namespace['factory'](self.cpu, self.cpu.clock, memory.read_pages, memory.write_pages, BlockTrap,
+                                    NZ_TABLE, ADC_TABLE, SBC_TABLE, COMPARE_TABLE, ASL_TABLE, LSR_TABLE, ROL_TABLE,
+                                    ROR_TABLE)
+
+    def invalidate(self, address: int, size: int = 1) -> None:
+        """
+        Method to drop the cached blocks containing bytes of the given range. The memory calls it for the writes to
+        the marked pages (see Memory.mark_code).
+        :param address: int: First address of the range
+        :param size: int: Number of bytes
+        :return: None
+        """
+        if size == 1 and not self.code[address]:  # Data next to the code
+            return
+        covering = self._covering
+        if size < len(covering):
+            stale = set().union(*(covering.get(written, ()) for written in range(address, address + size)))
+        else:  # E.g. a restored snapshot
+            stale = set().union(*(blocks for covered, blocks in covering.items()
+                                  if address <= covered < address + size))
+        if not stale:
+            return
+        for page in range(address >> 8, ((address + size - 1) >> 8) + 1):
+            self._volatile[page] = 1
+        for block in stale:
+            self._drop(block)
+
+    def reset(self) -> None:
+        """
+        Method to drop all blocks, e.g. after loading another program or replacing the memory of the cpu
+        :return: None
+        """
+        self.blocks.clear()
+        self.singles.clear()
+        self._variants.clear()
+        self.code[:] = bytes(Memory.MAX_SIZE)
+        self._heat[:] = bytes(Memory.MAX_SIZE)
+        self._volatile[:] = bytes(Memory.PAGES)
+        self._covering.clear()
+        if self._memory is not self.cpu.memory:
+            self._memory.code_listeners.remove(self.invalidate)
+            self._memory = self.cpu.memory
+            self._memory.code_listeners.append(self.invalidate)
+
+    def run(self, max_cycles: int = None, max_instructions: int = None, until_pc=(), trap: bool = True) -> RunResult:
+        """
+        Method to execute instructions until one of the stop conditions of CPU.run is met. Blocks entered
+        HOT_THRESHOLD times are translated, the other instructions are interpreted. The conditions are checked before
+        every block, a block which could cross them is executed an instruction at a time.
+        :param max_cycles: int: Cycle budget
+        :param max_instructions: int: Instruction budget
+        :param until_pc: Address(es) stopping the run before the instruction at them is executed
+        :param trap: bool: Stop after an instruction which jumps or branches to itself
+        :return: RunResult: Stop reason, program counter, executed instructions and clock cycles
+        """
+        cpu = self.cpu
+        clock = cpu.clock
+        if cpu.memory is not self._memory:
+            self.reset()
+        blocks = self.blocks
+        until_pc = frozenset((until_pc,) if isinstance(until_pc, int) else until_pc)
+        start_cycles = clock.total_clock_cycles
+        cycle_limit = inf if max_cycles is None else start_cycles + max_cycles
+        instruction_limit = inf if max_instructions is None else max_instructions
+        instructions = 0
+        entry = True  # The pc is the entry of a block: the target of a jump or the instruction after a block
+        cpu.trap_detection = trap
+        try:
+            while True:
+                pc = cpu.pc
+                if pc in until_pc or instructions >= instruction_limit or \
+                        clock.total_clock_cycles >= cycle_limit or pc >= 0xffff:
+                    reason = self._stop_reason(until_pc, instructions >= instruction_limit, cycle_limit)
+                    break
+                block = blocks.get(pc) or (self._enter(pc) if entry else None)
+                if block is None:
+                    entry = self.interpret()
+                    instructions += 1
+                    continue
+                if instructions + block.length > instruction_limit or \
+                        clock.total_clock_cycles + block.lead_cycles >= cycle_limit or \
+                        (until_pc and not until_pc.isdisjoint(block.inner)):
+                    block = self.singles.get(pc) or self.translate(pc, 1)
+                instructions += block.function()
+                entry = True
+                if clock.total_clock_cycles >= clock.next_sync:
+                    clock.synchronise()
+        except Trap as trap:
+            # The trapping instruction was executed completely
+            reason = CPU.STOP_TRAP
+            instructions += getattr(trap, 'instructions', 1)
+        finally:
+            cpu.trap_detection = False
+        return RunResult(reason, cpu.pc, instructions, clock.total_clock_cycles - start_cycles)
+
+    def interpret(self) -> bool:
+        """
+        Method to execute the instruction at the pc with the interpreter
+        :return: bool: The instruction transferred control (the next pc is the entry of a block)
+        """
+        cpu = self.cpu
+        pc = cpu.pc
+        opcode = cpu.fetch_byte_int()
+        cpu.instructions.execute(opcode)
+        clock = cpu.clock
+        if clock.total_clock_cycles >= clock.next_sync:
+            clock.synchronise()
+        return opcode not in OPCODES or cpu.pc != pc + OPCODES[opcode].size
+
+    def _enter(self, pc: int):
+        heat = self._heat
+        if heat[pc] < self.HOT_THRESHOLD - 1:
+            heat[pc] += 1
+            return None
+        return self.translate(pc)
+
+    def _drop(self, block: Block) -> None:
+        for cache in (self.blocks, self.singles):
+            if cache.get(block.start) is block:
+                del cache[block.start]
+        covering = self._covering
+        for first, last in block.ranges:
+            for covered in range(first, last):
+                blocks = covering[covered]
+                blocks.discard(block)
+                if not blocks:
+                    del covering[covered]
+                    self.code[covered] = 0
+        self.invalidations += 1
+
+    def _stop_reason(self, until_pc: frozenset, out_of_instructions: bool, cycle_limit) -> str:
+        # Same order as in CPU.run
+        if self.cpu.pc in until_pc:
+            return CPU.STOP_BREAKPOINT
+        if out_of_instructions:
+            return CPU.STOP_INSTRUCTIONS
+        if self.cpu.clock.total_clock_cycles >= cycle_limit:
+            return CPU.STOP_CYCLES
+        return CPU.STOP_END_OF_MEMORY
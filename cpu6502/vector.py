@@ -0,0 +1,401 @@
+"""
+Lock-step engine running many independent 6502 instances at once, e.g. to evaluate thousands of test vectors:
+
+    engine = VectorCPU.from_snapshot(cpu.snapshot(), 4096)
+    engine.acc[:] = np.arange(4096) & 0xff
+    results = engine.run(max_instructions=1000)
+
+Registers are NumPy arrays of shape (N,) and the memories one (N, 65536) array (64K per instance, so 1000 instances
+take 64 MB). Every step fetches the opcode of every running instance, groups the instances by opcode and executes
+each group with vectorised operations, so the interpreter overhead is paid per distinct opcode instead of per
+instance. The semantics (flags from the cpu6502.alu tables, clock cycles, quirks) are the ones of the instructions in
+cpu6502/instructions, which the tests check instruction by instruction. Memory mapped devices are not supported, the
+memory of every instance is plain RAM.
+"""
+import numpy as np
+
+from cpu6502.alu import ADC_TABLE, ASL_TABLE, COMPARE_TABLE, LSR_TABLE, NOT_ADC_FLAGS, NOT_COMPARE_FLAGS, \
+    NOT_SHIFT_FLAGS, ROL_TABLE, ROR_TABLE, SBC_TABLE
+from cpu6502.cpu import CPU
+from cpu6502.disassembler import BRANCHES, CYCLES, FLAG_CHANGES, OPCODES, REGISTER_OF, SETS_RESERVED, TRANSFERS
+from cpu6502.memory import Memory
+from cpu6502.parallel import result_dtype
+from cpu6502.snapshot import Snapshot
+from cpu6502.status import BREAK, CARRY, DECIMAL, INTERRUPT, NEGATIVE, NOT_NZ, NZ_TABLE, OVERFLOW, RESERVED, ZERO
+
+ADC_ARRAY = np.array(ADC_TABLE, dtype=np.int64)
+SBC_ARRAY = np.array(SBC_TABLE, dtype=np.int64)
+COMPARE_ARRAY = np.array(COMPARE_TABLE, dtype=np.int64)
+ASL_ARRAY = np.array(ASL_TABLE, dtype=np.int64)
+LSR_ARRAY = np.array(LSR_TABLE, dtype=np.int64)
+ROL_ARRAY = np.array(ROL_TABLE, dtype=np.int64)
+ROR_ARRAY = np.array(ROR_TABLE, dtype=np.int64)
+NZ_ARRAY = np.array(NZ_TABLE, dtype=np.int64)
+NOT_NVZ = 0xff ^ (NEGATIVE | OVERFLOW | ZERO)
+
+SHIFT_ARRAYS = {'ASL': ASL_ARRAY, 'LSR': LSR_ARRAY, 'ROL': ROL_ARRAY, 'ROR': ROR_ARRAY}
+STOP_REASONS = (CPU.STOP_BREAKPOINT, CPU.STOP_CYCLES, CPU.STOP_INSTRUCTIONS, CPU.STOP_TRAP)
+RUNNING = ''
+
+
+class VectorCPU:
+
+    def __init__(self, n: int, image: np.ndarray = None):
+        """
+        :param n: int: Number of instances
+        :param image: np.ndarray: Memory.MAX_SIZE bytes copied into the memory of every instance, zeros by default
+        """
+        self.n = n
+        self.memory = np.zeros((n, Memory.MAX_SIZE), dtype=np.ubyte)
+        if image is not None:
+            self.memory[:] = image
+        self.pc = np.zeros(n, dtype=np.int64)
+        self.sp = np.full(n, 0xff, dtype=np.int64)
+        self.acc = np.zeros(n, dtype=np.int64)
+        self.idx = np.zeros(n, dtype=np.int64)
+        self.idy = np.zeros(n, dtype=np.int64)
+        self.status = np.full(n, RESERVED, dtype=np.int64)
+        self.cycles = np.zeros(n, dtype=np.int64)
+        self.instructions = np.zeros(n, dtype=np.int64)
+        self.reason = np.full(n, RUNNING, dtype='U16')  # Why an instance stopped, RUNNING while it runs
+        self.trap_detection = True
+        self._operations = {name: getattr(self, f'_{name.lower()}', None) for name in
+                            {entry.name for entry in OPCODES.values()}}
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot, n: int) -> 'VectorCPU':
+        """
+        Method to create n instances in the state of a snapshot
+        :param snapshot: Snapshot: State of every instance
+        :param n: int: Number of instances
+        :return: VectorCPU: Instances ready to run
+        """
+        engine = cls(n, snapshot.image)
+        engine.pc[:], engine.sp[:], engine.acc[:], engine.idx[:], engine.idy[:], engine.status[:] = snapshot[:6]
+        engine.cycles[:] = snapshot.cycles
+        return engine
+
+    def snapshot(self, instance: int) -> Snapshot:
+        """
+        Method to capture the state of one instance, e.g. to continue it with a CPU
+        :param instance: int: Number of the instance
+        :return: Snapshot: State of the instance
+        """
+        pages = tuple(page.tobytes() for page in self.memory[instance].reshape(Memory.PAGES, Memory.PAGE_SIZE))
+        return Snapshot(*(int(register[instance]) for register in
+                          (self.pc, self.sp, self.acc, self.idx, self.idy, self.status, self.cycles)), pages)
+
+    def results(self, capture=()) -> np.ndarray:
+        """
+        Method to collect the state of every instance
+        :param capture: Addresses whose values are returned in the memory field
+        :return: np.ndarray: One record of cpu6502.parallel.result_dtype(capture) per instance
+        """
+        results = np.zeros(self.n, dtype=result_dtype(capture))
+        results['index'] = np.arange(self.n)
+        results['reason'] = self.reason
+        for field in ('pc', 'acc', 'idx', 'idy', 'sp', 'status', 'instructions', 'cycles'):
+            results[field] = getattr(self, field)
+        if len(capture):
+            results['memory'] = self.memory[:, list(capture)]
+        return results
+
+    def run(self, max_cycles: int = None, max_instructions: int = None, until_pc=(), trap: bool = True,
+            capture=()) -> np.ndarray:
+        """
+        Method to run all instances until each of them meets one of the stop conditions (see CPU.run). The budgets
+        are counted per instance from the start of the run.
+        :param max_cycles: int: Cycle budget of every instance
+        :param max_instructions: int: Instruction budget of every instance
+        :param until_pc: Address(es) stopping an instance before the instruction at them is executed
+        :param trap: bool: Stop an instance after an instruction which jumps or branches to itself
+        :param capture: Addresses whose values are returned
+        :return: np.ndarray: See results
+        """
+        if max_cycles is None and max_instructions is None and not trap:
+            raise ValueError('A run without a budget and without trap detection may never stop')
+        until_pc = np.array(sorted((until_pc,) if isinstance(until_pc, int) else until_pc), dtype=np.int64)
+        self.trap_detection = trap
+        self.reason[:] = RUNNING
+        cycle_limit = self.cycles + (max_cycles if max_cycles is not None else np.iinfo(np.int64).max // 2)
+        instruction_limit = self.instructions + (max_instructions if max_instructions is not None
+                                                 else np.iinfo(np.int64).max // 2)
+        running = np.arange(self.n)
+        while running.size:
+            for reason, stopped in ((CPU.STOP_BREAKPOINT, np.isin(self.pc[running], until_pc)),
+                                    (CPU.STOP_INSTRUCTIONS, self.instructions[running] >= instruction_limit[running]),
+                                    (CPU.STOP_CYCLES, self.cycles[running] >= cycle_limit[running]),
+                                    (CPU.STOP_END_OF_MEMORY, self.pc[running] >= 0xffff)):
+                if stopped.any():
+                    self.reason[running[stopped]] = np.where(self.reason[running[stopped]] == RUNNING, reason,
+                                                             self.reason[running[stopped]])
+            running = running[self.reason[running] == RUNNING]
+            if running.size:
+                self.step(running)
+                running = running[self.reason[running] == RUNNING]
+        return self.results(capture)
+
+    def step(self, instances: np.ndarray = None) -> None:
+        """
+        Method to execute one instruction in each of the given instances
+        :param instances: np.ndarray: Numbers of the instances, all of them by default
+        :return: None
+        """
+        instances = np.arange(self.n) if instances is None else np.asarray(instances)
+        opcodes = self.memory[instances, self.pc[instances]]
+        order = np.argsort(opcodes, kind='stable')
+        opcodes = opcodes[order]
+        bounds = np.flatnonzero(np.diff(opcodes)) + 1
+        for group, opcode in zip(np.split(instances[order], bounds), opcodes[np.r_[0, bounds]]):
+            self.execute(int(opcode), group)
+
+    def execute(self, opcode: int, rows: np.ndarray) -> None:
+        """
+        Method to execute the instruction opcode, fetched at the pc of the instances rows
+        :param opcode: int: Opcode of the instruction
+        :param rows: np.ndarray: Numbers of the instances
+        :return: None
+        """
+        entry = OPCODES.get(opcode)
+        self.instructions[rows] += 1
+        self.cycles[rows] += CYCLES[opcode]
+        if entry is None:  # Skipped, like cpu6502.instructions.instructions.IllegalOpcode does
+            self.pc[rows] = (self.pc[rows] + 1) & 0xffff
+        else:
+            self._operations[entry.name](rows, entry.mode, opcode)
+        if SETS_RESERVED[opcode]:
+            self.status[rows] |= RESERVED
+
+    # Operands
+
+    def _byte(self, rows: np.ndarray, address: np.ndarray) -> np.ndarray:
+        return self.memory[rows, address & 0xffff].astype(np.int64)
+
+    def _word(self, rows: np.ndarray, address: np.ndarray) -> np.ndarray:
+        return self._byte(rows, address) | (self._byte(rows, address + 1) << 8)
+
+    def _address(self, rows: np.ndarray, mode: str, page_penalty: bool = True) -> np.ndarray:
+        """
+        Method to resolve the operand address of an addressing mode and move the pc after the instruction
+        :param page_penalty: bool: Count the extra cycle of (Indirect),Y on page crossing
+        :return: np.ndarray: Addresses (for Immediate the address of the operand itself)
+        """
+        pc = self.pc[rows]
+        if mode in ('Absolute', 'Absolute,X', 'Absolute,Y', 'Indirect'):
+            self.pc[rows] = (pc + 3) & 0xffff
+            address = self._word(rows, pc + 1)
+            if mode == 'Indirect':
+                return self._word(rows, address)
+            if mode == 'Absolute':
+                return address
+            indexed = address + (self.idx[rows] if mode == 'Absolute,X' else self.idy[rows])
+            self.cycles[rows] += (address >> 8) != (indexed >> 8)
+            return indexed & 0xffff
+        self.pc[rows] = (pc + 2) & 0xffff
+        if mode == 'Immediate':
+            return (pc + 1) & 0xffff
+        operand = self._byte(rows, pc + 1)
+        if mode == 'ZeroPage':
+            return operand
+        if mode == 'ZeroPage,X':
+            return (operand + self.idx[rows]) & 0xff
+        if mode == 'ZeroPage,Y':
+            return (operand + self.idy[rows]) & 0xff
+        if mode == '(Indirect,X)':
+            return self._word(rows, (operand + self.idx[rows]) & 0xff)
+        # (Indirect),Y, the page crossing is detected like AbstractInstruction.indirect_indexed does
+        address = self._word(rows, operand) + self.idy[rows]
+        if page_penalty:
+            self.cycles[rows] += (address >> 8) != ((address + self.idy[rows]) >> 8)
+        return address & 0xffff
+
+    def _operand(self, rows: np.ndarray, mode: str) -> np.ndarray:
+        return self._byte(rows, self._address(rows, mode))
+
+    def _set_nz(self, rows: np.ndarray, value: np.ndarray) -> None:
+        self.status[rows] = (self.status[rows] & NOT_NZ) | NZ_ARRAY[value]
+
+    def _modify(self, rows: np.ndarray, mode: str, operation) -> None:
+        """
+        Method to execute a read-modify-write instruction on the accumulator or the memory
+        :param operation: Callable: operation(value) -> new value
+        """
+        if mode == 'Accumulator':
+            self.pc[rows] = (self.pc[rows] + 1) & 0xffff
+            self.acc[rows] = operation(self.acc[rows])
+            return
+        address = self._address(rows, mode)
+        self.memory[rows, address] = operation(self._byte(rows, address))
+
+    # Stack
+
+    def _push(self, rows: np.ndarray, value: np.ndarray) -> None:
+        self.memory[rows, 0x0100 | self.sp[rows]] = value & 0xff
+        self.sp[rows] = (self.sp[rows] - 1) & 0xff
+
+    def _pull(self, rows: np.ndarray) -> np.ndarray:
+        self.sp[rows] = (self.sp[rows] + 1) & 0xff
+        return self._byte(rows, 0x0100 | self.sp[rows])
+
+    # Instructions, called with the instances, the addressing mode and the opcode
+
+    def _load(self, rows, mode, opcode):
+        value = self._operand(rows, mode)
+        getattr(self, REGISTER_OF[OPCODES[opcode].name])[rows] = value
+        self._set_nz(rows, value)
+
+    _lda = _ldx = _ldy = _load
+
+    def _store(self, rows, mode, opcode):
+        address = self._address(rows, mode, page_penalty=False)  # STA (Indirect),Y always takes 6 cycles
+        self.memory[rows, address] = getattr(self, REGISTER_OF[OPCODES[opcode].name])[rows]
+
+    _sta = _stx = _sty = _store
+
+    def _transfer(self, rows, mode, opcode):
+        source, target = TRANSFERS[OPCODES[opcode].name]
+        self.pc[rows] = (self.pc[rows] + 1) & 0xffff
+        value = getattr(self, source)[rows]
+        getattr(self, target)[rows] = value
+        if target != 'sp':
+            self._set_nz(rows, value)
+
+    _tax = _tay = _txa = _tya = _tsx = _txs = _transfer
+
+    def _logical(self, rows, mode, opcode):
+        value = self._operand(rows, mode)
+        name = OPCODES[opcode].name
+        acc = self.acc[rows]
+        result = acc & value if name == 'AND' else acc | value if name == 'ORA' else acc ^ value
+        self.acc[rows] = result
+        self._set_nz(rows, result)
+
+    _and = _ora = _eor = _logical
+
+    def _bit(self, rows, mode, opcode):
+        value = self._operand(rows, mode)
+        self.status[rows] = (self.status[rows] & NOT_NVZ) | (value & (NEGATIVE | OVERFLOW)) | \
+            np.where(value & self.acc[rows] == 0, ZERO, 0)
+
+    def _arithmetic(self, rows, mode, opcode):
+        value = self._operand(rows, mode)
+        status = self.status[rows]
+        table = ADC_ARRAY if OPCODES[opcode].name == 'ADC' else SBC_ARRAY
+        result = table[((status & DECIMAL) << 14) | ((status & CARRY) << 16) | (self.acc[rows] << 8) | value]
+        self.acc[rows] = result & 0xff
+        self.status[rows] = (status & NOT_ADC_FLAGS) | (result >> 8)
+
+    _adc = _sbc = _arithmetic
+
+    def _compare(self, rows, mode, opcode):
+        value = self._operand(rows, mode)
+        register = getattr(self, REGISTER_OF[OPCODES[opcode].name])[rows]
+        self.status[rows] = (self.status[rows] & NOT_COMPARE_FLAGS) | (COMPARE_ARRAY[(register << 8) | value] >> 8)
+
+    _cmp = _cpx = _cpy = _compare
+
+    def _shift(self, rows, mode, opcode):
+        table = SHIFT_ARRAYS[OPCODES[opcode].name]
+        carry = (self.status[rows] & CARRY) << 8 if len(table) > 0x100 else 0
+
+        def operation(value):
+            result = table[carry | value]
+            self.status[rows] = (self.status[rows] & NOT_SHIFT_FLAGS) | (result >> 8)
+            return result & 0xff
+        self._modify(rows, mode, operation)
+
+    _asl = _lsr = _rol = _ror = _shift
+
+    def _step_memory(self, rows, mode, opcode):
+        delta = 1 if OPCODES[opcode].name == 'INC' else -1
+
+        def operation(value):
+            result = (value + delta) & 0xff
+            self._set_nz(rows, result)
+            return result
+        self._modify(rows, mode, operation)
+
+    _inc = _dec = _step_memory
+
+    def _step_register(self, rows, mode, opcode):
+        name = OPCODES[opcode].name
+        register = getattr(self, REGISTER_OF[name])
+        self.pc[rows] = (self.pc[rows] + 1) & 0xffff
+        register[rows] = (register[rows] + (1 if name.startswith('IN') else -1)) & 0xff
+        self._set_nz(rows, register[rows])
+
+    _inx = _iny = _dex = _dey = _step_register
+
+    def _flag_change(self, rows, mode, opcode):
+        flag, value = FLAG_CHANGES[OPCODES[opcode].name]
+        self.pc[rows] = (self.pc[rows] + 1) & 0xffff
+        self.status[rows] = (self.status[rows] & (0xff ^ flag)) | value
+
+    _clc = _sec = _cli = _sei = _clv = _cld = _sed = _flag_change
+
+    def _branch(self, rows, mode, opcode):
+        flag, value = BRANCHES[OPCODES[opcode].name]
+        pc = (self.pc[rows] + 2) & 0xffff
+        offset = self._byte(rows, self.pc[rows] + 1)
+        taken = (self.status[rows] & flag) == value
+        target = (pc + (offset ^ 0x80) - 0x80) & 0xffff
+        self.pc[rows] = np.where(taken, target, pc)
+        self.cycles[rows] += taken.astype(np.int64) + (taken & ((target >> 8) != (pc >> 8)))
+        self._trap(rows[taken & (offset == 0xfe)])
+
+    _bpl = _bmi = _bvc = _bvs = _bcc = _bcs = _bne = _beq = _branch
+
+    def _trap(self, rows: np.ndarray) -> None:
+        if self.trap_detection and rows.size:
+            self.reason[rows] = CPU.STOP_TRAP
+
+    def _jmp(self, rows, mode, opcode):
+        start = self.pc[rows]
+        target = self._address(rows, mode)
+        self.pc[rows] = target
+        self._trap(rows[target == start])
+
+    def _jsr(self, rows, mode, opcode):
+        target = self._address(rows, mode)
+        return_point = self.pc[rows] - 1
+        self._push(rows, return_point >> 8)
+        self._push(rows, return_point)
+        self.pc[rows] = target
+
+    def _rts(self, rows, mode, opcode):
+        low = self._pull(rows)
+        self.pc[rows] = ((low | (self._pull(rows) << 8)) + 1) & 0xffff
+
+    def _rti(self, rows, mode, opcode):
+        self.status[rows] = self._pull(rows) | BREAK | RESERVED
+        low = self._pull(rows)
+        self.pc[rows] = low | (self._pull(rows) << 8)
+
+    def _brk(self, rows, mode, opcode):
+        return_point = (self.pc[rows] + 2) & 0xffff
+        self._push(rows, return_point >> 8)
+        self._push(rows, return_point)
+        self.status[rows] |= BREAK
+        self._push(rows, self.status[rows])
+        self.pc[rows] = self._word(rows, np.full(rows.size, 0xfffe))
+        self.status[rows] |= INTERRUPT
+
+    def _pha(self, rows, mode, opcode):
+        self.pc[rows] = (self.pc[rows] + 1) & 0xffff
+        self._push(rows, self.acc[rows])
+
+    def _php(self, rows, mode, opcode):
+        self.pc[rows] = (self.pc[rows] + 1) & 0xffff
+        self._push(rows, self.status[rows])
+
+    def _pla(self, rows, mode, opcode):
+        self.pc[rows] = (self.pc[rows] + 1) & 0xffff
+        self.acc[rows] = self._pull(rows)
+        self._set_nz(rows, self.acc[rows])
+
+    def _plp(self, rows, mode, opcode):
+        self.pc[rows] = (self.pc[rows] + 1) & 0xffff
+        self.status[rows] = self._pull(rows) | BREAK | RESERVED
+
+    def _nop(self, rows, mode, opcode):
+        self.pc[rows] = (self.pc[rows] + 1) & 0xffff